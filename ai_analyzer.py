@@ -6,6 +6,7 @@ import json
 from typing import List, Dict, Any
 from dataclasses import asdict
 from multi_source_controller import MatchData
+from name_pool import name_pool
 import config
 
 logger = logging.getLogger(__name__)
@@ -442,9 +443,9 @@ class AIAnalyzer:
     
     def _analyze_league_quality(self, context: Dict[str, Any]) -> float:
         """Анализ качества лиги по названиям команд"""
-        team1 = context.get('team1', '').lower()
-        team2 = context.get('team2', '').lower()
-        league = context.get('league', '').lower()
+        team1 = name_pool.lower(context.get('team1', ''))
+        team2 = name_pool.lower(context.get('team2', ''))
+        league = name_pool.lower(context.get('league', ''))
         
         # Ключевые слова для определения качества лиги
         high_quality_keywords = [
@@ -591,8 +592,8 @@ class AIAnalyzer:
         confidence += tournament_factor
         
         # Фактор 5: Бонус за известных игроков
-        player1 = context.get('team1', '').lower()
-        player2 = context.get('team2', '').lower()
+        player1 = name_pool.lower(context.get('team1', ''))
+        player2 = name_pool.lower(context.get('team2', ''))
         known_players = ['djokovic', 'nadal', 'federer', 'murray', 'medvedev', 'tsitsipas', 'zverev', 'rublev', 'sinner', 'alcaraz']
         if any(player in player1 or player in player2 for player in known_players):
             confidence += 0.1
@@ -644,9 +645,9 @@ class AIAnalyzer:
     
     def _analyze_tennis_tournament_quality(self, context: Dict[str, Any]) -> float:
         """Анализ качества теннисного турнира"""
-        team1 = context.get('team1', '').lower()
-        team2 = context.get('team2', '').lower()
-        league = context.get('league', '').lower()
+        team1 = name_pool.lower(context.get('team1', ''))
+        team2 = name_pool.lower(context.get('team2', ''))
+        league = name_pool.lower(context.get('league', ''))
         
         # Ключевые слова для престижных турниров
         high_quality_keywords = [
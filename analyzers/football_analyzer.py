@@ -27,6 +27,7 @@ class FootballAnalyzer:
     def __init__(self, browser_controller: HTTPControllerDemo, fuzzy_matcher: FuzzyMatcher):
         self.browser = browser_controller
         self.fuzzy_matcher = fuzzy_matcher
+        self._paired_matches = None
         self.threshold = ANALYSIS_SETTINGS['favorite_probability_threshold']
     
     def analyze_football_matches(self) -> List[FootballRecommendation]:
@@ -57,6 +58,9 @@ class FootballAnalyzer:
             scores24_matches = self._safe_get_scores24_matches('football')
             print(f"Найдено {len(scores24_matches)} футбольных матчей на Scores24")
             
+            # Пакетное сопоставление: каждый матч Scores24 достается только одному матчу Betboom
+            self._paired_matches = self.fuzzy_matcher.pair_events_by_id(betboom_matches, scores24_matches)
+            
             # Анализируем каждый матч с обработкой ошибок
             for i, match in enumerate(betboom_matches):
                 try:
@@ -180,21 +184,13 @@ class FootballAnalyzer:
         Returns:
             Optional[Dict]: Соответствующий матч или None
         """
-        for scores24_match in scores24_matches:
-            # Сопоставляем команды
-            team1_match, confidence1 = self.fuzzy_matcher.match_teams(
-                betboom_match.team1, 
-                [scores24_match['team1']]
-            )
-            team2_match, confidence2 = self.fuzzy_matcher.match_teams(
-                betboom_match.team2, 
-                [scores24_match['team2']]
-            )
-            
-            if team1_match and team2_match and confidence1 >= 70 and confidence2 >= 70:
-                return scores24_match
+        # Пара, уже найденная пакетным сопоставлением для этого списка Scores24
+        if self._paired_matches and self._paired_matches[0] is scores24_matches:
+            return self._paired_matches[1].get(id(betboom_match))
         
-        return None
+        # Индекс строится один раз на список Scores24 и переиспользуется для всех матчей
+        index = self.fuzzy_matcher.get_match_index(scores24_matches, 'team1', 'team2')
+        return index.find(betboom_match.team1, betboom_match.team2, min_confidence=70)
     
     def _analyze_football_statistics(self, betboom_match: MatchData, scores24_match: Dict) -> float:
         """
@@ -26,6 +26,7 @@ class TableTennisAnalyzer:
     def __init__(self, browser_controller: HTTPControllerDemo, fuzzy_matcher: FuzzyMatcher):
         self.browser = browser_controller
         self.fuzzy_matcher = fuzzy_matcher
+        self._paired_matches = None
         self.threshold = ANALYSIS_SETTINGS['favorite_probability_threshold']
     
     def analyze_table_tennis_matches(self) -> List[TableTennisRecommendation]:
@@ -56,6 +57,11 @@ class TableTennisAnalyzer:
             scores24_matches = self.browser.get_scores24_matches('table_tennis')
             print(f"Найдено {len(scores24_matches)} матчей настольного тенниса на Scores24")
             
+            # Пакетное сопоставление: каждый матч Scores24 достается только одному матчу Betboom
+            self._paired_matches = self.fuzzy_matcher.pair_events_by_id(
+                betboom_matches, scores24_matches, right_keys=('player1', 'player2'), players=True
+            )
+            
             # Анализируем каждый матч
             for match in betboom_matches:
                 recommendation = self._analyze_single_match(match, scores24_matches)
@@ -134,21 +140,13 @@ class TableTennisAnalyzer:
         Returns:
             Optional[Dict]: Соответствующий матч или None
         """
-        for scores24_match in scores24_matches:
-            # Сопоставляем игроков
-            player1_match, confidence1 = self.fuzzy_matcher.match_players(
-                betboom_match.team1, 
-                [scores24_match['player1']]
-            )
-            player2_match, confidence2 = self.fuzzy_matcher.match_players(
-                betboom_match.team2, 
-                [scores24_match['player2']]
-            )
-            
-            if player1_match and player2_match and confidence1 >= 70 and confidence2 >= 70:
-                return scores24_match
+        # Пара, уже найденная пакетным сопоставлением для этого списка Scores24
+        if self._paired_matches and self._paired_matches[0] is scores24_matches:
+            return self._paired_matches[1].get(id(betboom_match))
         
-        return None
+        # Индекс строится один раз на список Scores24 и переиспользуется для всех матчей
+        index = self.fuzzy_matcher.get_match_index(scores24_matches, 'player1', 'player2', players=True)
+        return index.find(betboom_match.team1, betboom_match.team2, min_confidence=70)
     
     def _analyze_table_tennis_statistics(self, betboom_match: MatchData, scores24_match: Dict) -> float:
         """
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк сопоставления матчей букмекера с матчами Scores24
+
+Использование:
+    python3 benchmark_fuzzy_matcher.py [--events 300] [--seed 1] [--skip-loop]
+
+Сравнивает прежний перебор пар (match_teams на каждую пару матчей),
+блочный индекс (MatchIndex) и пакетное сопоставление (pair_events).
+"""
+
+import argparse
+import logging
+import random
+import time
+import warnings
+
+warnings.filterwarnings('ignore', message='Using slow pure-python SequenceMatcher')
+
+import fuzzy_matcher
+from fuzzy_matcher import FuzzyMatcher, NameAliasTable
+
+logging.basicConfig(level=logging.ERROR)
+
+CITIES = ['Москва', 'Казань', 'Самара', 'Ростов', 'Тула', 'Омск', 'Пермь', 'Уфа', 'Сочи', 'Курск',
+          'London', 'Madrid', 'Milan', 'Porto', 'Lyon', 'Bremen', 'Leeds', 'Bilbao', 'Genoa', 'Basel']
+CLUBS = ['Динамо', 'Спартак', 'Локомотив', 'Торпедо', 'Зенит', 'Крылья', 'Факел', 'Урал',
+         'Rovers', 'Wanderers', 'Olympic', 'Racing', 'Athletic', 'Sporting', 'Union', 'Rapid']
+
+
+def build_events(count: int, seed: int):
+    """Матчи Scores24 и соответствующие им (с искажениями) матчи букмекера"""
+    rng = random.Random(seed)
+    names = list(dict.fromkeys(f"{rng.choice(CLUBS)} {rng.choice(CITIES)} {rng.randint(1, 99)}"
+                               for _ in range(count * 4)))
+    rng.shuffle(names)
+
+    scores24 = [{'id': i, 'team1': names[2 * i], 'team2': names[2 * i + 1]} for i in range(count)]
+
+    def distort(name):
+        variant = rng.random()
+        if variant < 0.3:
+            return name.upper()
+        if variant < 0.5:
+            return "ФК " + name
+        if variant < 0.7:
+            position = rng.randrange(len(name))
+            return name[:position] + name[position + 1:]
+        return name
+
+    bookmaker = [{'expected': event['id'], 'team1': distort(event['team1']), 'team2': distort(event['team2'])}
+                 for event in rng.sample(scores24, len(scores24))]
+    return bookmaker, scores24
+
+
+def linear_search(matcher, bookmaker, scores24):
+    """Прежний алгоритм анализаторов: match_teams для каждой пары матчей"""
+    pairs = []
+    for event in bookmaker:
+        for candidate in scores24:
+            team1, confidence1 = matcher.match_teams(event['team1'], [candidate['team1']])
+            team2, confidence2 = matcher.match_teams(event['team2'], [candidate['team2']])
+            if team1 and team2 and confidence1 >= 70 and confidence2 >= 70:
+                pairs.append((event, candidate))
+                break
+    return pairs
+
+
+def index_search(matcher, bookmaker, scores24):
+    """Блочный индекс: первый подходящий матч для каждой строки букмекера"""
+    index = matcher.get_match_index(scores24)
+    pairs = []
+    for event in bookmaker:
+        found = index.find(event['team1'], event['team2'])
+        if found:
+            pairs.append((event, found))
+    return pairs
+
+
+def batch_search(matcher, bookmaker, scores24):
+    """Пакетное сопоставление с глобальным назначением один-к-одному"""
+    return [(left, right) for left, right, _ in matcher.pair_events(bookmaker, scores24)]
+
+
+def measure(title, search, matcher, bookmaker, scores24, baseline_s=None):
+    """Запускает один вариант и печатает время и количество пар"""
+    started = time.perf_counter()
+    pairs = search(matcher, bookmaker, scores24)
+    elapsed = time.perf_counter() - started
+
+    speedup = f"{baseline_s / elapsed:>9.1f}x" if baseline_s else f"{'—':>10}"
+    correct = sum(1 for left, right in pairs if left['expected'] == right['id'])
+    print(f"{title:<28} {len(pairs):>6} {correct:>8} {elapsed * 1000:>12.1f} {speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сопоставления матчей")
+    parser.add_argument('--events', type=int, default=300, help="Матчей на каждой стороне")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--skip-loop', action='store_true', help="Не запускать медленный перебор пар")
+    args = parser.parse_args()
+
+    bookmaker, scores24 = build_events(args.events, args.seed)
+    backend = "rapidfuzz.cdist" if fuzzy_matcher.rapid_process is not None else "блочный индекс"
+
+    print(f"Матчей: {args.events} x {args.events}, пакетный режим: {backend}")
+    print(f"{'Вариант':<28} {'Пар':>6} {'Верных':>8} {'Время, мс':>12} {'Ускорение':>10}")
+
+    def fresh_matcher():
+        return FuzzyMatcher(threshold=70, aliases=NameAliasTable('benchmark_aliases.json'))
+
+    baseline_s = None
+    if not args.skip_loop:
+        baseline_s = measure("Перебор пар (match_teams)", linear_search, fresh_matcher(), bookmaker, scores24)
+    measure("Блочный индекс (MatchIndex)", index_search, fresh_matcher(), bookmaker, scores24, baseline_s)
+    measure(f"pair_events ({backend})", batch_search, fresh_matcher(), bookmaker, scores24, baseline_s)
+
+
+if __name__ == "__main__":
+    main()
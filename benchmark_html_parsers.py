@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк бэкендов HTML-парсинга на сохраненных страницах
+
+Использование:
+    python3 benchmark_html_parsers.py [страница.html ...] [--sport football] [--repeat 5]
+
+Без файлов генерируется синтетическая страница scores24 с сотнями live-матчей.
+"""
+
+import argparse
+import logging
+import time
+from typing import List
+
+from config import ANALYSIS_SETTINGS
+from enhanced_real_controller import EnhancedRealDataController
+from html_backend import AUTO_ORDER, BACKENDS
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def build_synthetic_scores24_page(rows: int = 400) -> str:
+    """Создает страницу в разметке scores24 с заданным количеством матчей"""
+    match_rows = []
+    for i in range(rows):
+        match_rows.append(f"""
+        <div class="sc-17qxh4e-0 dHxDFU">
+            <div class="sc-5a92rz-5 knTRcb">Лига {i % 20}</div>
+            <a href="/ru/soccer/m-{i}-team-{i}-vs-team-{i + 1}">
+                <div class="sc-17qxh4e-10 esbhnW">Команда {i}</div>
+                <div class="sc-17qxh4e-10 esbhnW">Команда {i + 1}</div>
+            </a>
+            <div class="sc-pvs6fr-1 bAhpay">{i % 4}</div>
+            <div class="sc-pvs6fr-1 bAhpay">{i % 3}</div>
+            <div class="sc-1p31vt4-0 ghrzJz">{i % 90}'</div>
+        </div>""")
+    return f"<html><body><div class='matches'>{''.join(match_rows)}</div></body></html>"
+
+
+def benchmark(pages: List[str], sport: str, repeat: int):
+    """Сравнивает доступные бэкенды на одних и тех же страницах"""
+    controller = EnhancedRealDataController()
+    original_backend = ANALYSIS_SETTINGS.get('html_parser_backend', 'auto')
+    reference = None
+
+    print(f"{'Бэкенд':<12} {'Матчей':>8} {'Время, мс':>12} {'Ускорение':>10}")
+    baseline_ms = None
+
+    try:
+        for name in reversed(AUTO_ORDER):
+            if not BACKENDS[name].is_available():
+                print(f"{name:<12} {'—':>8} {'не установлен':>12}")
+                continue
+
+            ANALYSIS_SETTINGS['html_parser_backend'] = name
+            started = time.perf_counter()
+            for _ in range(repeat):
+                matches = [m for page in pages for m in controller.parse_scores24_matches(page, sport)]
+            elapsed_ms = (time.perf_counter() - started) / repeat * 1000
+
+            extracted = [(m.team1, m.team2, m.score, m.minute, m.league, m.url) for m in matches]
+            if reference is None:
+                reference = extracted
+            consistent = "" if extracted == reference else "  ⚠️ результаты отличаются"
+
+            baseline_ms = baseline_ms or elapsed_ms
+            print(f"{name:<12} {len(matches):>8} {elapsed_ms:>12.1f} {baseline_ms / elapsed_ms:>9.1f}x{consistent}")
+    finally:
+        ANALYSIS_SETTINGS['html_parser_backend'] = original_backend
+        controller.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк бэкендов HTML-парсинга")
+    parser.add_argument('pages', nargs='*', help="Сохраненные HTML-страницы scores24")
+    parser.add_argument('--sport', default='football')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--rows', type=int, default=400, help="Матчей на синтетической странице")
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = []
+        for path in args.pages:
+            with open(path, 'r', encoding='utf-8') as f:
+                pages.append(f.read())
+    else:
+        pages = [build_synthetic_scores24_page(args.rows)]
+
+    benchmark(pages, args.sport, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
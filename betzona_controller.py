@@ -1,29 +1,17 @@
 import requests
-from bs4 import BeautifulSoup
 import re
 import logging
-from typing import List
-from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from match_record import MatchRecord
 import config
+from fetch_engine import fetch_engine
+from html_backend import parse_html
+from name_pool import name_pool
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
 
-@dataclass
-class MatchData:
-    team1: str
-    team2: str
-    score: str
-    minute: str = ""
-    coefficient: float = 0.0
-    is_locked: bool = False
-    sport_type: str = ""
-    league: str = ""
-    url: str = ""
-    probability: float = 0.0  # Вероятность победы фаворита
-    recommendation_type: str = ""  # 'win' or 'total'
-    recommendation_value: str = ""  # 'П1', 'ТБ X', 'ТМ Y'
-    justification: str = ""  # Обоснование рекомендации
-    source: str = ""  # Источник данных
+# Единая запись матча для всех контроллеров (__slots__, общая таблица строк)
+MatchData = MatchRecord
 
 class BetzonaController:
     def __init__(self):
@@ -45,25 +33,32 @@ class BetzonaController:
         }
 
     def _fetch_page(self, url):
-        try:
-            response = self.session.get(url, headers=self.headers, allow_redirects=True, timeout=10)
-            response.raise_for_status()
-            self.logger.info(f"Запрос к Betzona: {url}")
-            self.logger.info(f"Получен ответ: {len(response.text)} символов")
-            return response.text
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Ошибка при запросе к Betzona ({url}): {e}")
+        self.logger.info(f"Запрос к Betzona: {url}")
+        html = fetch_engine.fetch(url, headers=self.headers, timeout=10)
+        if html is None:
+            self.logger.error(f"Ошибка при запросе к Betzona ({url})")
             return None
+        self.logger.info(f"Получен ответ: {len(html)} символов")
+        return html
 
-    def _parse_match_data(self, match_element, sport_type):
-        """Парсинг данных одного матча"""
+    def _parse_match_data(self, match_element, page_sports: List[str]):
+        """
+        Парсинг данных одного матча
+        
+        Args:
+            match_element: Элемент матча на странице
+            page_sports (List[str]): Виды спорта, которые обслуживает страница
+            
+        Returns:
+            Optional[MatchData]: Матч с определенным видом спорта или None
+        """
         try:
             # Проверяем, что это live-матч
             if match_element.get('data-is-live') != '1':
                 return None
                 
             # Извлекаем команды
-            teams = match_element.find_all('div', class_='match-scores-item__team')
+            teams = match_element.select('div.match-scores-item__team')
             if len(teams) < 2:
                 return None
                 
@@ -71,12 +66,12 @@ class BetzonaController:
             team2 = teams[1].get_text(strip=True)
             
             # Извлекаем счет
-            score_element = match_element.find('div', class_='match-scores-item__scores_main')
+            score_element = match_element.select_one('div.match-scores-item__scores_main')
             if not score_element:
                 return None
                 
-            home_score = score_element.find('div', class_='match-scores-item__scores_home')
-            away_score = score_element.find('div', class_='match-scores-item__scores_away')
+            home_score = score_element.select_one('div.match-scores-item__scores_home')
+            away_score = score_element.select_one('div.match-scores-item__scores_away')
             
             if not home_score or not away_score:
                 return None
@@ -84,7 +79,7 @@ class BetzonaController:
             score = f"{home_score.get_text(strip=True)}:{away_score.get_text(strip=True)}"
             
             # Извлекаем минуту
-            minute_element = match_element.find('div', class_='match-scores-item__status')
+            minute_element = match_element.select_one('div.match-scores-item__status')
             minute = ""
             if minute_element:
                 minute_text = minute_element.get_text(strip=True)
@@ -95,25 +90,20 @@ class BetzonaController:
             
             # Извлекаем лигу/турнир
             league = ""
-            tournament_element = match_element.find_parent('div', class_='match-scores-tournament')
+            tournament_element = match_element.closest('div.match-scores-tournament')
             if tournament_element:
-                title_element = tournament_element.find('div', class_='match-scores-tournament__header_title')
+                title_element = tournament_element.select_one('div.match-scores-tournament__header_title')
                 if title_element:
                     league = title_element.get_text(strip=True)
             
-            # Фильтрация по типу спорта для тенниса и настольного тенниса
-            if sport_type == 'table_tennis':
-                # Проверяем, что это настольный теннис по названию турнира
-                if not self._is_table_tennis_match(league, team1, team2):
-                    return None
-            elif sport_type == 'tennis':
-                # Проверяем, что это обычный теннис (не настольный)
-                if self._is_table_tennis_match(league, team1, team2):
-                    return None
+            # Определяем вид спорта (теннис и настольный теннис делят одну страницу)
+            sport_type = self._resolve_sport(league, team1, team2, page_sports)
+            if not sport_type:
+                return None
             
             # Извлекаем ссылку на матч
             link = ""
-            link_element = match_element.find('a')
+            link_element = match_element.select_one('a')
             if link_element and link_element.get('href'):
                 link = link_element.get('href')
                 if not link.startswith('http'):
@@ -133,6 +123,14 @@ class BetzonaController:
             self.logger.error(f"Ошибка при парсинге матча: {e}")
             return None
     
+    def _resolve_sport(self, league: str, team1: str, team2: str, page_sports: List[str]) -> Optional[str]:
+        """Определяет, к какому из видов спорта страницы относится матч"""
+        if len(page_sports) == 1:
+            return page_sports[0]
+        
+        sport_type = 'table_tennis' if self._is_table_tennis_match(league, team1, team2) else 'tennis'
+        return sport_type if sport_type in page_sports else None
+    
     def _is_table_tennis_match(self, league: str, team1: str, team2: str) -> bool:
         """Определяет, является ли матч настольным теннисом"""
         # Ключевые слова для настольного тенниса
@@ -143,53 +141,91 @@ class BetzonaController:
         ]
         
         # Проверяем название турнира
-        league_lower = league.lower()
+        league_lower = name_pool.lower(league)
         for keyword in table_tennis_keywords:
             if keyword in league_lower:
                 return True
         
         # Проверяем названия команд (иногда в названиях есть указания на тип спорта)
-        team_names = f"{team1} {team2}".lower()
+        team1_lower, team2_lower = name_pool.lower(team1), name_pool.lower(team2)
         for keyword in table_tennis_keywords:
-            if keyword in team_names:
+            if keyword in team1_lower or keyword in team2_lower:
                 return True
         
         return False
 
     def get_live_matches(self, sport_type: str) -> List[MatchData]:
         """Получение live-матчей для указанного вида спорта"""
-        url = self.sport_urls.get(sport_type)
-        if not url:
+        if sport_type not in self.sport_urls:
             self.logger.warning(f"URL для {sport_type} на Betzona не найден.")
             return []
+        
+        return self.get_live_matches_batch([sport_type])[sport_type]
 
-        html_content = self._fetch_page(url)
-        if not html_content:
-            return []
-
-        soup = BeautifulSoup(html_content, 'html.parser')
-        matches = []
+    def get_live_matches_batch(self, sport_types: List[str]) -> Dict[str, List[MatchData]]:
+        """
+        Получение live-матчей сразу для нескольких видов спорта
+        
+        Каждая страница загружается и разбирается один раз, а ее строки
+        за один проход распределяются по всем видам спорта, которые она
+        обслуживает (теннис и настольный теннис живут на одной странице).
+        
+        Args:
+            sport_types (List[str]): Виды спорта
+            
+        Returns:
+            Dict[str, List[MatchData]]: Вид спорта -> список матчей
+        """
+        results = {sport: [] for sport in sport_types}
+        
+        # Группируем запрошенные виды спорта по страницам
+        requested_by_url = {}
+        for sport in sport_types:
+            url = self.sport_urls.get(sport)
+            if not url:
+                self.logger.warning(f"URL для {sport} на Betzona не найден.")
+                continue
+            requested_by_url.setdefault(url, []).append(sport)
+        
+        for url, html_content in self._fetch_pages(requested_by_url.keys()).items():
+            if not html_content:
+                continue
+            
+            # Все виды спорта, которые обслуживает страница (не только запрошенные)
+            page_sports = [sport for sport, sport_url in self.sport_urls.items() if sport_url == url]
+            
+            document = parse_html(html_content)
 
-        # Ищем все live-матчи (они находятся в ссылках <a>)
-        match_elements = soup.find_all('a', class_='match-scores-item', attrs={'data-is-live': '1'})
-        self.logger.info(f"Найдено {len(match_elements)} live-матчей на Betzona для {sport_type}")
+            # Ищем все live-матчи (они находятся в ссылках <a>)
+            match_elements = document.select('a.match-scores-item[data-is-live="1"]')
+            self.logger.info(f"Найдено {len(match_elements)} live-матчей на Betzona для {', '.join(page_sports)}")
 
-        for match_element in match_elements:
-            match_data = self._parse_match_data(match_element, sport_type)
-            if match_data:
-                matches.append(match_data)
+            for match_element in match_elements:
+                match_data = self._parse_match_data(match_element, page_sports)
+                if match_data and match_data.sport_type in results:
+                    results[match_data.sport_type].append(match_data)
+        
+        for sport, matches in results.items():
+            self.logger.info(f"Успешно обработано {len(matches)} матчей для {sport}")
+        
+        return results
 
-        self.logger.info(f"Успешно обработано {len(matches)} матчей для {sport_type}")
-        return matches
+    def _fetch_pages(self, urls) -> Dict[str, Optional[str]]:
+        """Параллельная загрузка нескольких страниц Betzona"""
+        urls = list(urls)
+        if len(urls) == 1:
+            return {urls[0]: self._fetch_page(urls[0])}
+        
+        self.logger.info(f"Запрос к Betzona: {len(urls)} страниц")
+        return fetch_engine.fetch_many(urls, headers=self.headers, timeout=10)
 
     def get_all_live_matches(self) -> List[MatchData]:
         """Получение всех live-матчей по всем видам спорта"""
-        all_matches = []
+        matches_by_sport = self.get_live_matches_batch(list(self.sport_urls.keys()))
         
+        all_matches = []
         for sport in self.sport_urls.keys():
-            self.logger.info(f"Получение live-матчей для {sport}...")
-            matches = self.get_live_matches(sport)
-            all_matches.extend(matches)
+            all_matches.extend(matches_by_sport[sport])
             
         return all_matches
 
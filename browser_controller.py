@@ -5,19 +5,11 @@
 import time
 import json
 from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
+from match_record import MatchRecord
 
 
-@dataclass
-class MatchData:
-    """Структура данных о матче"""
-    team1: str
-    team2: str
-    score: str
-    minute: str
-    coefficient: float
-    is_locked: bool
-    sport_type: str
+# Единая запись матча для всех контроллеров (__slots__, общая таблица строк)
+MatchData = MatchRecord
 
 
 class BrowserController:
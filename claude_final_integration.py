@@ -4,6 +4,7 @@ import os
 from typing import List, Dict, Any
 from multi_source_controller import MatchData
 from config import ANALYSIS_SETTINGS
+from match_timeline import match_timeline
 
 # Загружаем переменные окружения из .env файла
 try:
@@ -156,6 +157,9 @@ class ClaudeFinalIntegration:
             matches_text += f"   Счет: {match.score}\n"
             matches_text += f"   Минута: {match.minute}\n"
             matches_text += f"   Лига: {match.league}\n"
+            dynamics = match_timeline.describe(match)
+            if dynamics:
+                matches_text += f"   Динамика: {dynamics}\n"
             matches_text += f"   URL: {match.link}\n\n"
         
         # Детальные правила анализа
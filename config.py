@@ -43,6 +43,60 @@ SCORES24_URLS = {
 ANALYSIS_SETTINGS = {
     'cycle_interval_minutes': 45,  # Обновлено по новому промпту
     'fuzzy_match_threshold': 70,  # Минимальный процент совпадения для fuzzy matching
+    'team_aliases_file': 'team_aliases.json',  # Постоянная таблица псевдонимов и нормализованных названий
+    'name_pool_file': None,  # Файл пула названий (None - пул только в памяти процесса)
+    'name_pool_max_entries': 200000,  # Максимум названий в пуле
+    'fuzzy_batch_matching': True,  # Пакетное сопоставление матчей (один матч Scores24 - одному матчу букмекера)
+    # ML лог прогнозов
+    'ml_storage_backend': 'jsonl',  # Хранилище: jsonl (только дозапись) / sqlite (WAL + индексы)
+    'ml_sqlite_file': 'ml_predictions.db',  # База SQLite (для ml_storage_backend = 'sqlite')
+    'ml_log_file': 'ml_predictions_log.jsonl',  # Файл лога прогнозов
+    'ml_legacy_log_file': 'ml_predictions_log.json',  # Старый лог (JSON-массив), переносится при первом запуске
+    'ml_fsync_batch': 20,  # fsync после стольких записей...
+    'ml_fsync_interval_seconds': 5,  # ...или через столько секунд
+    'ml_compact_after_updates': 200,  # Сжатие файла после стольких строк-обновлений
+    'performance_metrics_file': 'performance_metrics.json',  # Снимок скользящих метрик качества
+    'performance_metrics_windows': (7, 30),  # Окна метрик в днях (плюс все время)
+    'performance_metrics_save_every': 20,  # Сохранять снимок после стольких изменений
+    # Автоматический расчет результатов прогнозов по завершенным матчам Scores24
+    'settlement_interval_minutes': 30,  # Интервал опроса завершенных матчей
+    'settlement_lookback_hours': 48,  # Рассчитываются прогнозы не старше этого срока
+    # Временной ряд состояний live-матчей между циклами
+    'match_timeline_file': 'match_timeline.jsonl',  # Журнал наблюдений (None - только память)
+    'match_timeline_points': 120,  # Наблюдений в кольцевом буфере одного матча
+    'match_timeline_idle_minutes': 180,  # Матч удаляется, если не появлялся столько минут
+    'match_timeline_max_matches': 5000,  # Максимум матчей в памяти
+    'match_timeline_max_log_mb': 50,  # Ротация журнала при этом размере
+    'match_timeline_momentum_minutes': 15,  # Окно моментума
+    # Постоянный кэш ответов LLM (модель + версия промпта + состояние матча)
+    'llm_cache_enabled': True,
+    'llm_cache_file': 'llm_cache.db',  # SQLite-файл кэша
+    'llm_cache_ttl_minutes': 90,  # Время жизни ответа
+    'llm_cache_max_entries': 20000,  # Сверх лимита удаляются давно не использованные
+    'llm_cache_minute_bucket': 5,  # Корзина минут в отпечатке матча
+    # Общий исполнитель запросов к LLM (лимиты API вместо пауз между запросами)
+    'llm_max_workers': 12,  # Одновременных запросов
+    'llm_requests_per_minute': 60,  # Корзина запросов в минуту
+    'llm_tokens_per_minute': 100000,  # Корзина токенов в минуту
+    'llm_max_retries': 3,  # Повторов при лимитах и ошибках сети/сервера
+    'llm_backoff_base_seconds': 1.0,  # Первая задержка повтора (далее x2, со случайным разбросом)
+    'llm_backoff_max_seconds': 30.0,  # Максимальная задержка повтора
+    'llm_streaming_enabled': True,  # Потоковые ответы: прерывание, как только решающие поля означают отказ
+    # Пакетный анализ EnhancedOpenAIAnalyzer
+    'enhanced_gpt_batch_size': 3,  # Матчей в одном запросе (1 - каждый матч отдельным запросом)
+    # Очередь фоновых запросов к LLM (Batch API): обоснования, выводы статистики, бэктест
+    'llm_batch_enabled': True,
+    'llm_batch_file': 'llm_batch.db',  # SQLite-очередь запросов и ответов
+    'llm_batch_dir': 'llm_batches',  # Каталог JSONL-файлов пакетов перед отправкой
+    'llm_batch_base_url': None,  # Адрес API (None - OpenAI; llm_batch_stub - локальная заглушка)
+    'llm_batch_model': 'gpt-4o-mini',
+    'llm_batch_flush_size': 50,  # Отправлять пакет при стольких запросах в очереди...
+    'llm_batch_flush_minutes': 30,  # ...или когда самый старый запрос ждет столько минут
+    'llm_batch_max_requests': 5000,  # Максимум запросов в одном пакете
+    'llm_batch_poll_seconds': 300,  # Интервал опроса задач
+    'llm_batch_completion_window': '24h',
+    'llm_batch_max_attempts': 3,  # Попыток для запроса без результата (задача истекла/отменена)
+    'llm_batch_insights_time': '20:00',  # Запрос выводов AI по дневной статистике (МСК)
     'favorite_probability_threshold': 80,  # Минимальная вероятность победы фаворита
     'handball_goal_difference': 5,  # Минимальная разница в голаx для гандбола
     'handball_analysis_minute_start': 10,  # Начало анализа тоталов (минута)
@@ -50,11 +104,19 @@ ANALYSIS_SETTINGS = {
     'handball_total_margin': 4,  # Отступ для расчета тоталов
     # Настройки таймаутов для предотвращения зависания
     'http_timeout_seconds': 30,  # Таймаут для HTTP-запросов
+    'http_max_connections_per_host': 4,  # Максимум одновременных запросов к одному хосту
+    'http_fetch_workers': 16,  # Общее количество потоков движка загрузки страниц
+    'page_cache_ttl_seconds': 5,  # Время жизни страницы в кэше (повторные запросы в цикле не скачивают ее заново)
+    'page_cache_max_entries': 256,  # Максимальное количество страниц в кэше
+    'html_parser_backend': 'auto',  # Бэкенд парсинга: auto / selectolax / lxml / soup
     'analysis_timeout_seconds': 300,  # Максимальное время анализа одного цикла (5 минут)
     'max_retries': 3,  # Максимальное количество повторных попыток
     'retry_delay_seconds': 5,  # Задержка между повторными попытками
     'watchdog_interval_seconds': 60,  # Интервал проверки watchdog (1 минута)
     'max_memory_usage_percent': 80,  # Максимальное использование памяти (%)
+    # Параллельный анализ видов спорта в одном цикле
+    'parallel_sport_analysis': True,  # Запускать analyze_sport для всех видов спорта одновременно
+    'sport_analysis_workers': 4,      # Количество потоков для параллельного анализа
     # AI анализаторы (возврат к OpenAI GPT)
     'use_cursor_claude': False,  # Отключаем экспериментальный Claude
     'use_openai_gpt': True,      # Возвращаем OpenAI как основной анализатор
@@ -5,14 +5,19 @@
 
 import json
 import logging
-import time
-import hashlib
 from typing import List, Dict, Any, Optional
 from multi_source_controller import MatchData
 from config import ANALYSIS_SETTINGS
+from llm_cache import llm_cache, match_fingerprint
+from llm_executor import llm_executor
+from name_pool import name_pool
 
 logger = logging.getLogger(__name__)
 
+# Модель и версия шаблона промпта в ключе кэша LLM
+CACHE_MODEL = 'cursor-claude'
+PROMPT_TEMPLATE = 'cursor_claude/1'
+
 class CursorClaudeAnalyzer:
     """
     Анализатор матчей через Claude 3.5 Sonnet в Cursor - БЕСПЛАТНО!
@@ -21,9 +26,8 @@ class CursorClaudeAnalyzer:
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
         
-        # Кэш для экономии ресурсов
-        self.analysis_cache = {}
-        self.cache_ttl = 3600  # 1 час
+        # Кэш для экономии ресурсов - общий постоянный кэш ответов LLM (llm_cache)
+        self.cache = llm_cache
         
         # Статистика использования
         self.total_analyses = 0
@@ -45,22 +49,17 @@ class CursorClaudeAnalyzer:
         if not filtered_matches:
             return []
         
-        recommendations = []
-        
-        # Анализируем каждый матч
-        for match in filtered_matches[:3]:  # Максимум 3 матча
+        def analyze(match):
             try:
-                recommendation = self._analyze_single_match_with_claude(match, sport_type)
-                if recommendation:
-                    recommendations.append(recommendation)
-                    self.total_analyses += 1
-                    
-                # Небольшая пауза между анализами
-                time.sleep(1)
-                
+                return self._analyze_single_match_with_claude(match, sport_type)
             except Exception as e:
                 self.logger.error(f"Ошибка Claude анализа {match.team1} vs {match.team2}: {e}")
-                continue
+                return None
+        
+        # Анализируем каждый матч (параллельно, без пауз между анализами)
+        results = llm_executor.map(analyze, filtered_matches[:3])  # Максимум 3 матча
+        recommendations = [r for r in results if r]
+        self.total_analyses += len(recommendations)
         
         self.logger.info(f"🆓 Claude сгенерировал {len(recommendations)} рекомендаций (БЕСПЛАТНО!)")
         return recommendations
@@ -153,7 +152,7 @@ class CursorClaudeAnalyzer:
         """Сортирует матчи по приоритету для экономии ресурсов"""
         def get_priority_score(match):
             score = 0
-            league = getattr(match, 'league', '').lower()
+            league = name_pool.lower(getattr(match, 'league', ''))
             
             # Высокий приоритет топ-лигам
             if sport_type == 'football':
@@ -188,31 +187,24 @@ class CursorClaudeAnalyzer:
         try:
             # Проверяем кэш
             cache_key = self._create_cache_key(match, sport_type)
-            if cache_key in self.analysis_cache:
-                cached_result = self.analysis_cache[cache_key]
-                if time.time() - cached_result['timestamp'] < self.cache_ttl:
-                    self.logger.info(f"💾 Кэш: {match.team1} vs {match.team2}")
-                    self.cache_hits += 1
-                    return cached_result['recommendation']
-            
-            # Создаем промпт для Claude
-            claude_prompt = self._create_claude_prompt(match, sport_type)
-            
-            # ЗДЕСЬ БУДЕТ АНАЛИЗ ЧЕРЕЗ CLAUDE В CURSOR
-            # Пока используем имитацию Claude анализа
-            claude_response = self._simulate_claude_analysis(match, sport_type)
+            claude_response = self.cache.get(cache_key)
+            if claude_response is not None:
+                self.logger.info(f"💾 Кэш: {match.team1} vs {match.team2}")
+                self.cache_hits += 1
+            else:
+                # Создаем промпт для Claude
+                claude_prompt = self._create_claude_prompt(match, sport_type)
+                
+                # ЗДЕСЬ БУДЕТ АНАЛИЗ ЧЕРЕЗ CLAUDE В CURSOR
+                # Пока используем имитацию Claude анализа
+                claude_response = self._simulate_claude_analysis(match, sport_type)
+                
+                # Кэшируем ответ
+                if claude_response:
+                    self.cache.put(cache_key, claude_response, CACHE_MODEL, PROMPT_TEMPLATE)
             
             # Обрабатываем ответ
-            recommendation = self._process_claude_response(claude_response, match, sport_type)
-            
-            # Кэшируем результат
-            if recommendation:
-                self.analysis_cache[cache_key] = {
-                    'recommendation': recommendation,
-                    'timestamp': time.time()
-                }
-            
-            return recommendation
+            return self._process_claude_response(claude_response, match, sport_type)
             
         except Exception as e:
             self.logger.error(f"Ошибка Claude анализа: {e}")
@@ -475,9 +467,8 @@ JSON: {{"recommendation": "П1/П2/НЕТ", "confidence": 0.85, "reason": "об
             return None
     
     def _create_cache_key(self, match: MatchData, sport_type: str) -> str:
-        """Создает ключ кэша"""
-        key_string = f"{sport_type}_{match.team1}_{match.team2}_{match.score}_{match.minute}"
-        return hashlib.md5(key_string.encode()).hexdigest()
+        """Создает ключ кэша (модель, версия промпта, отпечаток состояния матча)"""
+        return self.cache.make_key(CACHE_MODEL, PROMPT_TEMPLATE, match_fingerprint(match, sport_type))
     
     def get_statistics(self) -> Dict:
         """Возвращает статистику использования"""
@@ -486,7 +477,7 @@ JSON: {{"recommendation": "П1/П2/НЕТ", "confidence": 0.85, "reason": "об
             'cache_hits': self.cache_hits,
             'cache_hit_rate': f"{(self.cache_hits / max(self.total_analyses, 1) * 100):.1f}%",
             'estimated_cost_savings': f"${self.cache_hits * 0.30:.2f}",
-            'cache_size': len(self.analysis_cache)
+            'cache_size': self.cache.stats()['size']
         }
     
     def test_connection(self) -> bool:
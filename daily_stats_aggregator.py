@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Однопроходная агрегация дневной статистики прогнозов
+
+Все счетчики хранятся в одном кубе (вид спорта, исход, уровень уверенности,
+источник) и обновляются по одной записи, поэтому новые прогнозы и результаты
+добавляются инкрементально, без повторного прохода по всему дню.
+
+Сами прогнозы агрегатор не хранит: для каждого прогноза запоминается только
+его ячейка куба, а статистика ссылается на прогнозы по timestamp.
+"""
+
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, Iterable
+
+from moscow_time import get_moscow_time
+from prediction_store import UPDATE_KEY
+
+# Виды спорта дневной статистики (порядок вывода в by_sport)
+DAILY_STATS_SPORTS = ('football', 'tennis', 'table_tennis', 'handball', 'manual_entry')
+
+# Уровни уверенности и их подписи в статистике
+HIGH_CONFIDENCE = 0.85
+MEDIUM_CONFIDENCE = 0.75
+CONFIDENCE_THRESHOLDS = {
+    'high_confidence': '≥85%',
+    'medium_confidence': '75-84%',
+    'low_confidence': '<75%',
+}
+
+
+def confidence_bucket(confidence: float) -> str:
+    """Уровень уверенности прогноза"""
+    if confidence >= HIGH_CONFIDENCE:
+        return 'high_confidence'
+    if confidence >= MEDIUM_CONFIDENCE:
+        return 'medium_confidence'
+    return 'low_confidence'
+
+
+class DailyStatsAggregator:
+    """
+    Счетчики дневной статистики за одну дату
+
+    - add / add_many: новые прогнозы (повторный timestamp заменяет прежнюю запись)
+    - apply_update: новые значения полей прогноза (например, результат)
+    - ingest_many: записи хранилища как есть (прогнозы и строки-обновления)
+    - to_stats: словарь для format_daily_stats_for_telegram (прогнозы - списки timestamp)
+    """
+
+    def __init__(self, date: str):
+        self.date = date
+        self._prediction_cells: Dict[str, tuple] = {}
+        self._cells = Counter()
+
+    def __len__(self):
+        return len(self._prediction_cells)
+
+    def ingest_many(self, records: Iterable[Dict]):
+        """Записи хранилища: прогнозы за другие даты и обновления чужих прогнозов пропускаются"""
+        pending = []
+        for record in records:
+            timestamp = record.get(UPDATE_KEY)
+            if timestamp is None:
+                if record.get('timestamp', '').startswith(self.date):
+                    pending.append(record)
+                continue
+
+            # Обновление относится к уже прочитанному прогнозу - сначала добавляем накопленные
+            if pending:
+                self.add_many(pending)
+                pending = []
+            self.apply_update(timestamp, {field: value for field, value in record.items() if field != UPDATE_KEY})
+
+        if pending:
+            self.add_many(pending)
+
+    def add(self, prediction: Dict):
+        """Добавляет прогноз за дату агрегатора"""
+        timestamp = prediction['timestamp']
+        previous = self._prediction_cells.get(timestamp)
+        if previous is not None:
+            self._cells[previous] -= 1
+
+        cell = self._cell(prediction)
+        self._prediction_cells[timestamp] = cell
+        self._cells[cell] += 1
+
+    def add_many(self, predictions: Iterable[Dict]):
+        """Добавляет пачку прогнозов (счетчики обновляются одним Counter.update)"""
+        known = self._prediction_cells
+        fresh = {}
+        for prediction in predictions:
+            timestamp = prediction['timestamp']
+            if timestamp in known:
+                self.add(prediction)
+            else:
+                # Повтор внутри пачки: позиция первой записи, значения последней (как в load)
+                fresh[timestamp] = prediction
+        fresh_predictions = list(fresh.values())
+
+        # Ячейки собираются по колонкам: map/zip вместо вызова _cell на каждый прогноз
+        cells = list(zip(
+            map(itemgetter('sport_type'), fresh_predictions),
+            [prediction.get('actual_result') or '' for prediction in fresh_predictions],
+            map(confidence_bucket, map(itemgetter('confidence'), fresh_predictions)),
+            [prediction.get('source', '') for prediction in fresh_predictions]
+        ))
+        known.update(zip(fresh, cells))
+        self._cells.update(cells)
+
+    def apply_update(self, timestamp: str, fields: Dict) -> bool:
+        """Перекладывает прогноз в ячейку с учетом новых значений полей"""
+        cell = self._prediction_cells.get(timestamp)
+        if cell is None:
+            return False
+
+        sport, outcome, bucket, source = cell
+        updated = (
+            fields.get('sport_type', sport),
+            (fields.get('actual_result') or '') if 'actual_result' in fields else outcome,
+            confidence_bucket(fields['confidence']) if 'confidence' in fields else bucket,
+            fields.get('source', source)
+        )
+        self._cells[cell] -= 1
+        self._cells[updated] += 1
+        self._prediction_cells[timestamp] = updated
+        return True
+
+    def to_stats(self) -> Dict:
+        """
+        Статистика за день (плюс счетчики по источникам и уверенности)
+
+        В 'predictions' и by_sport[...]['predictions'] - timestamp прогнозов,
+        сами записи читаются из хранилища.
+        """
+        total = with_results = wins = losses = 0
+        by_sport = {}
+        by_confidence = {bucket: {'count': 0, 'with_results': 0, 'wins': 0, 'threshold': threshold}
+                         for bucket, threshold in CONFIDENCE_THRESHOLDS.items()}
+        by_source = {}
+
+        for (sport, outcome, bucket, source), count in self._cells.items():
+            if count <= 0:
+                continue
+            is_win = outcome == 'win'
+            is_loss = outcome == 'loss'
+
+            total += count
+            with_results += count if outcome else 0
+            wins += count if is_win else 0
+            losses += count if is_loss else 0
+
+            confidence = by_confidence[bucket]
+            confidence['count'] += count
+            confidence['with_results'] += count if outcome else 0
+            confidence['wins'] += count if is_win else 0
+
+            for group, key in ((by_sport, sport), (by_source, source)):
+                data = group.setdefault(key, {'total': 0, 'wins': 0, 'losses': 0})
+                data['total'] += count
+                data['wins'] += count if is_win else 0
+                data['losses'] += count if is_loss else 0
+
+        sport_predictions = {}
+        for timestamp, cell in self._prediction_cells.items():
+            sport_predictions.setdefault(cell[0], []).append(timestamp)
+
+        return {
+            'date': self.date,
+            'generated_at': get_moscow_time().isoformat(),
+            'total_predictions': total,
+            'predictions_with_results': with_results,
+            'wins': wins,
+            'losses': losses,
+            'win_rate': wins / with_results * 100 if with_results else 0,
+            'by_sport': {
+                sport: {**self._with_win_rate(by_sport[sport]), 'predictions': sport_predictions[sport]}
+                for sport in DAILY_STATS_SPORTS if sport in by_sport
+            },
+            'by_confidence': by_confidence,
+            'by_source': {source: self._with_win_rate(data) for source, data in by_source.items()},
+            'predictions': list(self._prediction_cells)
+        }
+
+    @staticmethod
+    def _with_win_rate(data: Dict) -> Dict:
+        return {**data, 'win_rate': data['wins'] / data['total'] * 100}
+
+    @staticmethod
+    def _cell(prediction: Dict) -> tuple:
+        """Ячейка куба: (вид спорта, исход, уровень уверенности, источник)"""
+        return (prediction['sport_type'], prediction.get('actual_result') or '',
+                confidence_bucket(prediction['confidence']), prediction.get('source', ''))
+
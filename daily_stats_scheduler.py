@@ -9,6 +9,7 @@ from datetime import datetime
 from ml_tracking_system import ml_tracker
 from telegram_integration import TelegramIntegration
 from moscow_time import get_moscow_time
+from config import ANALYSIS_SETTINGS
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +26,11 @@ class DailyStatsScheduler:
         # Планируем отправку каждый день в 23:50
         schedule.every().day.at("23:50").do(self.send_daily_stats)
         
-        self.logger.info("📊 Запланирована ежедневная статистика в 23:50 МСК")
+        # Выводы AI не срочные: запрос уходит в очередь Batch API заранее
+        insights_time = ANALYSIS_SETTINGS.get('llm_batch_insights_time', '20:00')
+        schedule.every().day.at(insights_time).do(self.queue_daily_insights)
+        
+        self.logger.info(f"📊 Запланирована ежедневная статистика в 23:50 МСК (выводы AI - в {insights_time})")
     
     def send_daily_stats(self):
         """Отправляет дневную статистику в Telegram"""
@@ -47,12 +52,24 @@ class DailyStatsScheduler:
             else:
                 self.logger.error("❌ Не удалось отправить дневную статистику")
             
+            # Бэктест прогнозов дня - в фоновой очереди LLM
+            if stats:
+                ml_tracker.queue_backtest(stats['date'])
+            
             return success
             
         except Exception as e:
             self.logger.error(f"Ошибка отправки дневной статистики: {e}")
             return False
     
+    def queue_daily_insights(self):
+        """Ставит в очередь Batch API запрос выводов AI по статистике дня"""
+        try:
+            if ml_tracker.queue_daily_insights():
+                self.logger.info("🤖 Запрос выводов AI по дневной статистике добавлен в очередь")
+        except Exception as e:
+            self.logger.error(f"Ошибка постановки выводов AI в очередь: {e}")
+    
     def check_and_run_pending_stats(self):
         """Проверяет и выполняет запланированные задачи статистики"""
         try:
@@ -3,11 +3,14 @@
 Улучшенная система live-анализа ставок с мульти-источниковым контроллером
 """
 
+import atexit
 import logging
 import schedule
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Tuple
+from config import ANALYSIS_SETTINGS
 from multi_source_controller import MultiSourceController, MatchData
 from scores24_only_controller import scores24_only_controller
 from enhanced_analyzers import (
@@ -28,6 +31,13 @@ from totals_calculator import totals_calculator
 from moscow_time import filter_live_matches_by_time, log_moscow_time, format_moscow_time_for_filename
 from ml_tracking_system import ml_tracker
 from daily_stats_scheduler import daily_stats_scheduler
+from result_settlement import result_settlement_worker
+from fetch_engine import fetch_engine
+from fuzzy_matcher import name_aliases
+from match_timeline import match_timeline
+from llm_cache import llm_cache
+from llm_executor import llm_executor
+from llm_batch_queue import llm_batch_queue
 
 # Настройка логирования
 logging.basicConfig(
@@ -63,6 +73,9 @@ class EnhancedLiveSystem:
         matches = scores24_only_controller.get_live_matches(sport_type)
         logger.info(f"Найдено {len(matches)} live-матчей для {sport_type}")
         
+        # Сохраняем счет, минуту и коэффициент в историю матчей между циклами
+        match_timeline.record_many(matches)
+        
         # Фильтруем завершившиеся матчи
         active_matches = filter_live_matches_by_time(matches, sport_type)
         
@@ -105,6 +118,48 @@ class EnhancedLiveSystem:
         
         return totals_recommendations
     
+    def _run_sport_pipeline(self, sport: str) -> Tuple[List[MatchData], List[MatchData], float]:
+        """Полный конвейер одного вида спорта: рекомендации, тоталы и время выполнения"""
+        started = time.perf_counter()
+        totals_recommendations = []
+        
+        try:
+            recommendations = self.analyze_sport(sport)
+        except Exception as e:
+            logger.error(f"Ошибка при анализе {sport}: {e}")
+            recommendations = []
+        
+        # Добавляем анализ тоталов для гандбола (ошибка тоталов не отменяет рекомендации)
+        if sport == 'handball' and recommendations:
+            try:
+                totals_recommendations = self._analyze_handball_totals(recommendations)
+            except Exception as e:
+                logger.error(f"Ошибка при анализе тоталов {sport}: {e}")
+        
+        system_watchdog.heartbeat()  # Обновляем heartbeat после каждого спорта
+        return recommendations, totals_recommendations, time.perf_counter() - started
+    
+    def _collect_sport_results(self, sports: List[str]) -> Dict[str, Tuple[List[MatchData], List[MatchData], float]]:
+        """Запускает конвейеры видов спорта параллельно (или последовательно, если отключено в настройках)"""
+        workers = min(ANALYSIS_SETTINGS.get('sport_analysis_workers', 4), len(sports))
+        
+        if not ANALYSIS_SETTINGS.get('parallel_sport_analysis', True) or workers <= 1:
+            return {sport: self._run_sport_pipeline(sport) for sport in sports}
+        
+        logger.info(f"⚡ Параллельный анализ {len(sports)} видов спорта ({workers} потоков)")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sport') as executor:
+            futures = {sport: executor.submit(self._run_sport_pipeline, sport) for sport in sports}
+            return {sport: future.result() for sport, future in futures.items()}
+    
+    def _log_sport_timings(self, sport_results: Dict[str, Tuple[List[MatchData], List[MatchData], float]]):
+        """Выводит время выполнения каждого вида спорта"""
+        for sport, (_, _, elapsed) in sport_results.items():
+            logger.info(f"⏱️  {sport}: {elapsed:.2f} секунд")
+        
+        timings = [elapsed for _, _, elapsed in sport_results.values()]
+        if timings:
+            logger.info(f"⏱️  Самый медленный вид спорта: {max(timings):.2f} с, сумма по видам спорта: {sum(timings):.2f} с")
+    
     def run_analysis_cycle(self):
         """Запуск одного цикла анализа"""
         logger.info("=" * 60)
@@ -117,30 +172,27 @@ class EnhancedLiveSystem:
         # Обновляем heartbeat
         system_watchdog.heartbeat()
         
-        # Анализируем каждый вид спорта
+        # Анализируем все виды спорта (параллельно или последовательно)
         sports = ['football', 'tennis', 'table_tennis', 'handball']
+        sport_results = self._collect_sport_results(sports)
         
+        # Объединяем результаты в фиксированном порядке видов спорта
         for sport in sports:
-            try:
-                recommendations = self.analyze_sport(sport)
-                
-                # Логируем каждый прогноз для ML
-                for rec in recommendations:
-                    ml_tracker.log_prediction(rec, sport)
-                
-                all_recommendations.extend(recommendations)
-                
-                # Добавляем анализ тоталов для гандбола
-                if sport == 'handball' and recommendations:
-                    totals_recommendations = self._analyze_handball_totals(recommendations)
-                    # Логируем тоталы тоже
-                    for total_rec in totals_recommendations:
-                        ml_tracker.log_prediction(total_rec, 'handball_totals')
-                    all_recommendations.extend(totals_recommendations)
-                
-                system_watchdog.heartbeat()  # Обновляем heartbeat после каждого спорта
-            except Exception as e:
-                logger.error(f"Ошибка при анализе {sport}: {e}")
+            recommendations, totals_recommendations, _ = sport_results[sport]
+            
+            # Логируем каждый прогноз для ML
+            for rec in recommendations:
+                ml_tracker.log_prediction(rec, sport)
+            
+            all_recommendations.extend(recommendations)
+            
+            # Логируем тоталы гандбола тоже
+            for total_rec in totals_recommendations:
+                ml_tracker.log_prediction(total_rec, 'handball_totals')
+            all_recommendations.extend(totals_recommendations)
+        
+        self._log_sport_timings(sport_results)
+        system_watchdog.heartbeat()
         
         # Генерируем AI-отчет
         if all_recommendations:
@@ -186,6 +238,24 @@ class EnhancedLiveSystem:
             # Отправляем сообщение об отсутствии рекомендаций в Telegram
             self.telegram_integration.send_no_recommendations_message()
         
+        cache_stats = fetch_engine.cache_stats()
+        logger.info(f"🗄️  Кэш страниц: попаданий {cache_stats['hits']}, промахов {cache_stats['misses']}, "
+                    f"перепроверено {cache_stats['revalidated']}, объединено {cache_stats['coalesced']} "
+                    f"({cache_stats['hit_rate']:.1f}% без повторной загрузки)")
+        
+        llm_stats = llm_cache.stats()
+        if llm_stats['hits'] or llm_stats['misses']:
+            logger.info(f"💾 Кэш LLM: попаданий {llm_stats['hits']}, промахов {llm_stats['misses']} "
+                        f"({llm_stats['hit_rate']:.1f}%), записей {llm_stats['size']}")
+        
+        executor_stats = llm_executor.stats()
+        if executor_stats['calls'] or executor_stats['retries']:
+            logger.info(f"📡 Запросы LLM: {executor_stats['calls']}, повторов {executor_stats['retries']}, "
+                        f"ожидание лимитов {executor_stats['waited_seconds']:.1f}с")
+        
+        # Сохраняем таблицу нормализованных названий для следующих циклов
+        name_aliases.save()
+        
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
         logger.info(f"Цикл анализа завершен за {duration:.2f} секунд")
@@ -235,6 +305,18 @@ class EnhancedLiveSystem:
         # Настройка ежедневной статистики в 23:50 МСК
         daily_stats_scheduler.setup_daily_stats_job()
         
+        # Автоматический расчет результатов прогнозов по завершенным матчам
+        result_settlement_worker.setup_job()
+        
+        # История матчей предыдущего запуска (признаки темпа и моментума)
+        match_timeline.restore()
+        
+        # Таблица нормализованных названий сохраняется после каждого цикла и при выходе
+        atexit.register(name_aliases.save)
+        
+        # Фоновая очередь несрочных запросов к LLM (Batch API)
+        llm_batch_queue.start()
+        
         # Сообщение о запуске отключено (по запросу пользователя - лишняя информация)
         # self.telegram_integration.send_startup_message()
         
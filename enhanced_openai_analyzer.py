@@ -5,28 +5,190 @@
 
 import json
 import logging
-import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from openai import OpenAI
+from config import ANALYSIS_SETTINGS
 from multi_source_controller import MatchData
+from llm_cache import llm_cache, match_fingerprint
+from llm_executor import estimate_tokens, llm_executor
+from llm_batch_queue import llm_batch_queue
+from llm_stream import RejectionRule, complete_chat
 
 logger = logging.getLogger(__name__)
 
+# Версия шаблона промпта в ключе кэша LLM (увеличить при изменении промпта)
+PROMPT_TEMPLATE = 'enhanced_openai/2'
+
+# Критерии анализа по видам спорта: общие для промпта одного матча и пакетного промпта
+SPORT_PROMPTS = {
+    'football': {
+        'role': "Ты - профессиональный аналитик футбольных ставок с 15+ летним опытом.",
+        'criteria': """
+НОВЫЕ СТРОГИЕ КРИТЕРИИ ДЛЯ ФУТБОЛА:
+1. Время матча: 25-75 минута (оптимальное окно для анализа)
+2. Счет: НЕ ничейный (кто-то должен вести)
+3. Анализ фаворитизма: ОБЯЗАТЕЛЬНО определи явного фаворита
+
+КРИТЕРИИ ФАВОРИТА (нужно минимум 3 из 5):
+✅ Разница в таблице ≥ 5 позиций
+✅ Форма: ≥ 3 победы в последних 5 играх  
+✅ H2H: ≥ 3 победы из 5 встреч
+✅ xG ≥ 1.5 у фаворита (если доступно)
+✅ Коэффициент ≤ 2.20
+
+ДОПОЛНИТЕЛЬНЫЕ ФАКТОРЫ:
+- Качество лиги (топ-лиги более надежны)
+- Домашнее преимущество
+- Мотивация команд (борьба за титул/против вылета)
+- Травмы ключевых игроков
+- Тактические особенности
+
+ЗАДАЧА: Проанализируй матч и определи:
+1. Является ли ведущая команда явным фаворитом?
+2. Какова вероятность её победы (честная оценка)?
+3. Стоит ли рекомендовать ставку?
+
+ОБОСНОВАНИЕ: Пиши КРАТКО (максимум 15-20 слов), только суть.""",
+        'recommendation': "П1/П2/НЕТ",
+    },
+    'tennis': {
+        'role': "Ты - профессиональный аналитик теннисных ставок.",
+        'criteria': """
+КРИТЕРИИ ДЛЯ ТЕННИСА:
+1. Преимущество: Ведущий выиграл первый сет ИЛИ разрыв ≥ 3 гейма
+2. Анализ фаворитизма по критериям:
+
+КРИТЕРИИ ФАВОРИТА (нужно минимум 3 из 5):
+✅ Разница в рейтинге ≥ 20 позиций
+✅ Форма: ≥ 4 победы в последних 5 матчах
+✅ H2H: ≥ 3 победы из 5 встреч  
+✅ Первые подачи ≥ 65%
+✅ Коэффициент ≤ 1.70
+
+ОБОСНОВАНИЕ: Максимум 15-20 слов, только суть.""",
+        'recommendation': "Победа игрока/НЕТ",
+    },
+    'handball': {
+        'role': "Ты - профессиональный аналитик гандбольных ставок.",
+        'criteria': """
+КРИТЕРИИ ДЛЯ ГАНДБОЛА:
+1. Преимущество: Ведущий ≥ 4 мяча, вторая половина
+2. Анализ фаворитизма + расчет тоталов
+
+КРИТЕРИИ ФАВОРИТА:
+✅ Разница в таблице ≥ 5 позиций
+✅ Форма: ≥ 4 победы в последних 5 играх
+✅ H2H: ≥ 4 победы из 5 встреч
+✅ Средняя результативность ≥ 30 мячей
+✅ Коэффициент ≤ 1.45
+
+РАСЧЕТ ТОТАЛОВ:
+Формула: ОКРУГЛВВЕРХ((Голы1 + Голы2) / (30 + Минута_Второй_Половины) * 60)
+- Голы > минуты → ТБ [Значение - 4]
+- Голы < минуты → ТМ [Значение + 3]
+
+ОБОСНОВАНИЕ: Максимум 15-20 слов, только суть.""",
+        'recommendation': "П1/П2/НЕТ",
+    },
+}
+
+# Строгая схема ответа пакетного запроса (Structured Outputs)
+BATCH_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "match_analyses",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "matches": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "integer"},
+                            "is_favorite": {"type": "boolean"},
+                            "confidence": {"type": "number"},
+                            "recommendation": {"type": "string"},
+                            "reasoning": {"type": "string"},
+                        },
+                        "required": ["id", "is_favorite", "confidence", "recommendation", "reasoning"],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["matches"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+# Отказ в ответе одного матча (те же условия, что в _process_single_match_response)
+REJECTION_RULE = RejectionRule(required_true=('is_favorite',), rejected_values={'recommendation': 'НЕТ'},
+                               min_confidence=0.75)
+
+# Системный промпт анализатора
+SYSTEM_PROMPT = "Ты профессиональный аналитик спортивных ставок. Анализируй честно и профессионально. Отвечай только в JSON формате."
+
+
+def create_enhanced_match_prompt(match, sport_type: str) -> str:
+    """Промпт анализа одного матча (live-анализ и бэктест прогнозов)"""
+    
+    base_match_info = f"""Матч: {match.team1} vs {match.team2}
+Счет: {match.score}
+Минута: {match.minute}
+Лига: {match.league}
+"""
+    
+    sport_prompt = SPORT_PROMPTS.get(sport_type)
+    if not sport_prompt:
+        return base_match_info
+    
+    return f"""{sport_prompt['role']}
+
+АНАЛИЗИРУЕМЫЙ МАТЧ:
+{base_match_info}{sport_prompt['criteria']}
+
+Верни JSON: {{"is_favorite": true/false, "confidence": 0.80, "recommendation": "{sport_prompt['recommendation']}", "reasoning": "Краткое обоснование (15-20 слов максимум)"}}
+"""
+
+
+def validate_analysis(item) -> Optional[Dict]:
+    """Проверенный анализ матча в формате одиночного ответа или None, если поля некорректны"""
+    if not isinstance(item, dict):
+        return None
+    
+    is_favorite = item.get('is_favorite')
+    confidence = item.get('confidence')
+    recommendation = item.get('recommendation')
+    reasoning = item.get('reasoning')
+    
+    if not isinstance(is_favorite, bool):
+        return None
+    if isinstance(confidence, bool) or not isinstance(confidence, (int, float)) or not 0 <= confidence <= 1:
+        return None
+    if not isinstance(recommendation, str) or not recommendation.strip() or not isinstance(reasoning, str):
+        return None
+    
+    return {
+        'is_favorite': is_favorite,
+        'confidence': float(confidence),
+        'recommendation': recommendation.strip(),
+        'reasoning': reasoning.strip(),
+    }
+
+
 class EnhancedOpenAIAnalyzer:
     """
     Улучшенный анализатор матчей с глубоким анализом и новыми критериями
     """
     
     def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
+        # Повторы и лимиты запросов - в общем исполнителе (llm_executor)
+        self.client = OpenAI(api_key=api_key, max_retries=0)
         self.logger = logging.getLogger(self.__class__.__name__)
         self.model = "gpt-4o-mini"
         
-        # Rate limiting настройки
-        self.last_request_time = 0
-        self.min_request_interval = 2.0  # 2 секунды между запросами
-        self.max_retries = 3
-        
     def analyze_matches_with_enhanced_gpt(self, matches: List[MatchData], sport_type: str) -> List[MatchData]:
         """
         Улучшенный анализ матчей с глубокой проверкой критериев
@@ -47,17 +209,13 @@ class EnhancedOpenAIAnalyzer:
         max_matches = 3
         matches_to_analyze = filtered_matches[:max_matches]
         
-        recommendations = []
-        
-        # Анализируем каждый матч отдельно для более точного анализа
-        for match in matches_to_analyze:
-            try:
-                recommendation = self._analyze_single_match_enhanced(match, sport_type)
-                if recommendation:
-                    recommendations.append(recommendation)
-            except Exception as e:
-                self.logger.error(f"Ошибка анализа матча {match.team1} vs {match.team2}: {e}")
-                continue
+        batch_size = ANALYSIS_SETTINGS.get('enhanced_gpt_batch_size', 3)
+        if batch_size > 1 and len(matches_to_analyze) > 1 and sport_type in SPORT_PROMPTS:
+            # Несколько матчей в одном запросе
+            recommendations = self._analyze_matches_batched(matches_to_analyze, sport_type, batch_size)
+        else:
+            # Каждый матч отдельным запросом (запросы параллельно)
+            recommendations = self._analyze_matches_single(matches_to_analyze, sport_type)
         
         self.logger.info(f"✅ Улучшенный анализ сгенерировал {len(recommendations)} рекомендаций для {sport_type}")
         return recommendations
@@ -186,14 +344,122 @@ class EnhancedOpenAIAnalyzer:
         except Exception:
             return False
     
+    def _analyze_matches_single(self, matches: List[MatchData], sport_type: str) -> List[MatchData]:
+        """Анализ каждого матча отдельным запросом"""
+        def analyze(match):
+            try:
+                return self._analyze_single_match_enhanced(match, sport_type)
+            except Exception as e:
+                self.logger.error(f"Ошибка анализа матча {match.team1} vs {match.team2}: {e}")
+                return None
+        
+        return [r for r in llm_executor.map(analyze, matches) if r]
+    
+    def _analyze_matches_batched(self, matches: List[MatchData], sport_type: str, batch_size: int) -> List[MatchData]:
+        """
+        Пакетный анализ: до batch_size матчей в одном запросе
+        
+        Матчи с ответом в кэше не запрашиваются. Элементы ответа проверяются
+        по отдельности и сохраняются в кэш под ключом одиночного анализа;
+        одиночными запросами анализируются только матчи без корректного элемента.
+        """
+        analyses = {}
+        pending = []
+        for index, match in enumerate(matches):
+            cached = self._cached_analysis(match, sport_type)
+            if cached is None:
+                pending.append(index)
+            else:
+                analyses[index] = cached
+        
+        def request(chunk):
+            entries = self._request_batch([matches[index] for index in chunk], sport_type)
+            return {chunk[position]: entry for position, entry in entries.items()}
+        
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        for entries in llm_executor.map(request, chunks):
+            analyses.update(entries or {})
+        
+        failed = [matches[index] for index in pending if index not in analyses]
+        if failed:
+            self.logger.warning(f"⚠️  Пакетный ответ без корректного анализа для {len(failed)} матчей, "
+                                f"одиночные запросы")
+        
+        recommendations = [self._process_single_match_response(analyses[index], matches[index], sport_type)
+                           for index in sorted(analyses)]
+        recommendations.extend(self._analyze_matches_single(failed, sport_type))
+        return [r for r in recommendations if r]
+    
+    def _cached_analysis(self, match: MatchData, sport_type: str) -> Optional[str]:
+        """Ответ одиночного анализа матча из кэша LLM или None"""
+        if not llm_cache.enabled:
+            return None
+        return llm_cache.get(llm_cache.make_key(self.model, PROMPT_TEMPLATE, match_fingerprint(match, sport_type)))
+    
+    def _request_batch(self, matches: List[MatchData], sport_type: str) -> Dict[int, str]:
+        """
+        Один запрос для нескольких матчей
+        
+        Returns:
+            Dict[int, str]: Позиция матча в пакете -> JSON анализа в формате
+            одиночного ответа (только корректные элементы)
+        """
+        prompt = self._create_batch_prompt(matches, sport_type)
+        try:
+            gpt_response = self._call_openai_gpt_enhanced(
+                prompt, max_tokens=300 * len(matches), response_format=BATCH_RESPONSE_FORMAT
+            )
+        except Exception as e:
+            self.logger.error(f"Ошибка пакетного запроса ({len(matches)} матчей): {e}")
+            return {}
+        
+        entries = self._parse_batch_response(gpt_response, len(matches))
+        if llm_cache.enabled:
+            for position, entry in entries.items():
+                key = llm_cache.make_key(self.model, PROMPT_TEMPLATE, match_fingerprint(matches[position], sport_type))
+                llm_cache.put(key, entry, self.model, PROMPT_TEMPLATE)
+        
+        self.logger.info(f"📦 Пакетный запрос: {len(entries)}/{len(matches)} корректных анализов")
+        return entries
+    
+    def _parse_batch_response(self, gpt_response: str, count: int) -> Dict[int, str]:
+        """Разбирает пакетный ответ и проверяет каждый элемент отдельно"""
+        try:
+            gpt_response = (gpt_response or '').strip()
+            if gpt_response.startswith('```json'):
+                gpt_response = gpt_response[7:]
+            if gpt_response.endswith('```'):
+                gpt_response = gpt_response[:-3]
+            data = json.loads(gpt_response.strip())
+        except json.JSONDecodeError as e:
+            self.logger.error(f"Ошибка парсинга JSON пакетного ответа: {e}")
+            return {}
+        
+        items = data.get('matches') if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return {}
+        
+        entries = {}
+        for item in items:
+            analysis = validate_analysis(item)
+            if analysis is None:
+                continue
+            position = item.get('id')
+            if isinstance(position, int) and not isinstance(position, bool) and 1 <= position <= count:
+                entries.setdefault(position - 1, json.dumps(analysis, ensure_ascii=False))
+        return entries
+    
     def _analyze_single_match_enhanced(self, match: MatchData, sport_type: str) -> MatchData:
         """Улучшенный анализ одного матча"""
         try:
             # Создаем специализированный промпт для конкретного матча
             prompt = self._create_enhanced_match_prompt(match, sport_type)
             
-            # Вызываем GPT
-            gpt_response = self._call_openai_gpt_enhanced(prompt)
+            # Вызываем GPT (матч с тем же счетом и отрезком времени - из кэша)
+            gpt_response = llm_cache.get_or_call(
+                self.model, PROMPT_TEMPLATE, match_fingerprint(match, sport_type),
+                lambda: self._call_openai_gpt_enhanced(prompt, rule=REJECTION_RULE)
+            )
             
             # Обрабатываем ответ
             analysis_result = self._process_single_match_response(gpt_response, match, sport_type)
@@ -206,149 +472,60 @@ class EnhancedOpenAIAnalyzer:
     
     def _create_enhanced_match_prompt(self, match: MatchData, sport_type: str) -> str:
         """Создает улучшенный промпт для анализа конкретного матча"""
+        return create_enhanced_match_prompt(match, sport_type)
+    
+    def _create_batch_prompt(self, matches: List[MatchData], sport_type: str) -> str:
+        """Промпт для нескольких матчей: роль и критерии передаются один раз"""
+        sport_prompt = SPORT_PROMPTS[sport_type]
         
-        base_match_info = f"""
-        Матч: {match.team1} vs {match.team2}
-        Счет: {match.score}
-        Минута: {match.minute}
-        Лига: {match.league}
-        """
-        
-        if sport_type == 'football':
-            criteria_prompt = f"""
-            Ты - профессиональный аналитик футбольных ставок с 15+ летним опытом.
-            
-            АНАЛИЗИРУЕМЫЙ МАТЧ:
-            {base_match_info}
-            
-            НОВЫЕ СТРОГИЕ КРИТЕРИИ ДЛЯ ФУТБОЛА:
-            1. Время матча: 25-75 минута (оптимальное окно для анализа)
-            2. Счет: НЕ ничейный (кто-то должен вести)
-            3. Анализ фаворитизма: ОБЯЗАТЕЛЬНО определи явного фаворита
-            
-            КРИТЕРИИ ФАВОРИТА (нужно минимум 3 из 5):
-            ✅ Разница в таблице ≥ 5 позиций
-            ✅ Форма: ≥ 3 победы в последних 5 играх  
-            ✅ H2H: ≥ 3 победы из 5 встреч
-            ✅ xG ≥ 1.5 у фаворита (если доступно)
-            ✅ Коэффициент ≤ 2.20
-            
-            ДОПОЛНИТЕЛЬНЫЕ ФАКТОРЫ:
-            - Качество лиги (топ-лиги более надежны)
-            - Домашнее преимущество
-            - Мотивация команд (борьба за титул/против вылета)
-            - Травмы ключевых игроков
-            - Тактические особенности
-            
-            ЗАДАЧА: Проанализируй этот матч и определи:
-            1. Является ли ведущая команда явным фаворитом?
-            2. Какова вероятность её победы (честная оценка)?
-            3. Стоит ли рекомендовать ставку?
-            
-            ОБОСНОВАНИЕ: Пиши КРАТКО (максимум 15-20 слов), только суть.
-            
-            Верни JSON:
-            {{
-                "is_favorite": true/false,
-                "confidence": 0.82,
-                "recommendation": "П1/П2/НЕТ",
-                "reasoning": "Краткое обоснование (15-20 слов максимум)"
-            }}
-            """
-            
-        elif sport_type == 'tennis':
-            criteria_prompt = f"""
-            Ты - профессиональный аналитик теннисных ставок.
-            
-            АНАЛИЗИРУЕМЫЙ МАТЧ:
-            {base_match_info}
-            
-            КРИТЕРИИ ДЛЯ ТЕННИСА:
-            1. Преимущество: Ведущий выиграл первый сет ИЛИ разрыв ≥ 3 гейма
-            2. Анализ фаворитизма по критериям:
-            
-            КРИТЕРИИ ФАВОРИТА (нужно минимум 3 из 5):
-            ✅ Разница в рейтинге ≥ 20 позиций
-            ✅ Форма: ≥ 4 победы в последних 5 матчах
-            ✅ H2H: ≥ 3 победы из 5 встреч  
-            ✅ Первые подачи ≥ 65%
-            ✅ Коэффициент ≤ 1.70
-            
-            ОБОСНОВАНИЕ: Максимум 15-20 слов, только суть.
-            
-            Верни JSON: {{"is_favorite": true/false, "confidence": 0.80, "recommendation": "Победа игрока/НЕТ", "reasoning": "Краткое обоснование"}}
-            """
-            
-        elif sport_type == 'handball':
-            criteria_prompt = f"""
-            Ты - профессиональный аналитик гандбольных ставок.
-            
-            АНАЛИЗИРУЕМЫЙ МАТЧ:
-            {base_match_info}
-            
-            КРИТЕРИИ ДЛЯ ГАНДБОЛА:
-            1. Преимущество: Ведущий ≥ 4 мяча, вторая половина
-            2. Анализ фаворитизма + расчет тоталов
-            
-            КРИТЕРИИ ФАВОРИТА:
-            ✅ Разница в таблице ≥ 5 позиций
-            ✅ Форма: ≥ 4 победы в последних 5 играх
-            ✅ H2H: ≥ 4 победы из 5 встреч
-            ✅ Средняя результативность ≥ 30 мячей
-            ✅ Коэффициент ≤ 1.45
-            
-            РАСЧЕТ ТОТАЛОВ:
-            Формула: ОКРУГЛВВЕРХ((Голы1 + Голы2) / (30 + Минута_Второй_Половины) * 60)
-            - Голы > минуты → ТБ [Значение - 4]
-            - Голы < минуты → ТМ [Значение + 3]
-            
-            ОБОСНОВАНИЕ: Максимум 15-20 слов, только суть.
-            
-            Верни JSON: {{"is_favorite": true/false, "confidence": 0.80, "recommendation": "П1/П2/НЕТ", "reasoning": "Краткое обоснование"}}
-            """
-        
-        else:
-            criteria_prompt = base_match_info
+        matches_info = "\n".join(
+            f"{number}. Матч: {match.team1} vs {match.team2} | Счет: {match.score} | "
+            f"Минута: {match.minute} | Лига: {match.league}"
+            for number, match in enumerate(matches, 1)
+        )
         
-        return criteria_prompt
+        return f"""{sport_prompt['role']}
+
+АНАЛИЗИРУЕМЫЕ МАТЧИ ({len(matches)}):
+{matches_info}
+{sport_prompt['criteria']}
+
+Проанализируй КАЖДЫЙ матч независимо от остальных.
+Верни JSON: {{"matches": [{{"id": 1, "is_favorite": true/false, "confidence": 0.80, "recommendation": "{sport_prompt['recommendation']}", "reasoning": "Краткое обоснование (15-20 слов максимум)"}}]}}
+- ровно один элемент на каждый матч, id - номер матча из списка
+"""
     
-    def _call_openai_gpt_enhanced(self, prompt: str) -> str:
-        """Улучшенный вызов OpenAI GPT API"""
-        # Соблюдаем rate limiting
-        time_since_last = time.time() - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last
-            time.sleep(sleep_time)
+    def _call_openai_gpt_enhanced(self, prompt: str, max_tokens: int = 800, response_format: Dict = None,
+                                  rule: RejectionRule = None) -> str:
+        """
+        Улучшенный вызов OpenAI GPT API (лимиты и повторы - в llm_executor)
         
-        for attempt in range(self.max_retries):
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": "Ты профессиональный аналитик спортивных ставок. Анализируй честно и профессионально. Отвечай только в JSON формате."
-                        },
-                        {
-                            "role": "user", 
-                            "content": prompt
-                        }
-                    ],
-                    max_tokens=800,  # Достаточно для детального анализа одного матча
-                    temperature=0.2,
-                    timeout=30
-                )
-                
-                self.last_request_time = time.time()
-                return response.choices[0].message.content
-                
-            except Exception as e:
-                if attempt < self.max_retries - 1:
-                    sleep_time = (attempt + 1) * 3
-                    self.logger.warning(f"⚠️  Попытка {attempt + 1} неудачна, ожидание {sleep_time}с: {e}")
-                    time.sleep(sleep_time)
-                else:
-                    raise e
+        С rule ответ читается потоком и прерывается, как только решающие поля означают отказ.
+        """
+        system_prompt = SYSTEM_PROMPT
+        options = {'response_format': response_format} if response_format else {}
+        response = llm_executor.call(
+            lambda: complete_chat(
+                self.client, rule,
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system", 
+                        "content": system_prompt
+                    },
+                    {
+                        "role": "user", 
+                        "content": prompt
+                    }
+                ],
+                max_tokens=max_tokens,  # 800 достаточно для детального анализа одного матча
+                temperature=0.2,
+                timeout=30,
+                **options
+            ),
+            tokens=estimate_tokens(system_prompt, prompt, max_tokens=max_tokens)
+        )
+        return response.text
     
     def _process_single_match_response(self, gpt_response: str, match: MatchData, sport_type: str) -> MatchData:
         """Обрабатывает ответ GPT для одного матча"""
@@ -443,8 +620,15 @@ class EnhancedOpenAIAnalyzer:
             self.logger.error(f"Ошибка расчета тоталов: {e}")
             return {}
     
-    def generate_enhanced_reasoning(self, match: MatchData, sport_type: str, additional_stats: Dict = None) -> str:
-        """Генерирует улучшенное обоснование с помощью GPT"""
+    def generate_enhanced_reasoning(self, match: MatchData, sport_type: str, additional_stats: Dict = None,
+                                    offline: bool = False) -> str:
+        """
+        Генерирует улучшенное обоснование с помощью GPT
+        
+        offline=True: обоснование не срочное - запрос уходит в очередь Batch API
+        (llm_batch_queue), а до получения ответа возвращается шаблонный текст.
+        """
+        fallback = f"Анализ матча {match.team1} vs {match.team2}: ведущая команда имеет преимущество в счете {match.score} на {match.minute} минуте."
         try:
             stats_text = ""
             if additional_stats:
@@ -467,12 +651,21 @@ class EnhancedOpenAIAnalyzer:
             Верни только текст обоснования без JSON.
             """
             
+            if offline:
+                key = llm_cache.make_key(self.model, 'enhanced_reasoning/1',
+                                         [match_fingerprint(match, sport_type), match.recommendation_value])
+                response = llm_batch_queue.result('reasoning', key)
+                if response is None:
+                    llm_batch_queue.enqueue('reasoning', key, reasoning_prompt, system_prompt=SYSTEM_PROMPT)
+                    return fallback
+                return response.strip()
+            
             response = self._call_openai_gpt_enhanced(reasoning_prompt)
             return response.strip()
             
         except Exception as e:
             self.logger.error(f"Ошибка генерации обоснования: {e}")
-            return f"Анализ матча {match.team1} vs {match.team2}: ведущая команда имеет преимущество в счете {match.score} на {match.minute} минуте."
+            return fallback
 
     def test_enhanced_connection(self) -> bool:
         """Тестирует улучшенное подключение к OpenAI"""
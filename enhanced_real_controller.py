@@ -6,30 +6,35 @@ import requests
 import time
 import json
 from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
-from bs4 import BeautifulSoup
+from match_record import MatchRecord
+from html_backend import parse_html
+from extraction_plan import get_extraction_plan
 import re
 from urllib.parse import urljoin
 import logging
+from fetch_engine import fetch_engine
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class MatchData:
-    """Структура данных о матче"""
-    team1: str
-    team2: str
-    score: str
-    minute: str
-    coefficient: float
-    is_locked: bool
-    sport_type: str
-    league: str = ""
-    url: str = ""
-    status: str = ""
+# Единая запись матча для всех контроллеров (__slots__, общая таблица строк)
+MatchData = MatchRecord
+
+
+# План извлечения полей строки Scores24 (селекторы компилируются один раз)
+SCORES24_EXTRACTION_PLAN = get_extraction_plan({
+    'teams': ('.sc-17qxh4e-10.esbhnW', 2),
+    'score_parts': ('.sc-pvs6fr-1.bAhpay', 2),
+    'score_alt': ('.sc-4g7sie-0.gMBPyP', 1),
+    'minute': ('.sc-1p31vt4-0.ghrzJz', 1),
+    'minute_alt': ('.sc-w3d8cd-0.iLWJDQ', 1),
+    'minute_period': ('.sc-oh2bsf-0.fUZLA span', 1),
+    'league': ('.sc-5a92rz-5.knTRcb', 1),
+    'url': ('a[href*="/soccer/m-"], a[href*="/tennis/m-"], a[href*="/table-tennis/m-"], a[href*="/handball/m-"]', 1),
+    'live': ('.sc-17qxh4e-0.dHxDFU', 1)
+})
 
 
 class EnhancedRealDataController:
@@ -57,25 +62,24 @@ class EnhancedRealDataController:
                 'tennis': 'https://scores24.live/ru/tennis?matchesFilter=live',
                 'table_tennis': 'https://scores24.live/ru/table-tennis?matchesFilter=live',
                 'handball': 'https://scores24.live/ru/handball?matchesFilter=live'
+            },
+            # Завершенные матчи (расчет результатов прогнозов)
+            'scores24_finished': {
+                'football': 'https://scores24.live/ru/soccer?matchesFilter=finished',
+                'tennis': 'https://scores24.live/ru/tennis?matchesFilter=finished',
+                'table_tennis': 'https://scores24.live/ru/table-tennis?matchesFilter=finished',
+                'handball': 'https://scores24.live/ru/handball?matchesFilter=finished'
             }
         }
     
     def get_page_content(self, url: str, timeout: int = 30) -> Optional[str]:
         """Получение содержимого страницы"""
-        try:
-            logger.info(f"Запрос к: {url}")
-            response = self.session.get(url, timeout=timeout)
-            response.raise_for_status()
-            
-            if response.encoding == 'ISO-8859-1':
-                response.encoding = 'utf-8'
-            
-            logger.info(f"Получен ответ: {len(response.text)} символов")
-            return response.text
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка HTTP запроса к {url}: {e}")
-            return None
+        logger.info(f"Запрос к: {url}")
+        html = fetch_engine.fetch(url, headers=self.session.headers, timeout=timeout)
+        
+        if html is not None:
+            logger.info(f"Получен ответ: {len(html)} символов")
+        return html
     
     def parse_scores24_matches(self, html: str, sport_type: str) -> List[MatchData]:
         """Парсинг матчей с Scores24.live с улучшенными селекторами"""
@@ -83,11 +87,11 @@ class EnhancedRealDataController:
             return []
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            document = parse_html(html)
             matches = []
             
             # Ищем контейнеры матчей - используем более точные селекторы
-            match_containers = soup.select('.sc-17qxh4e-0.dHxDFU')
+            match_containers = document.select('.sc-17qxh4e-0.dHxDFU')
             
             logger.info(f"Найдено {len(match_containers)} контейнеров матчей на Scores24")
             
@@ -105,8 +109,11 @@ class EnhancedRealDataController:
     def _extract_scores24_match(self, container, sport_type: str) -> Optional[MatchData]:
         """Извлечение данных матча из контейнера Scores24 с улучшенной логикой"""
         try:
+            # Все поля (включая альтернативные селекторы) находятся за один обход контейнера
+            fields = SCORES24_EXTRACTION_PLAN.extract(container)
+            
             # Названия команд
-            team_elements = container.select('.sc-17qxh4e-10.esbhnW')
+            team_elements = fields['teams']
             if len(team_elements) < 2:
                 return None
             
@@ -115,50 +122,38 @@ class EnhancedRealDataController:
             
             # Счет - ищем в разных местах
             score = ""
-            score_elements = container.select('.sc-pvs6fr-1.bAhpay')
+            score_elements = fields['score_parts']
             if len(score_elements) >= 2:
                 score = f"{score_elements[0].get_text(strip=True)}:{score_elements[1].get_text(strip=True)}"
-            else:
+            elif fields['score_alt']:
                 # Альтернативный поиск счета
-                score_alt = container.select_one('.sc-4g7sie-0.gMBPyP')
-                if score_alt:
-                    score_text = score_alt.get_text(strip=True)
-                    if ':' in score_text:
-                        score = score_text
+                score_text = fields['score_alt'][0].get_text(strip=True)
+                if ':' in score_text:
+                    score = score_text
             
             # Минута/статус
             minute = ""
             status = ""
             
-            # Ищем минуту в разных элементах
-            minute_elements = [
-                container.select_one('.sc-1p31vt4-0.ghrzJz'),
-                container.select_one('.sc-w3d8cd-0.iLWJDQ'),
-                container.select_one('.sc-oh2bsf-0.fUZLA span')
-            ]
-            
-            for elem in minute_elements:
-                if elem:
-                    text = elem.get_text(strip=True)
+            # Ищем минуту в разных элементах (в порядке приоритета)
+            for field in ('minute', 'minute_alt', 'minute_period'):
+                if fields[field]:
+                    text = fields[field][0].get_text(strip=True)
                     if text and ('\'' in text or 'минут' in text or 'сет' in text or 'партия' in text):
                         minute = text
                         status = text
                         break
             
             # Лига
-            league = ""
-            league_element = container.select_one('.sc-5a92rz-5.knTRcb')
-            if league_element:
-                league = league_element.get_text(strip=True)
+            league = fields['league'][0].get_text(strip=True) if fields['league'] else ""
             
             # URL матча
             url = ""
-            url_element = container.select_one('a[href*="/soccer/m-"], a[href*="/tennis/m-"], a[href*="/table-tennis/m-"], a[href*="/handball/m-"]')
-            if url_element:
-                url = urljoin("https://scores24.live", url_element.get('href', ''))
+            if fields['url']:
+                url = urljoin("https://scores24.live", fields['url'][0].get('href', ''))
             
             # Определяем, является ли матч live
-            is_live = bool(container.select_one('.sc-17qxh4e-0.dHxDFU'))
+            is_live = bool(fields['live'])
             
             return MatchData(
                 team1=team1,
@@ -185,10 +180,14 @@ class EnhancedRealDataController:
             return []
         
         html = self.get_page_content(url)
+        return self._parse_site_matches(html, site, sport_type)
+    
+    def _parse_site_matches(self, html: Optional[str], site: str, sport_type: str) -> List[MatchData]:
+        """Парсинг страницы сайта в список матчей"""
         if not html:
             return []
         
-        if site == 'scores24':
+        if site in ('scores24', 'scores24_finished'):
             matches = self.parse_scores24_matches(html, sport_type)
         else:
             matches = []
@@ -196,15 +195,30 @@ class EnhancedRealDataController:
         logger.info(f"Найдено {len(matches)} матчей на {site} для {sport_type}")
         return matches
     
+    def get_finished_matches_batch(self, sport_types: List[str]) -> Dict[str, List[MatchData]]:
+        """Завершенные матчи Scores24 по видам спорта (страницы загружаются одним пакетом)"""
+        sport_urls = {sport: self.urls['scores24_finished'].get(sport) for sport in sport_types}
+        pages = fetch_engine.fetch_many(sport_urls.values(), headers=self.session.headers)
+        
+        finished = {}
+        for sport, url in sport_urls.items():
+            try:
+                finished[sport] = self._parse_site_matches(pages.get(url), 'scores24_finished', sport)
+            except Exception as e:
+                logger.error(f"Ошибка получения завершенных матчей {sport}: {e}")
+                finished[sport] = []
+        return finished
+    
     def get_all_live_matches(self, sport_type: str) -> List[MatchData]:
-        """Получение live-матчей со всех сайтов"""
-        all_matches = []
+        """Получение live-матчей со всех сайтов (страницы загружаются параллельно)"""
+        sites = ['scores24']
+        site_urls = {site: self.urls.get(site, {}).get(sport_type) for site in sites}
+        pages = fetch_engine.fetch_many(site_urls.values(), headers=self.session.headers)
         
-        for site in ['scores24']:
+        all_matches = []
+        for site, url in site_urls.items():
             try:
-                matches = self.get_live_matches(site, sport_type)
-                all_matches.extend(matches)
-                time.sleep(1)  # Пауза между запросами
+                all_matches.extend(self._parse_site_matches(pages.get(url), site, sport_type))
             except Exception as e:
                 logger.error(f"Ошибка получения матчей с {site}: {e}")
                 continue
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Экспорт истории прогнозов в типизированный колоночный файл для обучения моделей
+
+Использование:
+    python3 export_predictions.py [--format auto|parquet|arrow|npz] [--output файл] [--batch-size 10000]
+
+Строковые поля лога разбираются в числовые колонки при экспорте:
+минута ("45+2'" -> 47), счет на момент прогноза и итоговый счет (отдельные
+колонки для команд), коэффициент ("неизвестен" -> NaN), уверенность, исход.
+История читается из хранилища построчно (iter_predictions) и обрабатывается
+пачками: Parquet и Arrow IPC пишутся по одной пачке (RecordBatch) за раз.
+Без pyarrow используется NumPy (.npz), строковые категории кодируются числами
+со словарем в колонке <имя>_categories. Формат .npz не поддерживает дозапись:
+колонки всей истории собираются в памяти (в компактных массивах NumPy) и
+сохраняются в конце, поэтому для большой истории лучше Parquet или Arrow.
+"""
+
+import argparse
+import logging
+import re
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from match_timeline import parse_minute, parse_score
+from performance_metrics import parse_coefficient, recommendation_type
+
+try:
+    import numpy as np
+except ImportError:  # numpy не обязателен для основной системы
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow не обязателен: есть запасной формат .npz
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+FORMAT_EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow', 'npz': '.npz'}
+
+# Категориальные колонки (в .npz - коды int32 + словарь)
+CATEGORY_COLUMNS = ('sport_type', 'league', 'source', 'recommendation', 'recommendation_type', 'actual_result')
+
+# Свободный текст
+TEXT_COLUMNS = ('team1', 'team2', 'reasoning', 'notes')
+
+# Числовые колонки: имя -> dtype NumPy (пропуск: NaN для float, -1 для int)
+NUMERIC_COLUMNS = {
+    'timestamp_ms': 'int64',
+    'minute': 'float32',
+    'period': 'int8',
+    'score_home': 'int16',
+    'score_away': 'int16',
+    'final_home': 'int16',
+    'final_away': 'int16',
+    'confidence': 'float32',
+    'coefficient': 'float32',
+    'total_line': 'float32',
+    'outcome': 'int8',
+}
+
+# Исход: 1 - выигрыш, 0 - проигрыш, 2 - возврат, -1 - неизвестен
+OUTCOME_CODES = {'win': 1, 'loss': 0, 'push': 2}
+
+_PERIOD_PATTERN = re.compile(r"(\d+)\s*(?:-?[йя])?\s*(?:сет|партия|тайм|период)", re.IGNORECASE)
+_TOTAL_LINE_PATTERN = re.compile(r'^(?:ТБ|ТМ)\s*\(?\s*(\d+(?:[.,]\d+)?)', re.IGNORECASE)
+
+
+def parse_period(text: str) -> int:
+    """Номер сета/партии/тайма ("2 сет" -> 2) или -1"""
+    match = _PERIOD_PATTERN.search(text or '')
+    return int(match.group(1)) if match else -1
+
+
+def parse_total_line(recommendation: str) -> Optional[float]:
+    """Линия тотала из рекомендации ("ТБ 45.5" -> 45.5)"""
+    match = _TOTAL_LINE_PATTERN.match((recommendation or '').strip())
+    return float(match.group(1).replace(',', '.')) if match else None
+
+
+def parse_timestamp_ms(timestamp: str) -> int:
+    """ISO-время прогноза -> миллисекунды Unix (UTC)"""
+    try:
+        return int(datetime.fromisoformat(timestamp).timestamp() * 1000)
+    except (TypeError, ValueError):
+        return -1
+
+
+def prediction_row(prediction: Dict) -> Dict:
+    """Типизированная строка экспорта из записи лога"""
+    score_home, score_away = parse_score(prediction.get('score_at_prediction'))
+    final_home, final_away = parse_score(prediction.get('final_score'))
+    minute_text = prediction.get('minute_at_prediction') or ''
+    recommendation = prediction.get('recommendation') or ''
+    confidence = prediction.get('confidence')
+
+    row = {column: prediction.get(column) or '' for column in CATEGORY_COLUMNS + TEXT_COLUMNS}
+    row.update({
+        'recommendation_type': recommendation_type(recommendation),
+        'timestamp_ms': parse_timestamp_ms(prediction.get('timestamp')),
+        'minute': parse_minute(minute_text),
+        'period': parse_period(minute_text),
+        'score_home': score_home,
+        'score_away': score_away,
+        'final_home': final_home,
+        'final_away': final_away,
+        'confidence': float(confidence) if isinstance(confidence, (int, float)) else None,
+        'coefficient': parse_coefficient(prediction.get('coefficient')),
+        'total_line': parse_total_line(recommendation),
+        'outcome': OUTCOME_CODES.get(prediction.get('actual_result'), -1),
+    })
+    return row
+
+
+def _batches(predictions: Iterable[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for prediction in predictions:
+        batch.append(prediction_row(prediction))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _numeric_array(rows: List[Dict], column: str):
+    dtype = NUMERIC_COLUMNS[column]
+    missing = np.nan if dtype.startswith('float') else -1
+    return np.array([missing if row[column] is None else row[column] for row in rows], dtype=dtype)
+
+
+def _arrow_schema():
+    fields = [pa.field('timestamp', pa.timestamp('ms', tz='UTC'))]
+    fields += [pa.field(column, pa.string()) for column in CATEGORY_COLUMNS + TEXT_COLUMNS]
+    arrow_types = {'float32': pa.float32(), 'int8': pa.int8(), 'int16': pa.int16()}
+    fields += [pa.field(column, arrow_types[dtype]) for column, dtype in NUMERIC_COLUMNS.items()
+               if column != 'timestamp_ms']
+    return pa.schema(fields)
+
+
+def _arrow_batch(rows: List[Dict], schema):
+    """Пачка строк -> RecordBatch (пропуски числовых колонок - null)"""
+    columns = []
+    for field in schema:
+        if field.name == 'timestamp':
+            values = _numeric_array(rows, 'timestamp_ms')
+            columns.append(pa.array(values, type=field.type, mask=values < 0))
+        elif field.name in NUMERIC_COLUMNS:
+            values = _numeric_array(rows, field.name)
+            mask = np.isnan(values) if values.dtype.kind == 'f' else values < 0
+            columns.append(pa.array(values, type=field.type, mask=mask))
+        else:
+            columns.append(pa.array([row[field.name] for row in rows], type=field.type))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _export_arrow(batches: Iterator[List[Dict]], output_path: str, fmt: str) -> int:
+    schema = _arrow_schema()
+    writer = pq.ParquetWriter(output_path, schema) if fmt == 'parquet' else pa.ipc.new_file(output_path, schema)
+    rows = 0
+    try:
+        for batch in batches:
+            writer.write_batch(_arrow_batch(batch, schema))
+            rows += len(batch)
+    finally:
+        writer.close()
+    return rows
+
+
+def _export_npz(batches: Iterator[List[Dict]], output_path: str) -> int:
+    """Экспорт в .npz: массивы колонок копятся до конца (savez пишет только целые массивы)"""
+    categories = {column: {} for column in CATEGORY_COLUMNS}
+    chunks = {column: [] for column in (*NUMERIC_COLUMNS, *CATEGORY_COLUMNS, *TEXT_COLUMNS)}
+    rows = 0
+
+    for batch in batches:
+        for column in NUMERIC_COLUMNS:
+            chunks[column].append(_numeric_array(batch, column))
+        for column, vocabulary in categories.items():
+            chunks[column].append(np.array(
+                [vocabulary.setdefault(row[column], len(vocabulary)) for row in batch], dtype='int32'))
+        for column in TEXT_COLUMNS:
+            chunks[column].append(np.array([row[column] for row in batch], dtype=str))
+        rows += len(batch)
+
+    arrays = {}
+    for column, parts in chunks.items():
+        dtype = NUMERIC_COLUMNS.get(column, 'int32' if column in categories else str)
+        arrays[column] = np.concatenate(parts) if parts else np.array([], dtype=dtype)
+    for column, vocabulary in categories.items():
+        arrays[f'{column}_categories'] = np.array(list(vocabulary), dtype=str)
+
+    np.savez_compressed(output_path, **arrays)
+    return rows
+
+
+def resolve_format(fmt: str) -> str:
+    """Формат экспорта с учетом установленных библиотек"""
+    if fmt == 'auto':
+        if pa is not None:
+            return 'parquet'
+        if np is not None:
+            return 'npz'
+        raise RuntimeError("Для экспорта нужен pyarrow (Parquet/Arrow) или numpy (.npz): pip install pyarrow")
+    if fmt in ('parquet', 'arrow') and pa is None:
+        raise RuntimeError(f"Формат {fmt} требует pyarrow: pip install pyarrow (или --format npz)")
+    if np is None:
+        raise RuntimeError("Для экспорта нужен numpy: pip install numpy")
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Неизвестный формат экспорта: {fmt}")
+    return fmt
+
+
+def export_predictions(predictions: Iterable[Dict], output_path: str, fmt: str = 'auto',
+                       batch_size: int = 10000) -> int:
+    """
+    Экспорт прогнозов в колоночный файл
+
+    Args:
+        predictions (Iterable[Dict]): Записи лога прогнозов
+        output_path (str): Путь к файлу
+        fmt (str): auto / parquet / arrow / npz
+        batch_size (int): Строк в одной пачке
+
+    Returns:
+        int: Количество экспортированных строк
+    """
+    fmt = resolve_format(fmt)
+    batches = _batches(predictions, batch_size)
+    if fmt == 'npz':
+        return _export_npz(batches, output_path)
+    return _export_arrow(batches, output_path, fmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Экспорт истории прогнозов для обучения моделей")
+    parser.add_argument('--format', default='auto', choices=['auto', *FORMAT_EXTENSIONS])
+    parser.add_argument('--output', help="Файл экспорта (по умолчанию ml_predictions.<формат>)")
+    parser.add_argument('--batch-size', type=int, default=10000, help="Строк в одной пачке")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        fmt = resolve_format(args.format)
+    except (RuntimeError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    from ml_tracking_system import ml_tracker
+
+    output_path = args.output or f"ml_predictions{FORMAT_EXTENSIONS[fmt]}"
+    rows = export_predictions(ml_tracker.store.iter_predictions(), output_path, fmt, args.batch_size)
+    print(f"✅ Экспортировано прогнозов: {rows} -> {output_path} ({fmt})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
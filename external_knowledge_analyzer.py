@@ -6,27 +6,32 @@
 
 import json
 import logging
-import time
 from typing import List, Dict, Any, Optional
 from openai import OpenAI
 from multi_source_controller import MatchData
+from llm_cache import llm_cache, match_fingerprint
+from llm_executor import estimate_tokens, llm_executor
+from llm_stream import RejectionRule, complete_chat
 
 logger = logging.getLogger(__name__)
 
+# Версия шаблона промпта в ключе кэша LLM (увеличить при изменении промпта)
+PROMPT_TEMPLATE = 'external_knowledge/1'
+
+# Отказ в ответе (те же условия, что в _process_knowledge_response)
+REJECTION_RULE = RejectionRule(rejected_values={'recommendation': 'НЕТ'}, min_confidence=0.75)
+
 class ExternalKnowledgeAnalyzer:
     """
     Анализатор, использующий знания OpenAI о спорте
     """
     
     def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
+        # Повторы и лимиты запросов - в общем исполнителе (llm_executor)
+        self.client = OpenAI(api_key=api_key, max_retries=0)
         self.logger = logging.getLogger(self.__class__.__name__)
         self.model = "gpt-4o-mini"
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 2.0
-        
     def analyze_with_external_knowledge(self, matches: List[MatchData], sport_type: str) -> List[MatchData]:
         """
         Анализ матчей с использованием внешних знаний OpenAI
@@ -36,20 +41,16 @@ class ExternalKnowledgeAnalyzer:
         
         self.logger.info(f"🌐 Анализ с внешними знаниями: {len(matches)} матчей {sport_type}")
         
-        recommendations = []
-        
-        # Анализируем каждый матч с расширенной проверкой
-        for match in matches[:3]:  # Максимум 3 матча
+        def analyze(match):
             try:
-                recommendation = self._analyze_match_with_knowledge(match, sport_type)
-                if recommendation:
-                    recommendations.append(recommendation)
-                    
-                time.sleep(1)  # Пауза между анализами
-                
+                return self._analyze_match_with_knowledge(match, sport_type)
             except Exception as e:
                 self.logger.error(f"Ошибка анализа с внешними знаниями: {e}")
-                continue
+                return None
+        
+        # Анализируем каждый матч с расширенной проверкой (запросы параллельно)
+        results = llm_executor.map(analyze, matches[:3])  # Максимум 3 матча
+        recommendations = [r for r in results if r]
         
         self.logger.info(f"🌐 Найдено {len(recommendations)} рекомендаций с внешней проверкой")
         return recommendations
@@ -60,8 +61,11 @@ class ExternalKnowledgeAnalyzer:
             # Создаем промпт с запросом внешних знаний
             knowledge_prompt = self._create_external_knowledge_prompt(match, sport_type)
             
-            # Вызываем OpenAI
-            response = self._call_openai_with_rate_limit(knowledge_prompt)
+            # Вызываем OpenAI (матч с тем же счетом и отрезком времени - из кэша)
+            response = llm_cache.get_or_call(
+                self.model, PROMPT_TEMPLATE, match_fingerprint(match, sport_type),
+                lambda: self._call_openai_with_rate_limit(knowledge_prompt)
+            )
             
             # Обрабатываем ответ
             recommendation = self._process_knowledge_response(response, match, sport_type)
@@ -205,32 +209,30 @@ class ExternalKnowledgeAnalyzer:
         return base_info
     
     def _call_openai_with_rate_limit(self, prompt: str) -> str:
-        """Вызов OpenAI с соблюдением лимитов"""
-        # Rate limiting
-        time_since_last = time.time() - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last)
-        
+        """Вызов OpenAI (лимиты и повторы - в llm_executor, отказ прерывает поток ответа)"""
+        system_prompt = "Ты эксперт по спорту с обширными знаниями о командах, игроках, лигах и турнирах. Используй свои знания для дополнительной проверки данных."
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "Ты эксперт по спорту с обширными знаниями о командах, игроках, лигах и турнирах. Используй свои знания для дополнительной проверки данных."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                max_tokens=400,  # Больше токенов для внешнего анализа
-                temperature=0.2,
-                timeout=30
+            response = llm_executor.call(
+                lambda: complete_chat(
+                    self.client, REJECTION_RULE,
+                    model=self.model,
+                    messages=[
+                        {
+                            "role": "system", 
+                            "content": system_prompt
+                        },
+                        {
+                            "role": "user", 
+                            "content": prompt
+                        }
+                    ],
+                    max_tokens=400,  # Больше токенов для внешнего анализа
+                    temperature=0.2,
+                    timeout=30
+                ),
+                tokens=estimate_tokens(system_prompt, prompt, max_tokens=400)
             )
-            
-            self.last_request_time = time.time()
-            return response.choices[0].message.content
+            return response.text
             
         except Exception as e:
             self.logger.error(f"Ошибка OpenAI запроса с внешними знаниями: {e}")
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Скомпилированные планы извлечения полей матча из HTML-контейнеров
+
+Вместо нескольких вызовов container.select() на каждый контейнер (каждый
+из которых заново разбирает селектор и заново обходит поддерево) план
+компилирует селекторы сайта один раз и находит все поля контейнера за
+один обход его поддерева. Планы кэшируются между циклами анализа.
+
+Простые селекторы (тег, классы, [атрибут*="значение"] и их списки через
+запятую) проверяются прямо при обходе; сложные (с комбинаторами) -
+скомпилированным запросом бэкенда.
+"""
+
+import logging
+import re
+from itertools import islice
+from typing import Dict, List, Optional, Tuple, Union
+
+from html_backend import HTMLNode, SoupNode, LxmlNode, SelectolaxNode
+
+logger = logging.getLogger(__name__)
+
+try:
+    import soupsieve
+except ImportError:
+    soupsieve = None
+
+# Описание поля: селектор или (селектор, сколько элементов нужно; None - все)
+FieldSpec = Union[str, Tuple[str, int]]
+
+# Простой селектор: необязательный тег, классы и одно условие [attr*="value"]
+SIMPLE_SELECTOR = re.compile(
+    r'^(?P<tag>[a-zA-Z][\w-]*)?(?P<classes>(?:\.[\w-]+)*)'
+    r'(?:\[(?P<attr>[\w-]+)\*="(?P<value>[^"]*)"\])?$'
+)
+
+
+def compile_simple_selector(selector: str) -> Optional[List[tuple]]:
+    """
+    Компилирует список простых селекторов в условия для проверки при обходе
+
+    Returns:
+        Optional[List[tuple]]: [(тег, классы, атрибут, подстрока), ...] или None,
+        если селектор не простой и должен выполняться бэкендом
+    """
+    alternatives = []
+    for part in selector.split(','):
+        match = SIMPLE_SELECTOR.match(part.strip())
+        if not match or not part.strip():
+            return None
+
+        tag = match.group('tag')
+        classes = frozenset(filter(None, match.group('classes').split('.')))
+        alternatives.append((tag.lower() if tag else None, classes, match.group('attr'), match.group('value')))
+
+    return alternatives
+
+
+class ExtractionPlan:
+    """
+    План извлечения набора полей из контейнера матча
+
+    Поля описываются словарем {имя: селектор} или {имя: (селектор, лимит)}.
+    Лимит позволяет закончить обход, как только все поля найдены
+    (например, две команды и по одному элементу счета и минуты).
+    """
+
+    def __init__(self, fields: Dict[str, FieldSpec]):
+        self.names = list(fields)
+        self.selectors = {}
+        self.simple_fields = []
+        self.complex_fields = []
+
+        for name, spec in fields.items():
+            selector, limit = spec if isinstance(spec, tuple) else (spec, None)
+            self.selectors[name] = selector
+            alternatives = compile_simple_selector(selector)
+            if alternatives is not None:
+                self.simple_fields.append((name, alternatives, limit))
+            else:
+                self.complex_fields.append((name, selector, limit))
+
+        # Скомпилированные варианты плана для каждого типа узлов (бэкенда)
+        self._runners = {}
+
+    def extract(self, container: HTMLNode) -> Dict[str, List[HTMLNode]]:
+        """
+        Находит все поля контейнера
+
+        Returns:
+            Dict[str, List[HTMLNode]]: имя поля -> найденные элементы в порядке документа
+        """
+        node_type = type(container)
+        runner = self._runners.get(node_type)
+        if runner is None:
+            runner = self._runners[node_type] = self._compile(node_type)
+        return runner(container)
+
+    def _compile(self, node_type):
+        """Компилирует план под конкретный бэкенд"""
+        if node_type is SoupNode:
+            return self._compile_walk(
+                node_type,
+                descendants=lambda node: node.descendants,
+                tag_of=lambda element: element.name,
+                classes_of=lambda element: element.attrs.get('class') or (),
+                attribute_of=lambda element, name: element.attrs.get(name),
+                query=self._soup_query()
+            )
+
+        if node_type is LxmlNode:
+            return self._compile_walk(
+                node_type,
+                descendants=lambda node: node.iterdescendants(),
+                tag_of=lambda element: element.tag if isinstance(element.tag, str) else None,
+                classes_of=lambda element: (element.get('class') or '').split(),
+                attribute_of=lambda element, name: element.get(name),
+                query=self._lxml_query()
+            )
+
+        if node_type is SelectolaxNode:
+            return self._compile_walk(
+                node_type,
+                # traverse() начинается с самого узла - пропускаем его
+                descendants=lambda node: islice(node.traverse(include_text=False), 1, None),
+                tag_of=lambda element: element.tag if element.is_element_node else None,
+                classes_of=lambda element: (element.attributes.get('class') or '').split(),
+                attribute_of=lambda element, name: element.attributes.get(name),
+                query=lambda container, name, selector, limit: container.select(selector)[:limit]
+            )
+
+        return self._compile_generic()
+
+    def _soup_query(self):
+        """Сложные селекторы для BeautifulSoup: soupsieve компилирует их один раз"""
+        if soupsieve is None:
+            return lambda container, name, selector, limit: container.select(selector)[:limit]
+
+        compiled = {name: soupsieve.compile(selector) for name, selector, _ in self.complex_fields}
+
+        def query(container, name, selector, limit):
+            return [SoupNode(element) for element in compiled[name].select(container.node, limit=limit or 0)]
+
+        return query
+
+    def _lxml_query(self):
+        """Сложные селекторы для lxml: перевод в XPath выполняется один раз"""
+        from html_backend import _lxml_descendant_xpath
+        compiled = {name: _lxml_descendant_xpath(selector) for name, selector, _ in self.complex_fields}
+
+        def query(container, name, selector, limit):
+            return [LxmlNode(element) for element in compiled[name](container.node)[:limit]]
+
+        return query
+
+    def _compile_walk(self, node_type, descendants, tag_of, classes_of, attribute_of, query):
+        """План с одним обходом поддерева для всех простых селекторов"""
+        simple_fields = self.simple_fields
+        complex_fields = self.complex_fields
+        names = self.names
+
+        def run(container):
+            found = {name: [] for name in names}
+            pending = simple_fields
+
+            for element in (descendants(container.node) if pending else ()):
+                tag = tag_of(element)
+                if tag is None:
+                    continue
+
+                class_set = set(classes_of(element))
+                completed = False
+
+                for name, alternatives, limit in pending:
+                    for alt_tag, alt_classes, attribute, value in alternatives:
+                        if ((alt_tag is None or alt_tag == tag)
+                                and alt_classes <= class_set
+                                and (attribute is None or value in (attribute_of(element, attribute) or ''))):
+                            found[name].append(element)
+                            completed = completed or (limit is not None and len(found[name]) >= limit)
+                            break
+
+                if completed:
+                    pending = [field for field in pending
+                               if field[2] is None or len(found[field[0]]) < field[2]]
+                    if not pending:
+                        break
+
+            result = {name: [node_type(element) for element in found[name]] for name in names}
+            for name, selector, limit in complex_fields:
+                result[name] = query(container, name, selector, limit)
+            return result
+
+        return run
+
+    def _compile_generic(self):
+        """Запасной вариант для любого бэкенда"""
+        fields = [(name, self.selectors[name], limit) for name, _, limit in self.simple_fields] + self.complex_fields
+
+        def run(container):
+            return {name: container.select(selector)[:limit] for name, selector, limit in fields}
+
+        return run
+
+
+_plans: Dict[tuple, ExtractionPlan] = {}
+
+
+def get_extraction_plan(fields: Dict[str, FieldSpec]) -> ExtractionPlan:
+    """
+    Возвращает план для набора полей (план компилируется один раз и кэшируется)
+
+    Args:
+        fields (Dict[str, FieldSpec]): имя поля -> селектор или (селектор, лимит)
+
+    Returns:
+        ExtractionPlan: Закэшированный план
+    """
+    key = tuple(fields.items())
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = ExtractionPlan(fields)
+        logger.debug(f"Скомпилирован план извлечения: {', '.join(fields)}")
+    return plan
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Общий асинхронный движок HTTP-запросов для всех контроллеров сбора данных
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import ANALYSIS_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'ru-RU,ru;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+}
+
+
+@dataclass
+class CachedPage:
+    """Закэшированная страница с валидаторами для условных запросов"""
+    text: str
+    etag: str = ""
+    last_modified: str = ""
+    fetched_at: float = 0.0
+
+
+class AsyncFetchEngine:
+    """
+    Асинхронный движок загрузки страниц.
+
+    Для каждого хоста держится своя keep-alive сессия с пулом соединений и
+    семафор, ограничивающий число одновременных запросов к этому хосту.
+    Вместо фиксированных пауз между сайтами запросы выполняются параллельно
+    через asyncio, поэтому полный обход всех сайтов занимает примерно
+    одно время ответа самого медленного сайта.
+
+    Ответы кэшируются по URL на несколько секунд: повторные запросы той же
+    страницы в пределах цикла отдаются из кэша, одновременные запросы одного
+    URL объединяются в одну загрузку, а устаревшие записи перепроверяются
+    условным GET (ETag / Last-Modified).
+    """
+
+    def __init__(self, max_per_host: int = None, max_workers: int = None, timeout: int = None,
+                 cache_ttl: float = None, cache_max_entries: int = None):
+        self.max_per_host = max_per_host or ANALYSIS_SETTINGS.get('http_max_connections_per_host', 4)
+        self.timeout = timeout or ANALYSIS_SETTINGS.get('http_timeout_seconds', 30)
+        self.cache_ttl = cache_ttl if cache_ttl is not None else ANALYSIS_SETTINGS.get('page_cache_ttl_seconds', 5)
+        self.cache_max_entries = cache_max_entries or ANALYSIS_SETTINGS.get('page_cache_max_entries', 256)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or ANALYSIS_SETTINGS.get('http_fetch_workers', 16),
+            thread_name_prefix='fetch'
+        )
+        self._hosts: Dict[str, Tuple[requests.Session, threading.BoundedSemaphore]] = {}
+        self._lock = threading.Lock()
+        
+        # Кэш страниц и загрузки, выполняющиеся прямо сейчас
+        self._cache: Dict[str, CachedPage] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._cache_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'coalesced': 0}
+
+    def _host_state(self, host: str) -> Tuple[requests.Session, threading.BoundedSemaphore]:
+        """Возвращает (сессия, семафор) для хоста, создавая их при первом обращении"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_per_host)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                state = (session, threading.BoundedSemaphore(self.max_per_host))
+                self._hosts[host] = state
+            return state
+
+    def _fetch_blocking(self, url: str, headers: Optional[Dict] = None, timeout: int = None) -> Optional[str]:
+        """Синхронная загрузка страницы с учетом кэша и объединением одинаковых запросов"""
+        with self._cache_lock:
+            cached = self._cache.get(url)
+            if cached and time.monotonic() - cached.fetched_at < self.cache_ttl:
+                self._stats['hits'] += 1
+                return cached.text
+            
+            inflight = self._inflight.get(url)
+            if inflight is None:
+                self._stats['misses'] += 1
+                inflight = self._inflight[url] = Future()
+                is_owner = True
+            else:
+                self._stats['coalesced'] += 1
+                is_owner = False
+        
+        # Этот URL уже загружается другим потоком - ждем его результат
+        if not is_owner:
+            return inflight.result()
+        
+        text = None
+        try:
+            text = self._download(url, headers, timeout, cached)
+        finally:
+            with self._cache_lock:
+                self._inflight.pop(url, None)
+            inflight.set_result(text)
+        
+        return text
+
+    def _download(self, url: str, headers: Optional[Dict], timeout: Optional[int],
+                  cached: Optional[CachedPage]) -> Optional[str]:
+        """Загрузка страницы через пул соединений хоста (условный GET, если страница уже в кэше)"""
+        session, host_limit = self._host_state(urlsplit(url).netloc)
+        
+        request_headers = dict(headers or {})
+        if cached:
+            if cached.etag:
+                request_headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                request_headers['If-Modified-Since'] = cached.last_modified
+
+        try:
+            with host_limit:
+                response = session.get(url, headers=request_headers, timeout=timeout or self.timeout, allow_redirects=True)
+            
+            if response.status_code == 304 and cached:
+                self._store(url, CachedPage(cached.text, cached.etag, cached.last_modified, time.monotonic()))
+                with self._cache_lock:
+                    self._stats['revalidated'] += 1
+                return cached.text
+            
+            response.raise_for_status()
+
+            if response.encoding == 'ISO-8859-1':
+                response.encoding = 'utf-8'
+
+            text = response.text
+            self._store(url, CachedPage(
+                text=text,
+                etag=response.headers.get('ETag', ''),
+                last_modified=response.headers.get('Last-Modified', ''),
+                fetched_at=time.monotonic()
+            ))
+            return text
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Ошибка HTTP запроса к {url}: {e}")
+            return None
+
+    def _store(self, url: str, page: CachedPage):
+        """Сохраняет страницу в кэш, вытесняя самые старые записи"""
+        with self._cache_lock:
+            self._cache.pop(url, None)
+            self._cache[url] = page
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.pop(next(iter(self._cache)))
+
+    async def afetch(self, url: str, headers: Optional[Dict] = None, timeout: int = None) -> Optional[str]:
+        """Асинхронная загрузка одной страницы"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._fetch_blocking, url, headers, timeout)
+
+    async def afetch_many(self, urls: Iterable[str], headers: Optional[Dict] = None,
+                          timeout: int = None) -> Dict[str, Optional[str]]:
+        """Асинхронная загрузка набора страниц (повторяющиеся URL загружаются один раз)"""
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        pages = await asyncio.gather(*(self.afetch(url, headers, timeout) for url in unique_urls))
+        return dict(zip(unique_urls, pages))
+
+    def fetch(self, url: str, headers: Optional[Dict] = None, timeout: int = None) -> Optional[str]:
+        """Синхронная загрузка одной страницы"""
+        return self._fetch_blocking(url, headers, timeout)
+
+    def fetch_many(self, urls: Iterable[str], headers: Optional[Dict] = None,
+                   timeout: int = None) -> Dict[str, Optional[str]]:
+        """
+        Параллельная загрузка набора страниц из синхронного кода
+
+        Returns:
+            Dict[str, Optional[str]]: URL -> HTML (None при ошибке)
+        """
+        return asyncio.run(self.afetch_many(urls, headers, timeout))
+
+    def cache_stats(self) -> Dict:
+        """Статистика кэша страниц: попадания, промахи, перепроверки и объединенные запросы"""
+        with self._cache_lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._cache)
+        
+        requests_total = stats['hits'] + stats['misses'] + stats['coalesced']
+        served_without_download = stats['hits'] + stats['coalesced'] + stats['revalidated']
+        stats['hit_rate'] = served_without_download / requests_total * 100 if requests_total else 0
+        return stats
+
+    def clear_cache(self):
+        """Очистка кэша страниц"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def close(self):
+        """Закрытие всех сессий"""
+        with self._lock:
+            for session, _ in self._hosts.values():
+                session.close()
+            self._hosts.clear()
+
+
+# Глобальный экземпляр
+fetch_engine = AsyncFetchEngine()
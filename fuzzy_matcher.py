@@ -2,42 +2,157 @@
 Модуль для fuzzy matching названий команд и игроков
 """
 
-from fuzzywuzzy import fuzz, process
+from fuzzywuzzy import fuzz, process, utils
+from collections import defaultdict
+from functools import lru_cache
+import json
+import logging
+import os
 import re
+import threading
+
+from config import ANALYSIS_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Векторизованный расчет матрицы похожести (rapidfuzz + numpy), если установлен
+try:
+    import numpy as np
+    from rapidfuzz import fuzz as rapid_fuzz, process as rapid_process
+except ImportError:
+    rapid_process = None
+
+# Общие слова и аббревиатуры, которые не несут информации о команде
+COMMON_WORDS = [
+    'fc', 'фк', 'club', 'клуб', 'team', 'команда',
+    'united', 'юнайтед', 'city', 'сити', 'town', 'таун',
+    'athletic', 'атлетико', 'sporting', 'спортинг',
+    'real', 'реал', 'royal', 'роял', 'cf', 'кф'
+]
+
+# Один проход: общие слова целиком (по границам слов) и знаки препинания
+_NORMALIZE_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(map(re.escape, sorted(COMMON_WORDS, key=len, reverse=True))) + r')\b|[^\w\s]'
+)
+
+# Версия правил нормализации (запомненные в файле формы другой версии отбрасываются)
+NORMALIZATION_VERSION = 2
+
+
+@lru_cache(maxsize=8192)
+def normalize_team_name(name):
+    """
+    Нормализация названия: нижний регистр, без общих слов, знаков и лишних пробелов
+    
+    Общие слова удаляются только целиком ("real" не трогает "surreal").
+    """
+    if not name:
+        return ""
+    
+    return ' '.join(_NORMALIZE_PATTERN.sub('', name.lower()).split())
+
+
+class NameAliasTable:
+    """
+    Постоянная таблица нормализованных названий команд и игроков
+    
+    Хранит ручные псевдонимы (например, "Man Utd" -> "manchester") и уже
+    вычисленные нормализованные формы, поэтому повторяющиеся названия между
+    циклами и перезапусками стоят одного обращения к словарю.
+    """
+    
+    def __init__(self, aliases_file=None, max_entries=50000):
+        self.aliases_file = aliases_file or ANALYSIS_SETTINGS.get('team_aliases_file', 'team_aliases.json')
+        self.max_entries = max_entries
+        self.aliases = {}  # Ручные псевдонимы (не перезаписываются)
+        self.learned = {}  # Вычисленные нормализованные формы
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+    
+    def _load(self):
+        """Загружает таблицу из файла при первом обращении"""
+        self._loaded = True
+        try:
+            if os.path.exists(self.aliases_file):
+                with open(self.aliases_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.aliases = data.get('aliases', {})
+                if data.get('version') == NORMALIZATION_VERSION:
+                    self.learned = data.get('learned', {})
+        except Exception as e:
+            logger.error(f"Ошибка загрузки таблицы псевдонимов: {e}")
+    
+    def lookup(self, name):
+        """Нормализованная форма из таблицы или None"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+        
+        alias = self.aliases.get(name)
+        return alias if alias is not None else self.learned.get(name)
+    
+    def remember(self, name, normalized):
+        """Запоминает вычисленную нормализованную форму"""
+        # Под блокировкой: save() в другом потоке копирует learned
+        with self._lock:
+            if len(self.learned) < self.max_entries:
+                self.learned[name] = normalized
+                self._dirty = True
+    
+    def add_alias(self, name, canonical):
+        """Добавляет ручной псевдоним"""
+        self.lookup(name)
+        canonical = normalize_team_name(canonical)
+        with self._lock:
+            self.aliases[name] = canonical
+            self._dirty = True
+    
+    def save(self):
+        """Сохраняет таблицу, если в ней есть изменения"""
+        if not self._dirty:
+            return
+        
+        try:
+            with self._lock:
+                data = {
+                    'version': NORMALIZATION_VERSION,
+                    'aliases': dict(self.aliases),
+                    'learned': dict(self.learned)
+                }
+                self._dirty = False
+            
+            temp_file = self.aliases_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.aliases_file)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения таблицы псевдонимов: {e}")
 
 
 class FuzzyMatcher:
     """Класс для сопоставления названий команд/игроков между сайтами"""
     
-    def __init__(self, threshold=70):
+    def __init__(self, threshold=70, aliases=None):
         self.threshold = threshold
+        self.aliases = aliases or name_aliases
+        
+        # Индексы кандидатов текущего цикла (по одному на список матчей каждого вида спорта)
+        self._index_cache = {}
+        self._index_lock = threading.Lock()  # Общий сопоставитель используют потоки видов спорта
     
     def normalize_name(self, name):
         """Нормализация названия для лучшего сопоставления"""
         if not name:
             return ""
         
-        # Приводим к нижнему регистру
-        normalized = name.lower().strip()
-        
-        # Убираем лишние пробелы
-        normalized = re.sub(r'\s+', ' ', normalized)
-        
-        # Убираем общие слова и аббревиатуры
-        common_words = [
-            'fc', 'фк', 'club', 'клуб', 'team', 'команда',
-            'united', 'юнайтед', 'city', 'сити', 'town', 'таун',
-            'athletic', 'атлетико', 'sporting', 'спортинг',
-            'real', 'реал', 'royal', 'роял', 'cf', 'кф'
-        ]
+        normalized = self.aliases.lookup(name)
+        if normalized is None:
+            normalized = normalize_team_name(name)
+            self.aliases.remember(name, normalized)
         
-        for word in common_words:
-            normalized = normalized.replace(word, '')
-        
-        # Убираем знаки препинания
-        normalized = re.sub(r'[^\w\s]', '', normalized)
-        
-        return normalized.strip()
+        return normalized
     
     def extract_abbreviation(self, name):
         """Извлечение аббревиатуры из названия"""
@@ -147,6 +262,205 @@ class FuzzyMatcher:
         
         return None, 0
     
+    def team_variants(self, name):
+        """Варианты названия команды, с которыми сравнивает match_teams"""
+        normalized = self.normalize_name(name)
+        abbreviation = self.extract_abbreviation(name)
+        
+        variants = [normalized]
+        if abbreviation and abbreviation != normalized:
+            variants.append(abbreviation)
+        return variants
+    
+    def player_variants(self, name):
+        """Варианты имени игрока, с которыми сравнивает match_players"""
+        normalized = self.normalize_name(name)
+        
+        variants = [normalized]
+        parts = normalized.split()
+        if len(parts) > 1:
+            variants.extend([parts[-1], parts[0]])  # Фамилия и имя
+        return variants
+    
+    def get_match_index(self, matches, key1='team1', key2='team2', players=False):
+        """
+        Индекс кандидатов для списка матчей Scores24
+        
+        Индекс строится один раз на список (то есть на цикл анализа) и
+        переиспользуется для всех матчей букмекера.
+        
+        Args:
+            matches (list): Матчи Scores24 (словари)
+            key1 (str): Поле первой команды/игрока
+            key2 (str): Поле второй команды/игрока
+            players (bool): Сопоставлять как игроков (match_players), а не команды
+            
+        Returns:
+            MatchIndex: Индекс кандидатов
+        """
+        cache_key = (id(matches), key1, key2, players)
+        with self._index_lock:
+            cached = self._index_cache.get(cache_key)
+        if cached and cached.matches is matches and cached.size == len(matches):
+            return cached
+        
+        # Индекс строится вне блокировки: потоки других видов спорта не ждут
+        index = MatchIndex(self, matches, key1, key2, players)
+        
+        with self._index_lock:
+            # Индексы прошлых циклов не нужны - храним только несколько последних
+            if len(self._index_cache) >= 8:
+                self._index_cache.pop(next(iter(self._index_cache)), None)
+            self._index_cache[cache_key] = index
+        return index
+    
+    def match_many(self, left_names, right_names, players=False, min_confidence=70):
+        """
+        Пакетное сопоставление двух списков названий
+        
+        Матрица похожести считается одним векторизованным вызовом
+        (rapidfuzz.process.cdist) или, без rapidfuzz, через блочный индекс.
+        Пары назначаются глобально один-к-одному: одно название справа
+        не может достаться двум названиям слева.
+        
+        Args:
+            left_names (list): Названия букмекера
+            right_names (list): Названия Scores24
+            players (bool): Сравнивать как имена игроков
+            min_confidence (int): Минимальная уверенность
+            
+        Returns:
+            list: [(индекс слева, индекс справа, уверенность), ...]
+        """
+        required = max(self.threshold, min_confidence)
+        scores = self._score_matrix(left_names, right_names, players, required)
+        return self._assign(scores)
+    
+    def pair_events(self, left_events, right_events, left_keys=('team1', 'team2'),
+                    right_keys=('team1', 'team2'), players=False, min_confidence=70):
+        """
+        Пакетное сопоставление матчей по паре команд/игроков
+        
+        Уверенность пары матчей - минимальная из уверенностей двух сторон.
+        
+        Args:
+            left_events (list): Матчи букмекера (объекты или словари)
+            right_events (list): Матчи Scores24 (объекты или словари)
+            left_keys (tuple): Поля команд/игроков слева
+            right_keys (tuple): Поля команд/игроков справа
+            players (bool): Сравнивать как имена игроков
+            min_confidence (int): Минимальная уверенность для каждой стороны
+            
+        Returns:
+            list: [(матч слева, матч справа, уверенность), ...]
+        """
+        required = max(self.threshold, min_confidence)
+        
+        if rapid_process is not None:
+            first_side, second_side = [
+                self._score_matrix(
+                    [_event_field(event, left_key) for event in left_events],
+                    [_event_field(event, right_key) for event in right_events],
+                    players, required
+                )
+                for left_key, right_key in zip(left_keys, right_keys)
+            ]
+            scores = {pair: min(score, second_side[pair]) for pair, score in first_side.items() if pair in second_side}
+        else:
+            # Без rapidfuzz: кандидаты из общих блоков обеих сторон (как в MatchIndex.find)
+            index = MatchIndex(self, right_events, right_keys[0], right_keys[1], players)
+            scores = {}
+            for left, event in enumerate(left_events):
+                found = index.scores(_event_field(event, left_keys[0]), _event_field(event, left_keys[1]), required)
+                for right, confidence in found.items():
+                    scores[(left, right)] = confidence
+        
+        return [(left_events[left], right_events[right], confidence)
+                for left, right, confidence in self._assign(scores)]
+    
+    def pair_events_by_id(self, left_events, right_events, right_keys=('team1', 'team2'), players=False):
+        """
+        Пакетные пары для поиска по матчу букмекера (настройка fuzzy_batch_matching)
+        
+        Args:
+            left_events (list): Матчи букмекера
+            right_events (list): Матчи Scores24
+            right_keys (tuple): Поля команд/игроков справа
+            players (bool): Сравнивать как имена игроков
+            
+        Returns:
+            tuple: (right_events, {id(матч слева): матч справа}) или None, если пакетное сопоставление выключено
+        """
+        if not ANALYSIS_SETTINGS.get('fuzzy_batch_matching', False):
+            return None
+        
+        pairs = self.pair_events(left_events, right_events, right_keys=right_keys, players=players)
+        return right_events, {id(left): right for left, right, _ in pairs}
+    
+    def _score_matrix(self, left_names, right_names, players, required):
+        """Оценки всех пар названий не ниже required: {(слева, справа): оценка}"""
+        queries = [utils.full_process(self.normalize_name(name)) if name else '' for name in left_names]
+        
+        if rapid_process is not None:
+            return self._score_matrix_cdist(queries, right_names, players, required)
+        
+        index = NameIndex(self, right_names, players)
+        scores = {}
+        for left, query in enumerate(queries):
+            # Пустой запрос не несет информации о команде
+            if not query:
+                continue
+            for right, score in index.scores(query, required).items():
+                scores[(left, right)] = score
+        return scores
+    
+    def _score_matrix_cdist(self, queries, right_names, players, required):
+        """Матрица похожести одним вызовом rapidfuzz.process.cdist"""
+        variants_of = self.player_variants if players else self.team_variants
+        
+        choices, owners = [], []
+        for right, name in enumerate(right_names):
+            if not name:
+                continue
+            for variant in variants_of(name):
+                choices.append(utils.full_process(variant))
+                owners.append(right)
+        
+        query_rows = [left for left, query in enumerate(queries) if query]
+        if not query_rows or not choices:
+            return {}
+        
+        matrix = rapid_process.cdist(
+            [queries[left] for left in query_rows], choices,
+            scorer=rapid_fuzz.ratio, score_cutoff=required - 0.5, workers=-1
+        )
+        
+        # Лучший вариант каждого названия: варианты одного названия идут подряд
+        owners = np.asarray(owners)
+        starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+        best = np.maximum.reduceat(matrix, starts, axis=1)
+        
+        rows, columns = np.nonzero(best >= required - 0.5)
+        return {
+            (query_rows[row], int(owners[starts[column]])): int(round(best[row, column]))
+            for row, column in zip(rows.tolist(), columns.tolist())
+        }
+    
+    @staticmethod
+    def _assign(scores):
+        """Глобальное назначение один-к-одному: пары берутся по убыванию уверенности"""
+        used_left, used_right = set(), set()
+        pairs = []
+        
+        for (left, right), score in sorted(scores.items(), key=lambda item: (-item[1], item[0])):
+            if left in used_left or right in used_right:
+                continue
+            used_left.add(left)
+            used_right.add(right)
+            pairs.append((left, right, score))
+        
+        return sorted(pairs)
+    
     def is_non_draw_score(self, score):
         """Проверка, что счет не ничейный"""
         if not score or ':' not in score:
@@ -212,4 +526,155 @@ class FuzzyMatcher:
             away_goals = int(away.strip())
             return abs(home_goals - away_goals) >= min_difference
         except (ValueError, AttributeError):
-            return False
\ No newline at end of file
+            return False
+
+# Глобальный экземпляр
+name_aliases = NameAliasTable()
+
+
+def _event_field(event, key):
+    """Поле матча: словари Scores24 и объекты MatchData букмекеров"""
+    return event.get(key) if isinstance(event, dict) else getattr(event, key, None)
+
+
+def blocking_keys(text):
+    """
+    Ключи блокировки строки: первая буква, триграммы и короткие слова
+    
+    Строки с похожестью fuzz.ratio >= 70 практически всегда делят хотя бы
+    один такой ключ, поэтому сравнивать нужно только кандидатов из общих блоков.
+    """
+    if not text:
+        return {''}
+    
+    keys = {'^' + text[0]}
+    keys.update(text[i:i + 3] for i in range(len(text) - 2))
+    keys.update('#' + token for token in text.split() if len(token) < 3)
+    return keys
+
+
+class NameIndex:
+    """
+    Блочный индекс списка названий одной стороны матча (команд или игроков)
+    
+    Названия нормализуются один раз, а fuzz.ratio считается только для
+    названий, которые делят с запросом хотя бы один ключ блокировки.
+    """
+    
+    def __init__(self, matcher, names, players=False):
+        variants_of = matcher.player_variants if players else matcher.team_variants
+        
+        self.variants = []
+        self.blocks = defaultdict(set)
+        
+        for position, name in enumerate(names):
+            # Пустое название никогда не сопоставляется (как в match_teams)
+            processed = [utils.full_process(variant) for variant in variants_of(name)] if name else []
+            self.variants.append(processed)
+            for variant in processed:
+                for block_key in blocking_keys(variant):
+                    self.blocks[block_key].add(position)
+    
+    def candidates(self, query):
+        """Позиции названий, которые делят с запросом хотя бы один блок"""
+        candidates = set()
+        for block_key in blocking_keys(query):
+            candidates.update(self.blocks.get(block_key, ()))
+        return candidates
+    
+    def score(self, position, query, required):
+        """Лучшая оценка fuzz.ratio среди вариантов названия (как process.extractOne)"""
+        best = 0
+        query_length = len(query)
+        for variant in self.variants[position]:
+            total = query_length + len(variant)
+            # Верхняя граница ratio по длинам строк - заведомо слабых не сравниваем
+            if total and 200 * min(query_length, len(variant)) / total < required - 1:
+                continue
+            best = max(best, fuzz.ratio(query, variant))
+        return best
+    
+    def scores(self, query, required):
+        """Оценки всех названий не ниже required: {позиция: оценка}"""
+        found = {}
+        for position in self.candidates(query):
+            score = self.score(position, query, required)
+            if score >= required:
+                found[position] = score
+        return found
+
+
+class MatchIndex:
+    """
+    Индекс матчей Scores24 для быстрого поиска пары команд/игроков
+    
+    Каждая сторона матча индексируется NameIndex, поэтому fuzz.ratio
+    считается только для матчей, у которых обе команды попали в общие
+    блоки с запросом. Результат совпадает с последовательным перебором
+    через match_teams / match_players: возвращается первый подходящий
+    матч в порядке списка.
+    """
+    
+    def __init__(self, matcher, matches, key1='team1', key2='team2', players=False):
+        self.matcher = matcher
+        self.matches = matches
+        self.size = len(matches)
+        self.key1 = key1
+        self.key2 = key2
+        self.players = players
+        self.sides = (
+            NameIndex(matcher, [_event_field(match, key1) or '' for match in matches], players),
+            NameIndex(matcher, [_event_field(match, key2) or '' for match in matches], players)
+        )
+    
+    def find(self, name1, name2, min_confidence=70):
+        """
+        Поиск матча по паре названий
+        
+        Args:
+            name1 (str): Первая команда/игрок букмекера
+            name2 (str): Вторая команда/игрок букмекера
+            min_confidence (int): Минимальная уверенность для каждой стороны
+            
+        Returns:
+            Optional[Dict]: Первый подходящий матч или None
+        """
+        if not name1 or not name2:
+            return None
+        
+        query1 = utils.full_process(self.matcher.normalize_name(name1))
+        query2 = utils.full_process(self.matcher.normalize_name(name2))
+        required = max(self.matcher.threshold, min_confidence)
+        
+        side1, side2 = self.sides
+        candidates = side1.candidates(query1) & side2.candidates(query2)
+        
+        for position in sorted(candidates):
+            if (side1.score(position, query1, required) >= required
+                    and side2.score(position, query2, required) >= required):
+                return self.matches[position]
+        
+        return None
+    
+    def scores(self, name1, name2, required):
+        """
+        Уверенность для всех подходящих матчей: {позиция: минимум из оценок двух сторон}
+        """
+        if not name1 or not name2:
+            return {}
+        
+        query1 = utils.full_process(self.matcher.normalize_name(name1))
+        query2 = utils.full_process(self.matcher.normalize_name(name2))
+        if not query1 or not query2:
+            return {}
+        
+        side1, side2 = self.sides
+        found = {}
+        for position in side1.candidates(query1) & side2.candidates(query2):
+            score1 = side1.score(position, query1, required)
+            if score1 < required:
+                continue
+            score2 = side2.score(position, query2, required)
+            if score2 >= required:
+                found[position] = min(score1, score2)
+        return found
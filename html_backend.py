@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Подключаемые бэкенды HTML-парсинга для парсеров scores24 и букмекеров
+
+Все бэкенды отдают узлы с одинаковым подмножеством API BeautifulSoup
+(select, select_one, get_text, get), поэтому существующие словари
+селекторов (self.selectors, SCORES24_SELECTORS, BETBOOM_SELECTORS)
+работают без изменений. Быстрые C-реализации (selectolax, lxml)
+используются, если установлены, иначе - BeautifulSoup.
+"""
+
+import logging
+from functools import lru_cache
+from typing import List, Optional
+
+from bs4 import BeautifulSoup
+
+from config import ANALYSIS_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+    from cssselect import HTMLTranslator
+except ImportError:
+    lxml = None
+
+
+class HTMLNode:
+    """Узел HTML-документа с общим для всех бэкендов API"""
+    __slots__ = ('node',)
+
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, selector: str) -> List['HTMLNode']:
+        """Все потомки, подходящие под CSS-селектор"""
+        raise NotImplementedError
+
+    def select_one(self, selector: str) -> Optional['HTMLNode']:
+        """Первый потомок, подходящий под CSS-селектор"""
+        found = self.select(selector)
+        return found[0] if found else None
+
+    def get_text(self, strip: bool = False) -> str:
+        """Текст узла (как BeautifulSoup.get_text)"""
+        raise NotImplementedError
+
+    def get(self, attribute: str, default=None):
+        """Значение атрибута"""
+        raise NotImplementedError
+
+    def has_class(self, class_name: str) -> bool:
+        """Есть ли у узла CSS-класс"""
+        return class_name in (self.get('class') or '').split()
+
+    def closest(self, selector: str) -> Optional['HTMLNode']:
+        """Ближайший предок, подходящий под CSS-селектор"""
+        raise NotImplementedError
+
+    def __bool__(self):
+        return True
+
+
+class SoupNode(HTMLNode):
+    """Узел BeautifulSoup"""
+    __slots__ = ()
+
+    def select(self, selector):
+        return [SoupNode(tag) for tag in self.node.select(selector)]
+
+    def select_one(self, selector):
+        tag = self.node.select_one(selector)
+        return SoupNode(tag) if tag is not None else None
+
+    def get_text(self, strip=False):
+        return self.node.get_text(strip=strip)
+
+    def get(self, attribute, default=None):
+        value = self.node.get(attribute, default)
+        # BeautifulSoup отдает class списком, остальные бэкенды - строкой
+        return ' '.join(value) if isinstance(value, list) else value
+
+    def closest(self, selector):
+        for parent in self.node.parents:
+            if getattr(parent, 'name', None) and parent.name != '[document]' and parent.css.match(selector):
+                return SoupNode(parent)
+        return None
+
+
+class LxmlNode(HTMLNode):
+    """Узел lxml (CSS-селекторы компилируются в XPath один раз)"""
+    __slots__ = ()
+
+    def select(self, selector):
+        return [LxmlNode(element) for element in _lxml_descendant_xpath(selector)(self.node)]
+
+    def get_text(self, strip=False):
+        if strip:
+            return ''.join(text.strip() for text in self.node.itertext())
+        return ''.join(self.node.itertext())
+
+    def get(self, attribute, default=None):
+        return self.node.get(attribute, default)
+
+    def closest(self, selector):
+        match = _lxml_self_xpath(selector)
+        for parent in self.node.iterancestors():
+            if match(parent):
+                return LxmlNode(parent)
+        return None
+
+
+class SelectolaxNode(HTMLNode):
+    """Узел selectolax (lexbor)"""
+    __slots__ = ()
+
+    def select(self, selector):
+        found = self.node.css(selector)
+        # В отличие от BeautifulSoup, lexbor включает в результат сам узел
+        if found and found[0].mem_id == self.node.mem_id:
+            found = found[1:]
+        return [SelectolaxNode(node) for node in found]
+
+    def select_one(self, selector):
+        node = self.node.css_first(selector)
+        if node is not None and node.mem_id == self.node.mem_id:
+            found = self.select(selector)
+            return found[0] if found else None
+        return SelectolaxNode(node) if node is not None else None
+
+    def get_text(self, strip=False):
+        return self.node.text(deep=True, separator='', strip=strip)
+
+    def get(self, attribute, default=None):
+        value = self.node.attributes.get(attribute, default)
+        return default if value is None else value
+
+    def closest(self, selector):
+        parent = self.node.parent
+        while parent is not None and parent.is_element_node:
+            if parent.css_matches(selector):
+                return SelectolaxNode(parent)
+            parent = parent.parent
+        return None
+
+
+if lxml is not None:
+    _css_translator = HTMLTranslator()
+
+    @lru_cache(maxsize=512)
+    def _lxml_descendant_xpath(selector: str):
+        """XPath для поиска потомков (компилируется один раз на селектор)"""
+        return etree.XPath(_css_translator.css_to_xpath(selector, prefix='descendant::'))
+
+    @lru_cache(maxsize=512)
+    def _lxml_self_xpath(selector: str):
+        """XPath для проверки самого узла"""
+        return etree.XPath(_css_translator.css_to_xpath(selector, prefix='self::'))
+
+
+class HTMLBackend:
+    """Базовый бэкенд парсинга"""
+    name = ''
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    def parse(self, html: str) -> HTMLNode:
+        raise NotImplementedError
+
+
+class SoupBackend(HTMLBackend):
+    """BeautifulSoup с 'html.parser', как в контроллерах до выбора парсера (эталон для сравнения)"""
+    name = 'soup'
+
+    def parse(self, html):
+        return SoupNode(BeautifulSoup(html, 'html.parser'))
+
+
+class LxmlBackend(HTMLBackend):
+    """lxml.html + cssselect"""
+    name = 'lxml'
+
+    @classmethod
+    def is_available(cls):
+        return lxml is not None
+
+    def parse(self, html):
+        return LxmlNode(lxml.html.document_fromstring(html))
+
+
+class SelectolaxBackend(HTMLBackend):
+    """selectolax (lexbor) - самый быстрый вариант"""
+    name = 'selectolax'
+
+    @classmethod
+    def is_available(cls):
+        return LexborHTMLParser is not None
+
+    def parse(self, html):
+        return SelectolaxNode(LexborHTMLParser(html).root)
+
+
+BACKENDS = {backend.name: backend for backend in (SelectolaxBackend, LxmlBackend, SoupBackend)}
+
+# Порядок выбора в режиме 'auto' (от самого быстрого)
+AUTO_ORDER = ['selectolax', 'lxml', 'soup']
+
+_backend_instances = {}
+
+
+def get_backend(name: str = None) -> HTMLBackend:
+    """
+    Возвращает бэкенд парсинга
+
+    Args:
+        name (str): 'selectolax', 'lxml', 'soup' или 'auto' (по умолчанию из настроек)
+
+    Returns:
+        HTMLBackend: Доступный бэкенд (при отсутствии библиотеки - BeautifulSoup)
+    """
+    name = name or ANALYSIS_SETTINGS.get('html_parser_backend', 'auto')
+    candidates = AUTO_ORDER if name == 'auto' else [name, 'soup']
+
+    for candidate in candidates:
+        backend_class = BACKENDS.get(candidate)
+        if backend_class and backend_class.is_available():
+            if candidate not in _backend_instances:
+                _backend_instances[candidate] = backend_class()
+                logger.info(f"HTML-бэкенд: {candidate}")
+            return _backend_instances[candidate]
+
+        if candidate == name:
+            logger.warning(f"HTML-бэкенд {name} недоступен, используем запасной вариант")
+
+    return SoupBackend()
+
+
+def parse_html(html: str, backend: str = None) -> HTMLNode:
+    """Разбирает HTML выбранным бэкендом и возвращает корневой узел"""
+    return get_backend(backend).parse(html)
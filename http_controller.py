@@ -6,24 +6,16 @@ import requests
 import time
 import json
 from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
-from bs4 import BeautifulSoup
+from match_record import MatchRecord
+from html_backend import parse_html
+from extraction_plan import ExtractionPlan, get_extraction_plan
 import re
 from urllib.parse import urljoin
+from fetch_engine import fetch_engine
 
 
-@dataclass
-class MatchData:
-    """Структура данных о матче"""
-    team1: str
-    team2: str
-    score: str
-    minute: str
-    coefficient: float
-    is_locked: bool
-    sport_type: str
-    league: str = ""
-    url: str = ""
+# Единая запись матча для всех контроллеров (__slots__, общая таблица строк)
+MatchData = MatchRecord
 
 
 class HTTPController:
@@ -104,20 +96,8 @@ class HTTPController:
         Returns:
             Optional[str]: HTML содержимое или None
         """
-        try:
-            print(f"HTTP запрос к: {url}")
-            response = self.session.get(url, timeout=timeout)
-            response.raise_for_status()
-            
-            # Проверяем кодировку
-            if response.encoding == 'ISO-8859-1':
-                response.encoding = 'utf-8'
-            
-            return response.text
-            
-        except requests.exceptions.RequestException as e:
-            print(f"Ошибка HTTP запроса к {url}: {e}")
-            return None
+        print(f"HTTP запрос к: {url}")
+        return fetch_engine.fetch(url, headers=self.session.headers, timeout=timeout)
     
     def parse_matches(self, html: str, site: str, sport_type: str) -> List[MatchData]:
         """
@@ -135,15 +115,16 @@ class HTTPController:
             return []
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            document = parse_html(html)
             selectors = self.selectors.get(site, {})
             
             # Ищем контейнеры матчей
-            match_containers = soup.select(selectors.get('match_container', '.event-item'))
+            match_containers = document.select(selectors.get('match_container', '.event-item'))
+            plan = self._get_extraction_plan(selectors)
             
             matches = []
             for container in match_containers:
-                match_data = self._extract_match_data(container, selectors, sport_type)
+                match_data = self._extract_match_data(container, selectors, sport_type, plan)
                 if match_data:
                     matches.append(match_data)
             
@@ -153,21 +134,38 @@ class HTTPController:
             print(f"Ошибка парсинга HTML для {site}: {e}")
             return []
     
-    def _extract_match_data(self, container, selectors: Dict, sport_type: str) -> Optional[MatchData]:
+    def _get_extraction_plan(self, selectors: Dict) -> ExtractionPlan:
+        """План извлечения полей матча для селекторов сайта (компилируется один раз)"""
+        return get_extraction_plan({
+            'team_names': (selectors.get('team_names', '.team-name'), 2),
+            'score': (selectors.get('score', '.score'), 1),
+            'minute': (selectors.get('minute', '.minute'), 1),
+            'coefficient': (selectors.get('coefficient', '.coefficient'), 1),
+            'locked': (selectors.get('locked', '.locked'), 1),
+            'league': (selectors.get('league', '.league'), 1),
+            'url': ('a', 1)
+        })
+    
+    def _extract_match_data(self, container, selectors: Dict, sport_type: str,
+                            plan: Optional[ExtractionPlan] = None) -> Optional[MatchData]:
         """
         Извлечение данных матча из контейнера
         
         Args:
-            container: BeautifulSoup контейнер
+            container: HTML-контейнер (html_backend.HTMLNode)
             selectors (Dict): Селекторы для извлечения
             sport_type (str): Тип спорта
+            plan (ExtractionPlan): Скомпилированный план (по умолчанию строится из selectors)
             
         Returns:
             Optional[MatchData]: Данные матча или None
         """
         try:
+            # Все поля контейнера находятся за один обход
+            fields = (plan or self._get_extraction_plan(selectors)).extract(container)
+            
             # Извлекаем названия команд
-            team_elements = container.select(selectors.get('team_names', '.team-name'))
+            team_elements = fields['team_names']
             if len(team_elements) < 2:
                 return None
             
@@ -175,33 +173,28 @@ class HTTPController:
             team2 = team_elements[1].get_text(strip=True)
             
             # Извлекаем счет
-            score_element = container.select_one(selectors.get('score', '.score'))
-            score = score_element.get_text(strip=True) if score_element else ""
+            score = fields['score'][0].get_text(strip=True) if fields['score'] else ""
             
             # Извлекаем минуту
-            minute_element = container.select_one(selectors.get('minute', '.minute'))
-            minute = minute_element.get_text(strip=True) if minute_element else ""
+            minute = fields['minute'][0].get_text(strip=True) if fields['minute'] else ""
             
             # Извлекаем коэффициент
-            coeff_element = container.select_one(selectors.get('coefficient', '.coefficient'))
             coefficient = 0.0
-            if coeff_element:
-                coeff_text = coeff_element.get_text(strip=True)
+            if fields['coefficient']:
+                coeff_text = fields['coefficient'][0].get_text(strip=True)
                 try:
                     coefficient = float(re.sub(r'[^\d.,]', '', coeff_text).replace(',', '.'))
                 except (ValueError, AttributeError):
                     coefficient = 0.0
             
             # Проверяем, заблокирована ли ставка
-            is_locked = bool(container.select_one(selectors.get('locked', '.locked')))
+            is_locked = bool(fields['locked'])
             
             # Извлекаем лигу
-            league_element = container.select_one(selectors.get('league', '.league'))
-            league = league_element.get_text(strip=True) if league_element else ""
+            league = fields['league'][0].get_text(strip=True) if fields['league'] else ""
             
             # Извлекаем URL матча
-            url_element = container.select_one('a')
-            url = url_element.get('href', '') if url_element else ""
+            url = fields['url'][0].get('href', '') if fields['url'] else ""
             
             return MatchData(
                 team1=team1,
@@ -254,18 +247,44 @@ class HTTPController:
         Returns:
             List[MatchData]: Объединенный список матчей
         """
-        all_matches = []
+        return self.get_all_sports_live_matches([sport_type]).get(sport_type, [])
+    
+    def get_all_sports_live_matches(self, sports: List[str] = None) -> Dict[str, List[MatchData]]:
+        """
+        Получение live-матчей со всех сайтов по нескольким видам спорта за один проход
         
-        for site in ['winline', 'betboom', 'baltbet']:
-            try:
-                matches = self.get_live_matches(site, sport_type)
-                all_matches.extend(matches)
-                time.sleep(1)  # Пауза между запросами
-            except Exception as e:
-                print(f"Ошибка получения матчей с {site}: {e}")
-                continue
+        Все страницы (сайты × виды спорта) загружаются параллельно, поэтому
+        полный обход занимает примерно одно время ответа, а не сумму всех запросов.
         
-        return all_matches
+        Args:
+            sports (List[str]): Виды спорта (по умолчанию все четыре)
+            
+        Returns:
+            Dict[str, List[MatchData]]: Вид спорта -> объединенный список матчей
+        """
+        sports = sports or ['football', 'tennis', 'table_tennis', 'handball']
+        sites = ['winline', 'betboom', 'baltbet']
+        
+        pages = fetch_engine.fetch_many(
+            (self.urls.get(site, {}).get(sport) for site in sites for sport in sports),
+            headers=self.session.headers
+        )
+        
+        results = {}
+        for sport in sports:
+            all_matches = []
+            for site in sites:
+                try:
+                    html = pages.get(self.urls.get(site, {}).get(sport))
+                    matches = self.parse_matches(html, site, sport)
+                    print(f"Найдено {len(matches)} матчей на {site} для {sport}")
+                    all_matches.extend(matches)
+                except Exception as e:
+                    print(f"Ошибка получения матчей с {site}: {e}")
+                    continue
+            results[sport] = all_matches
+        
+        return results
     
     def test_site_accessibility(self) -> Dict[str, bool]:
         """
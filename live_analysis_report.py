@@ -6,31 +6,21 @@ import requests
 import time
 import json
 from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
-from bs4 import BeautifulSoup
+from match_record import MatchRecord
+from html_backend import parse_html
 import re
 from urllib.parse import urljoin
 import logging
 from datetime import datetime
+from fetch_engine import fetch_engine
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class MatchData:
-    """Структура данных о матче"""
-    team1: str
-    team2: str
-    score: str
-    minute: str
-    coefficient: float
-    is_locked: bool
-    sport_type: str
-    league: str = ""
-    url: str = ""
-    status: str = ""
+# Единая запись матча для всех контроллеров (__slots__, общая таблица строк)
+MatchData = MatchRecord
 
 
 class LiveAnalysisReport:
@@ -63,19 +53,8 @@ class LiveAnalysisReport:
     
     def get_page_content(self, url: str, timeout: int = 30) -> Optional[str]:
         """Получение содержимого страницы"""
-        try:
-            logger.info(f"Запрос к: {url}")
-            response = self.session.get(url, timeout=timeout)
-            response.raise_for_status()
-            
-            if response.encoding == 'ISO-8859-1':
-                response.encoding = 'utf-8'
-            
-            return response.text
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка HTTP запроса к {url}: {e}")
-            return None
+        logger.info(f"Запрос к: {url}")
+        return fetch_engine.fetch(url, headers=self.session.headers, timeout=timeout)
     
     def parse_scores24_matches(self, html: str, sport_type: str) -> List[MatchData]:
         """Парсинг матчей с Scores24.live"""
@@ -83,11 +62,11 @@ class LiveAnalysisReport:
             return []
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            document = parse_html(html)
             matches = []
             
             # Ищем контейнеры матчей
-            match_containers = soup.select('.sc-17qxh4e-0.dHxDFU')
+            match_containers = document.select('.sc-17qxh4e-0.dHxDFU')
             
             for container in match_containers:
                 match_data = self._extract_scores24_match(container, sport_type)
@@ -0,0 +1,377 @@
+"""
+Очередь фоновых запросов к LLM (Batch API)
+
+Запросы, ответ на которые не нужен немедленно (обоснования ставок, выводы
+дневной статистики, бэктест прогнозов), не проходят через лимиты
+live-анализа. Они копятся в очереди SQLite, пакетом записываются в
+JSONL-файл формата Batch API и отправляются одной задачей. Фоновый поток
+опрашивает задачи и записывает ответы в ту же базу, откуда их читают по
+виду запроса и ключу.
+"""
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import ANALYSIS_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = '/v1/chat/completions'
+
+# Задача завершилась без результатов для части запросов
+FINISHED_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+
+class LLMBatchQueue:
+    """
+    Очередь несрочных запросов к LLM
+
+    - enqueue: добавляет запрос (вид запроса + ключ, повторы не добавляются)
+    - flush: отправляет накопленные запросы одной задачей Batch API
+    - poll: забирает результаты завершенных задач
+    - result / results: ответы по ключу или по виду запроса
+    - start / stop: фоновый поток flush + poll
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS requests (
+            custom_id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            batch_id TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            response TEXT,
+            error TEXT,
+            completed_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_requests_status ON requests (status, created_at);
+        CREATE INDEX IF NOT EXISTS idx_requests_batch ON requests (batch_id);
+        CREATE INDEX IF NOT EXISTS idx_requests_kind ON requests (kind, completed_at);
+    """
+
+    def __init__(self, path: str = None, directory: str = None, client=None, model: str = None,
+                 flush_size: int = None, flush_minutes: float = None, poll_seconds: float = None):
+        self.path = path or ANALYSIS_SETTINGS.get('llm_batch_file', 'llm_batch.db')
+        self.directory = directory or ANALYSIS_SETTINGS.get('llm_batch_dir', 'llm_batches')
+        self.model = model or ANALYSIS_SETTINGS.get('llm_batch_model', 'gpt-4o-mini')
+        self.flush_size = flush_size or ANALYSIS_SETTINGS.get('llm_batch_flush_size', 50)
+        self.flush_seconds = (flush_minutes or ANALYSIS_SETTINGS.get('llm_batch_flush_minutes', 30)) * 60
+        self.poll_seconds = poll_seconds or ANALYSIS_SETTINGS.get('llm_batch_poll_seconds', 300)
+        self.completion_window = ANALYSIS_SETTINGS.get('llm_batch_completion_window', '24h')
+        self.max_attempts = ANALYSIS_SETTINGS.get('llm_batch_max_attempts', 3)
+        self.max_requests = ANALYSIS_SETTINGS.get('llm_batch_max_requests', 5000)
+        self.enabled = ANALYSIS_SETTINGS.get('llm_batch_enabled', True)
+
+        self._client = client
+        self._connection = None
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Очередь
+    # ------------------------------------------------------------------
+
+    def enqueue(self, kind: str, key: str, prompt: str, system_prompt: str = None,
+                max_tokens: int = 400, temperature: float = 0.2, refresh: bool = False) -> bool:
+        """
+        Добавляет запрос в очередь
+
+        Args:
+            kind (str): Вид запроса ('reasoning', 'daily_insights', 'backtest')
+            key (str): Ключ результата внутри вида запроса
+            prompt (str): Промпт пользователя
+            system_prompt (str): Системный промпт
+            refresh (bool): Запросить заново, если ответ уже получен
+                (запрос, отправленный и еще не завершенный, не меняется)
+
+        Returns:
+            bool: True, если запрос добавлен или обновлен
+        """
+        if not self.enabled:
+            return False
+
+        messages = [{"role": "user", "content": prompt}]
+        if system_prompt:
+            messages.insert(0, {"role": "system", "content": system_prompt})
+        body = json.dumps({"model": self.model, "messages": messages, "max_tokens": max_tokens,
+                           "temperature": temperature}, ensure_ascii=False)
+        custom_id = f"{kind}:{key}"
+
+        try:
+            with self._lock:
+                connection = self._connect()
+                if refresh:
+                    cursor = connection.execute(
+                        "UPDATE requests SET body = ?, status = 'pending', batch_id = NULL, attempts = 0, "
+                        "created_at = ?, response = NULL, error = NULL, completed_at = NULL "
+                        "WHERE custom_id = ? AND status != 'submitted'",
+                        (body, time.time(), custom_id)
+                    )
+                    if cursor.rowcount:
+                        connection.commit()
+                        return True
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO requests (custom_id, kind, key, body, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (custom_id, kind, key, body, time.time())
+                )
+                connection.commit()
+                return bool(cursor.rowcount)
+
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка добавления запроса в очередь LLM: {e}")
+            return False
+
+    def result(self, kind: str, key: str) -> Optional[str]:
+        """Ответ модели по виду запроса и ключу или None, если его еще нет"""
+        if not self._exists():
+            return None
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT response FROM requests WHERE custom_id = ? AND status = 'done'", (f"{kind}:{key}",)
+                ).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка чтения результата очереди LLM: {e}")
+            return None
+
+    def results(self, kind: str) -> List[Dict]:
+        """Полученные ответы вида запроса (key, response, completed_at)"""
+        if not self._exists():
+            return []
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT key, response, completed_at FROM requests WHERE kind = ? AND status = 'done' "
+                    "ORDER BY completed_at", (kind,)
+                ).fetchall()
+            return [{'key': key, 'response': response, 'completed_at': completed_at}
+                    for key, response, completed_at in rows]
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка чтения результатов очереди LLM: {e}")
+            return []
+
+    def counts(self) -> Dict[str, int]:
+        """Количество запросов по статусам (pending, submitted, done, failed)"""
+        if not self._exists():
+            return {}
+        with self._lock:
+            rows = self._connect().execute("SELECT status, COUNT(*) FROM requests GROUP BY status").fetchall()
+        return dict(rows)
+
+    # ------------------------------------------------------------------
+    # Отправка и опрос задач
+    # ------------------------------------------------------------------
+
+    def flush(self, force: bool = False) -> Optional[str]:
+        """
+        Отправляет ожидающие запросы одной задачей Batch API
+
+        Задача создается, когда в очереди flush_size запросов или самый
+        старый запрос ждет дольше flush_minutes (force - сразу).
+
+        Returns:
+            Optional[str]: ID задачи или None
+        """
+        if not self._exists():
+            return None
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT custom_id, body, created_at FROM requests WHERE status = 'pending' "
+                "ORDER BY created_at LIMIT ?", (self.max_requests,)
+            ).fetchall()
+        if not rows:
+            return None
+        if not force and len(rows) < self.flush_size and time.time() - rows[0][2] < self.flush_seconds:
+            return None
+
+        client = self._get_client()
+        if client is None:
+            return None
+
+        batch_file = self._write_batch_file(rows)
+        try:
+            with open(batch_file, 'rb') as f:
+                uploaded = client.files.create(file=f, purpose='batch')
+            batch = client.batches.create(input_file_id=uploaded.id, endpoint=BATCH_ENDPOINT,
+                                          completion_window=self.completion_window)
+        except Exception as e:
+            logger.error(f"Ошибка отправки пакета запросов LLM: {e}")
+            return None
+        finally:
+            os.remove(batch_file)
+
+        with self._lock:
+            connection = self._connect()
+            connection.executemany(
+                "UPDATE requests SET status = 'submitted', batch_id = ?, attempts = attempts + 1 WHERE custom_id = ?",
+                [(batch.id, custom_id) for custom_id, _, _ in rows]
+            )
+            connection.commit()
+
+        logger.info(f"📦 Отправлен пакет запросов LLM: {len(rows)} (задача {batch.id})")
+        return batch.id
+
+    def _write_batch_file(self, rows: List[tuple]) -> str:
+        """JSONL-файл пакета: одна строка формата Batch API на запрос"""
+        os.makedirs(self.directory, exist_ok=True)
+        batch_file = os.path.join(self.directory, f"batch_{time.time_ns()}.jsonl")
+        with open(batch_file, 'w', encoding='utf-8') as f:
+            for custom_id, body, _ in rows:
+                f.write(json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT,
+                                    "body": json.loads(body)}, ensure_ascii=False) + '\n')
+        return batch_file
+
+    def poll(self) -> int:
+        """
+        Забирает результаты завершенных задач
+
+        Запросы, оставшиеся без результата (задача истекла, отменена или
+        не вернула строку), возвращаются в очередь, пока не исчерпаны
+        llm_batch_max_attempts попытки.
+
+        Returns:
+            int: Количество записанных ответов
+        """
+        if not self._exists():
+            return 0
+        with self._lock:
+            batch_ids = [row[0] for row in self._connect().execute(
+                "SELECT DISTINCT batch_id FROM requests WHERE status = 'submitted'").fetchall()]
+        if not batch_ids:
+            return 0
+
+        client = self._get_client()
+        if client is None:
+            return 0
+
+        written = 0
+        for batch_id in batch_ids:
+            try:
+                batch = client.batches.retrieve(batch_id)
+                if batch.status not in FINISHED_STATUSES:
+                    continue
+
+                lines = []
+                for file_id in (batch.output_file_id, batch.error_file_id):
+                    if file_id:
+                        lines.extend(client.files.content(file_id).text.splitlines())
+                written += self._write_results(batch_id, lines)
+
+            except Exception as e:
+                logger.error(f"Ошибка опроса задачи LLM {batch_id}: {e}")
+
+        return written
+
+    def _write_results(self, batch_id: str, lines: List[str]) -> int:
+        """Записывает ответы задачи и возвращает в очередь запросы без результата"""
+        now = time.time()
+        done, failed = [], []
+        for line in lines:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            custom_id = item.get('custom_id')
+            response = item.get('response') or {}
+            try:
+                if response.get('status_code') != 200:
+                    raise ValueError(item.get('error') or response.get('body'))
+                content = response['body']['choices'][0]['message']['content']
+                done.append((content, now, custom_id, batch_id))
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                failed.append((str(e), now, custom_id, batch_id))
+
+        with self._lock:
+            connection = self._connect()
+            connection.executemany(
+                "UPDATE requests SET status = 'done', response = ?, error = NULL, completed_at = ? "
+                "WHERE custom_id = ? AND batch_id = ?", done)
+            connection.executemany(
+                "UPDATE requests SET status = 'failed', error = ?, completed_at = ? "
+                "WHERE custom_id = ? AND batch_id = ?", failed)
+            connection.execute(
+                "UPDATE requests SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "batch_id = NULL WHERE batch_id = ? AND status = 'submitted'",
+                (self.max_attempts, batch_id))
+            connection.commit()
+
+        logger.info(f"📬 Задача LLM {batch_id}: ответов {len(done)}, ошибок {len(failed)}")
+        return len(done)
+
+    def run_once(self) -> int:
+        """Один шаг фоновой обработки: отправка накопленных запросов и опрос задач"""
+        self.flush()
+        return self.poll()
+
+    def start(self):
+        """Запускает фоновый поток очереди"""
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='llm-batch', daemon=True)
+        self._thread.start()
+        logger.info("📦 Очередь фоновых запросов LLM запущена")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Ошибка очереди фоновых запросов LLM: {e}")
+            self._stop.wait(self.poll_seconds)
+
+    def stop(self):
+        """Останавливает фоновый поток и закрывает базу"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.close()
+
+    def close(self):
+        """Закрывает соединение"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _get_client(self):
+        """Клиент OpenAI создается при первой отправке (llm_batch_base_url - другой адрес API)"""
+        if self._client is None:
+            api_key = os.getenv('OPENAI_API_KEY')
+            if not api_key:
+                logger.warning("⚠️  OPENAI_API_KEY не задан, пакет запросов LLM не отправлен")
+                return None
+            from openai import OpenAI
+            self._client = OpenAI(api_key=api_key, base_url=ANALYSIS_SETTINGS.get('llm_batch_base_url'))
+        return self._client
+
+    def _exists(self) -> bool:
+        """База создается первым запросом в очереди, чтение ее не создает"""
+        return self._connection is not None or os.path.exists(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Соединение открывается при первом обращении и создает схему"""
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(self.SCHEMA)
+            self._connection = connection
+        return self._connection
+
+
+# Глобальный экземпляр
+llm_batch_queue = LLMBatchQueue()
+atexit.register(llm_batch_queue.stop)
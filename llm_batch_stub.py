@@ -0,0 +1,170 @@
+"""
+Локальная заглушка Files / Batches API OpenAI
+
+Поднимает HTTP-сервер на 127.0.0.1 с эндпоинтами, которые использует
+очередь фоновых запросов (загрузка файла, создание и опрос задачи,
+скачивание результата). Клиент OpenAI подключается к ней через
+base_url, поэтому очередь проверяется без сети и без ключа API.
+Ответ на каждый запрос пакета формирует функция responder.
+"""
+
+import json
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+
+def echo_responder(body: Dict) -> str:
+    """Ответ по умолчанию: начало последнего сообщения пользователя"""
+    return f"stub: {body['messages'][-1]['content'][:80]}"
+
+
+class BatchStubServer:
+    """
+    Заглушка Batch API
+
+    Задача завершается при втором опросе (первый возвращает in_progress).
+    Если responder выбрасывает исключение, строка запроса попадает в файл
+    ошибок задачи с кодом 400.
+    """
+
+    def __init__(self, responder: Callable[[Dict], str] = None):
+        self.responder = responder or echo_responder
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> str:
+        """Запускает сервер на свободном порту; возвращает base_url для клиента OpenAI"""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                stub._handle(self, 'GET')
+
+            def do_POST(self):
+                stub._handle(self, 'POST')
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        """Останавливает сервер"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # ------------------------------------------------------------------
+    # Эндпоинты
+    # ------------------------------------------------------------------
+
+    def _handle(self, request: BaseHTTPRequestHandler, method: str):
+        path = request.path.split('?')[0].rstrip('/')
+        length = int(request.headers.get('Content-Length') or 0)
+        payload = request.rfile.read(length) if length else b''
+
+        with self._lock:
+            if method == 'POST' and path == '/v1/files':
+                status, body = 200, self._upload(request.headers.get('Content-Type', ''), payload)
+            elif method == 'POST' and path == '/v1/batches':
+                status, body = 200, self._create_batch(json.loads(payload))
+            elif method == 'GET' and path.startswith('/v1/batches/'):
+                status, body = self._retrieve_batch(path.rsplit('/', 1)[1])
+            elif method == 'GET' and path.startswith('/v1/files/') and path.endswith('/content'):
+                file_id = path.split('/')[3]
+                if file_id in self.files:
+                    self._send(request, 200, self.files[file_id], 'application/octet-stream')
+                    return
+                status, body = 404, {"error": {"message": "file not found"}}
+            else:
+                status, body = 404, {"error": {"message": f"unknown endpoint {method} {path}"}}
+
+        self._send(request, status, json.dumps(body).encode('utf-8'), 'application/json')
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, status: int, data: bytes, content_type: str):
+        request.send_response(status)
+        request.send_header('Content-Type', content_type)
+        request.send_header('Content-Length', str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+
+    def _upload(self, content_type: str, payload: bytes) -> Dict:
+        """Загрузка файла (multipart/form-data, поле file)"""
+        message = BytesParser(policy=default_policy).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode('utf-8') + payload)
+        content, filename = b'', 'batch.jsonl'
+        for part in message.iter_parts():
+            if part.get_param('name', header='content-disposition') == 'file':
+                content = part.get_payload(decode=True)
+                filename = part.get_filename() or filename
+        return self._store_file(content, filename)
+
+    def _store_file(self, content: bytes, filename: str) -> Dict:
+        file_id = f"file-{len(self.files) + 1}"
+        self.files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                "filename": filename, "purpose": "batch", "status": "processed"}
+
+    def _create_batch(self, request: Dict) -> Dict:
+        batch_id = f"batch-{len(self.batches) + 1}"
+        self.batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": request['endpoint'],
+            "input_file_id": request['input_file_id'], "completion_window": request['completion_window'],
+            "status": "validating", "created_at": int(time.time()),
+            "output_file_id": None, "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        return self.batches[batch_id]
+
+    def _retrieve_batch(self, batch_id: str):
+        batch = self.batches.get(batch_id)
+        if batch is None:
+            return 404, {"error": {"message": "batch not found"}}
+        if batch['status'] == 'validating':
+            batch['status'] = 'in_progress'
+        elif batch['status'] == 'in_progress':
+            self._complete(batch)
+        return 200, batch
+
+    def _complete(self, batch: Dict):
+        """Выполняет запросы задачи через responder и сохраняет файлы результатов"""
+        outputs, errors = [], []
+        for line in self.files[batch['input_file_id']].decode('utf-8').splitlines():
+            request = json.loads(line)
+            try:
+                content = self.responder(request['body'])
+                outputs.append({"id": f"response-{request['custom_id']}", "custom_id": request['custom_id'],
+                                "response": {"status_code": 200, "body": {
+                                    "object": "chat.completion", "model": request['body'].get('model'),
+                                    "choices": [{"index": 0, "finish_reason": "stop",
+                                                 "message": {"role": "assistant", "content": content}}]}},
+                                "error": None})
+            except Exception as e:
+                errors.append({"id": f"response-{request['custom_id']}", "custom_id": request['custom_id'],
+                               "response": {"status_code": 400, "body": {"error": {"message": str(e)}}},
+                               "error": None})
+
+        def to_file(items):
+            if not items:
+                return None
+            data = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items).encode('utf-8')
+            return self._store_file(data, 'results.jsonl')['id']
+
+        batch.update(status='completed', output_file_id=to_file(outputs), error_file_id=to_file(errors),
+                     request_counts={"total": len(outputs) + len(errors), "completed": len(outputs),
+                                     "failed": len(errors)})
@@ -0,0 +1,211 @@
+"""
+Постоянный кэш ответов LLM
+
+Ответ модели сохраняется в SQLite по ключу (модель, версия шаблона промпта,
+отпечаток состояния матча). Отпечаток нормализует названия команд и лиги,
+разбирает счет и округляет минуту до корзины, поэтому матч с тем же счетом
+в том же отрезке времени на следующем цикле не анализируется повторно.
+Записи живут llm_cache_ttl_minutes, при превышении llm_cache_max_entries
+удаляются давно не использованные (LRU). Кэш общий для всех анализаторов
+и всех процессов (WAL).
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from config import ANALYSIS_SETTINGS
+from match_timeline import parse_minute, parse_score
+from name_pool import fold_name
+
+logger = logging.getLogger(__name__)
+
+
+def match_fingerprint(match, sport_type: str = None, minute_bucket: int = None) -> tuple:
+    """
+    Нормализованное состояние матча для ключа кэша
+
+    Минута округляется вниз до корзины minute_bucket (по умолчанию
+    llm_cache_minute_bucket); для тенниса и настольного тенниса, где вместо
+    минуты указан сет, используется нормализованный текст.
+    """
+    bucket = minute_bucket or ANALYSIS_SETTINGS.get('llm_cache_minute_bucket', 5)
+    minute_text = getattr(match, 'minute', '') or ''
+    minute = parse_minute(minute_text)
+    minute_key = int(minute // bucket * bucket) if minute is not None else fold_name(minute_text)
+
+    sport = sport_type or getattr(match, 'sport_type', None) or getattr(match, 'sport', '')
+    return (sport, fold_name(match.team1), fold_name(match.team2), parse_score(match.score),
+            minute_key, fold_name(getattr(match, 'league', '')))
+
+
+class LLMResponseCache:
+    """
+    Кэш ответов LLM в SQLite (TTL + LRU)
+
+    - get_or_call: ответ из кэша или вызов модели с сохранением ответа
+    - get / put: чтение и запись по готовому ключу
+    - stats: попадания, промахи, процент попаданий, размер
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            template TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at);
+        CREATE INDEX IF NOT EXISTS idx_responses_created ON responses (created_at);
+    """
+
+    def __init__(self, path: str = None, ttl_minutes: float = None, max_entries: int = None):
+        self.path = path or ANALYSIS_SETTINGS.get('llm_cache_file', 'llm_cache.db')
+        self.ttl_seconds = (ttl_minutes or ANALYSIS_SETTINGS.get('llm_cache_ttl_minutes', 90)) * 60
+        self.max_entries = max_entries or ANALYSIS_SETTINGS.get('llm_cache_max_entries', 20000)
+        self.enabled = ANALYSIS_SETTINGS.get('llm_cache_enabled', True)
+
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._connection = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(model: str, template: str, fingerprint) -> str:
+        """Ключ записи: хэш модели, версии шаблона и отпечатка"""
+        payload = json.dumps([model, template, fingerprint], ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_or_call(self, model: str, template: str, fingerprint, call: Callable[[], str]) -> str:
+        """
+        Ответ модели с кэшированием
+
+        Args:
+            model (str): Модель
+            template (str): Версия шаблона промпта (например, 'enhanced_openai/1')
+            fingerprint: Отпечаток состояния (match_fingerprint или кортеж отпечатков)
+            call (Callable): Вызов модели при промахе
+
+        Returns:
+            str: Ответ модели (пустые ответы не кэшируются)
+        """
+        if not self.enabled:
+            return call()
+
+        key = self.make_key(model, template, fingerprint)
+        cached = self.get(key)
+        if cached is not None:
+            logger.info(f"💾 Ответ LLM из кэша ({template})")
+            return cached
+
+        response = call()
+        if response:
+            self.put(key, response, model, template)
+        return response
+
+    def get(self, key: str) -> Optional[str]:
+        """Ответ по ключу или None (просроченные записи не возвращаются)"""
+        now = time.time()
+        try:
+            with self._lock:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT response FROM responses WHERE key = ? AND created_at >= ?",
+                    (key, now - self.ttl_seconds)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+
+                connection.execute("UPDATE responses SET accessed_at = ?, hits = hits + 1 WHERE key = ?",
+                                   (now, key))
+                connection.commit()
+                self.hits += 1
+                return row[0]
+
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка чтения кэша LLM: {e}")
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: str, model: str = '', template: str = ''):
+        """Сохраняет ответ; периодически удаляет просроченные и лишние записи"""
+        now = time.time()
+        try:
+            with self._lock:
+                connection = self._connect()
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, template, response, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, template, response, now, now)
+                )
+                self._puts += 1
+                if self._puts % 100 == 1:
+                    self._evict(connection, now)
+                connection.commit()
+
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка записи кэша LLM: {e}")
+
+    def _evict(self, connection: sqlite3.Connection, now: float):
+        """TTL, затем LRU по accessed_at сверх max_entries"""
+        connection.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        connection.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def stats(self) -> Dict:
+        """Статистика кэша текущего процесса"""
+        requests = self.hits + self.misses
+        try:
+            with self._lock:
+                size = self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        except sqlite3.Error:
+            size = 0
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests * 100 if requests else 0.0,
+            'size': size,
+        }
+
+    def clear(self):
+        """Удаляет все записи"""
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+
+    def close(self):
+        """Закрывает соединение"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Соединение открывается при первом обращении и создает схему"""
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(self.SCHEMA)
+            self._connection = connection
+            # Лимит записей мог уменьшиться с прошлого запуска
+            self._evict(connection, time.time())
+            connection.commit()
+        return self._connection
+
+
+# Глобальный экземпляр
+llm_cache = LLMResponseCache()
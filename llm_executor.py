@@ -0,0 +1,274 @@
+"""
+Общий исполнитель запросов к LLM
+
+Запросы всех анализаторов проходят через один исполнитель: две корзины
+токенов (запросы в минуту и токены в минуту) ограничивают нагрузку на
+API вместо фиксированной паузы между запросами, а пул потоков позволяет
+анализировать матчи одновременно. Ошибки лимитов и сети повторяются с
+экспоненциальной задержкой со случайным разбросом; если API вернул
+Retry-After, все потоки ждут указанное время.
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config import ANALYSIS_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Коды ответа, после которых запрос имеет смысл повторить
+RETRY_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504)
+
+# Ошибки клиента OpenAI без кода ответа (таймаут, соединение)
+RETRY_ERROR_NAMES = ('APITimeoutError', 'APIConnectionError', 'Timeout', 'ConnectionError')
+
+
+def estimate_tokens(*texts: str, max_tokens: int = 0) -> int:
+    """Оценка токенов запроса: ~3 символа на токен (русский текст) плюс лимит ответа"""
+    return sum(len(text or '') for text in texts) // 3 + max_tokens
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Пауза из заголовков Retry-After / retry-after-ms ответа API или None"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        value = headers.get('retry-after-ms')
+        if value is not None:
+            return float(value) / 1000
+        value = headers.get('retry-after')
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Лимиты, ошибки сервера и сети повторяются; ошибки запроса (400, 401...) - нет"""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in RETRY_STATUS_CODES
+    return type(error).__name__ in RETRY_ERROR_NAMES or isinstance(error, (TimeoutError, ConnectionError))
+
+
+class TokenBucket:
+    """
+    Корзина токенов
+
+    Вмещает capacity единиц (по умолчанию - минутный лимит) и пополняется
+    со скоростью rate_per_minute. acquire ждет, пока в корзине не наберется
+    нужное количество; adjust списывает или возвращает разницу между
+    оценкой и фактическим расходом (корзина может уйти в минус).
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """
+        Берет amount единиц, если они есть
+
+        Returns:
+            float: 0 - единицы взяты, иначе секунды до их появления
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount: float = 1) -> float:
+        """Ждет и берет amount единиц; возвращает время ожидания в секундах"""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(amount)
+            if not wait:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def adjust(self, delta: float):
+        """Списывает (delta > 0) или возвращает (delta < 0) единицы"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class LLMExecutor:
+    """
+    Исполнитель запросов к LLM с лимитами и повторами
+
+    - call: запрос в текущем потоке (лимиты, Retry-After, повторы)
+    - submit: запрос в пуле потоков (Future)
+    - map: функция анализа для каждого матча параллельно
+    - stats: запросы, повторы, время ожидания лимитов
+    """
+
+    def __init__(self, max_workers: int = None, requests_per_minute: float = None,
+                 tokens_per_minute: float = None, max_retries: int = None,
+                 backoff_base: float = None, backoff_max: float = None):
+        self.max_workers = max_workers or ANALYSIS_SETTINGS.get('llm_max_workers', 12)
+        self.max_retries = max_retries if max_retries is not None else ANALYSIS_SETTINGS.get('llm_max_retries', 3)
+        self.backoff_base = backoff_base or ANALYSIS_SETTINGS.get('llm_backoff_base_seconds', 1.0)
+        self.backoff_max = backoff_max or ANALYSIS_SETTINGS.get('llm_backoff_max_seconds', 30.0)
+
+        self.requests = TokenBucket(requests_per_minute or ANALYSIS_SETTINGS.get('llm_requests_per_minute', 60))
+        self.tokens = TokenBucket(tokens_per_minute or ANALYSIS_SETTINGS.get('llm_tokens_per_minute', 100000))
+
+        self.calls = 0
+        self.retries = 0
+        self.waited_seconds = 0.0
+        self._blocked_until = 0.0
+        self._pool = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def call(self, request: Callable[[], Any], tokens: int = 0) -> Any:
+        """
+        Выполняет запрос в текущем потоке
+
+        Args:
+            request (Callable): Запрос к API (например, lambda: client.chat.completions.create(...))
+            tokens (int): Оценка токенов запроса (estimate_tokens); если ответ
+                содержит usage.total_tokens, корзина токенов уточняется по факту
+
+        Returns:
+            Any: Результат request()
+        """
+        for attempt in range(self.max_retries + 1):
+            self._wait_turn(tokens)
+            try:
+                result = request()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                self._backoff(e, attempt)
+                continue
+
+            with self._lock:
+                self.calls += 1
+            used = getattr(getattr(result, 'usage', None), 'total_tokens', None)
+            if tokens and isinstance(used, int):
+                self.tokens.adjust(used - tokens)
+            return result
+
+    def _wait_turn(self, tokens: int):
+        """Ждет окончания Retry-After и места в корзинах запросов и токенов"""
+        waited = 0.0
+        pause = self._blocked_until - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+            waited += pause
+        waited += self.requests.acquire(1)
+        if tokens:
+            waited += self.tokens.acquire(tokens)
+        if waited:
+            with self._lock:
+                self.waited_seconds += waited
+
+    def _backoff(self, error: Exception, attempt: int):
+        """Пауза перед повтором: Retry-After для всех потоков или экспонента с разбросом"""
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, self.backoff_base)
+            with self._lock:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        else:
+            delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+            delay = random.uniform(delay / 2, delay)
+
+        with self._lock:
+            self.retries += 1
+        logger.warning(f"⚠️  Запрос LLM не удался (попытка {attempt + 1}/{self.max_retries + 1}), "
+                       f"повтор через {delay:.1f}с: {error}")
+        time.sleep(delay)
+
+    def submit(self, request: Callable[[], Any], tokens: int = 0) -> Future:
+        """Запрос в пуле потоков исполнителя"""
+        return self._executor().submit(self._run_in_worker, self.call, request, tokens)
+
+    def map(self, function: Callable[[Any], Any], items: Iterable) -> List[Any]:
+        """
+        Вызывает function для каждого элемента параллельно
+
+        Внутри потока исполнителя (вложенный вызов) элементы обрабатываются
+        последовательно, чтобы не занять весь пул ожиданием.
+
+        Returns:
+            List: Результаты в порядке элементов (None для завершившихся ошибкой)
+        """
+        items = list(items)
+        if len(items) <= 1 or getattr(self._local, 'worker', False):
+            return [self._safe(function, item) for item in items]
+
+        pool = self._executor()
+        futures = [pool.submit(self._run_in_worker, self._safe, function, item) for item in items]
+        return [future.result() for future in futures]
+
+    def _run_in_worker(self, function: Callable, *args):
+        self._local.worker = True
+        try:
+            return function(*args)
+        finally:
+            self._local.worker = False
+
+    @staticmethod
+    def _safe(function: Callable, item):
+        try:
+            return function(item)
+        except Exception as e:
+            logger.error(f"Ошибка задачи LLM: {e}")
+            return None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        """Пул потоков создается при первом обращении"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='llm')
+            return self._pool
+
+    def stats(self) -> Dict:
+        """Статистика исполнителя текущего процесса"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'retries': self.retries,
+                'waited_seconds': self.waited_seconds,
+            }
+
+    def shutdown(self):
+        """Останавливает пул потоков"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+# Глобальный экземпляр
+llm_executor = LLMExecutor()
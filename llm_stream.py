@@ -0,0 +1,206 @@
+"""
+Потоковые ответы LLM с досрочным прерыванием
+
+Ответ модели читается по частям, а инкрементальный парсер JSON извлекает
+решающие поля верхнего уровня (is_favorite, recommendation, confidence...)
+по мере их генерации. Как только они означают отказ от ставки, поток
+закрывается: модель не дописывает обоснование, которое все равно будет
+отброшено. Вместо неполного текста возвращается компактный JSON из
+полученных полей, поэтому обработчики ответов принимают то же решение,
+что и по полному ответу.
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import ANALYSIS_SETTINGS
+from llm_executor import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalJSONFields:
+    """
+    Инкрементальный парсер полей верхнего уровня JSON-объекта
+
+    feed принимает очередной фрагмент ответа и возвращает поля из fields,
+    значения которых завершились в этом фрагменте (строки - после
+    закрывающей кавычки, числа и true/false - после разделителя).
+    Вложенные объекты и текст вокруг JSON (```json) пропускаются.
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = set(fields)
+        self.values: Dict[str, Any] = {}
+
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._chars = []
+        self._key = None
+        self._after_colon = False
+        self._scalar = None
+
+    def feed(self, text: str) -> Dict[str, Any]:
+        """Разбирает фрагмент ответа; возвращает завершившиеся в нем поля"""
+        found = {}
+        for char in text:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._end_string(found)
+                    continue
+                if self._depth == 1:
+                    self._chars.append(char)
+                continue
+
+            if self._scalar is not None:
+                if char not in ',}] \t\r\n':
+                    self._scalar.append(char)
+                    continue
+                self._end_value(found, ''.join(self._scalar))
+
+            if char == '"':
+                self._in_string = True
+                self._chars = []
+            elif char in '{[':
+                if self._depth == 1:
+                    # Вложенное значение не разбирается
+                    self._key, self._after_colon = None, False
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+            elif self._depth == 1:
+                if char == ':':
+                    self._after_colon = self._key is not None
+                elif char == ',':
+                    self._key, self._after_colon = None, False
+                elif self._after_colon and not char.isspace():
+                    self._scalar = [char]
+        return found
+
+    def _end_string(self, found: Dict[str, Any]):
+        raw = ''.join(self._chars)
+        if self._after_colon:
+            self._end_value(found, '"' + raw + '"')
+        else:
+            self._key = json.loads('"' + raw + '"')
+
+    def _end_value(self, found: Dict[str, Any], token: str):
+        key, self._key, self._after_colon, self._scalar = self._key, None, False, None
+        if key not in self.fields:
+            return
+        try:
+            value = json.loads(token)
+        except ValueError:
+            return
+        self.values[key] = found[key] = value
+
+
+class RejectionRule:
+    """
+    Условия отказа от ставки по решающим полям ответа
+
+    Args:
+        required_true: Поля, ложное значение которых означает отказ (is_favorite)
+        rejected_values: Значения полей, означающие отказ ({'recommendation': 'НЕТ'})
+        min_confidence: Минимальная уверенность (поле confidence)
+    """
+
+    def __init__(self, required_true: Iterable[str] = (), rejected_values: Dict[str, Any] = None,
+                 min_confidence: float = None, confidence_field: str = 'confidence'):
+        self.required_true = tuple(required_true)
+        self.rejected_values = rejected_values or {}
+        self.min_confidence = min_confidence
+        self.confidence_field = confidence_field
+
+    @property
+    def fields(self) -> tuple:
+        return self.required_true + tuple(self.rejected_values) + (self.confidence_field,)
+
+    def check(self, values: Dict[str, Any]) -> Optional[str]:
+        """Причина отказа по уже полученным полям или None"""
+        for name in self.required_true:
+            if name in values and not values[name]:
+                return f"{name}={values[name]}"
+        for name, rejected in self.rejected_values.items():
+            if name in values and values[name] == rejected:
+                return f"{name}={rejected}"
+        confidence = values.get(self.confidence_field)
+        if (self.min_confidence is not None and isinstance(confidence, (int, float))
+                and not isinstance(confidence, bool) and confidence < self.min_confidence):
+            return f"{self.confidence_field}={confidence}"
+        return None
+
+
+@dataclass
+class ChatCompletionResult:
+    """Текст ответа модели (при досрочном прерывании - JSON полученных полей)"""
+    text: str
+    aborted: bool = False
+    values: Dict[str, Any] = field(default_factory=dict)
+    usage: Any = None  # usage ответа или его оценка (для уточнения корзины токенов llm_executor)
+
+
+def approximate_usage(messages: List[Dict], text: str) -> SimpleNamespace:
+    """
+    Оценка usage прерванного ответа: промпт плюс фактически полученные символы
+
+    API не присылает usage, если поток закрыт досрочно. Без этой оценки
+    llm_executor оставил бы в корзине токенов весь max_tokens запроса.
+    """
+    prompt_tokens = estimate_tokens(*(message.get('content') for message in messages or []))
+    completion_tokens = estimate_tokens(text)
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                           total_tokens=prompt_tokens + completion_tokens)
+
+
+def complete_chat(client, rule: RejectionRule = None, **request) -> ChatCompletionResult:
+    """
+    Запрос chat.completions с досрочным прерыванием по rule
+
+    Без rule или при выключенной настройке llm_streaming_enabled выполняется
+    обычный запрос без потока.
+    """
+    if rule is None or not ANALYSIS_SETTINGS.get('llm_streaming_enabled', True):
+        response = client.chat.completions.create(**request)
+        return ChatCompletionResult(response.choices[0].message.content, usage=getattr(response, 'usage', None))
+
+    parser = IncrementalJSONFields(rule.fields)
+    parts = []
+    usage = None
+    stream = client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **request)
+    try:
+        for chunk in stream:
+            usage = getattr(chunk, 'usage', None) or usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+
+            if parser.feed(delta):
+                reason = rule.check(parser.values)
+                if reason:
+                    text = ''.join(parts)
+                    logger.info(f"✂️  Ответ LLM прерван досрочно ({reason}), получено {len(text)} символов")
+                    return ChatCompletionResult(json.dumps(parser.values, ensure_ascii=False), aborted=True,
+                                                values=dict(parser.values),
+                                                usage=approximate_usage(request.get('messages'), text))
+    finally:
+        close = getattr(stream, 'close', None)
+        if close:
+            close()
+
+    text = ''.join(parts)
+    return ChatCompletionResult(text, values=dict(parser.values),
+                                usage=usage or approximate_usage(request.get('messages'), text))
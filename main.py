@@ -136,6 +136,9 @@ class LiveBettingAnalyzer:
             # Завершаем таймаут-менеджер
             self.timeout_manager.finish_analysis()
             system_watchdog.heartbeat()
+            
+            # Сохраняем таблицу нормализованных названий для следующих циклов
+            self.fuzzy_matcher.aliases.save()
     
     def _safe_analyze(self, analyze_func, sport_name):
         """Безопасное выполнение анализа с обработкой ошибок"""
@@ -0,0 +1,183 @@
+"""
+Единая компактная запись live-матча для всех контроллеров
+
+MatchRecord хранит поля в __slots__ (без __dict__ на каждый экземпляр),
+вид спорта и источник берутся из общей таблицы строк, а названия команд
+и лиги - из пула названий (name_pool), поэтому десятки тысяч снимков
+матчей занимают немного памяти. Контроллеры используют этот класс как
+MatchData, и запись одного контроллера передается другому без копирования.
+"""
+
+from typing import Any, Dict, Optional
+
+from name_pool import name_pool
+
+# Поля записи в порядке позиционных аргументов контроллеров-парсеров
+MATCH_FIELDS = (
+    'team1', 'team2', 'score', 'minute', 'coefficient', 'is_locked', 'sport_type',
+    'league', 'url', 'status', 'source', 'probability', 'recommendation_type',
+    'recommendation_value', 'justification', 'odds'
+)
+
+
+class StringTable:
+    """Таблица повторяющихся строк: одинаковые значения хранятся одним объектом"""
+
+    def __init__(self):
+        self._strings: Dict[str, str] = {}
+
+    def intern(self, value):
+        """Общий экземпляр строки (не строки возвращаются как есть)"""
+        if value.__class__ is not str:
+            return value
+        return self._strings.setdefault(value, value)
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __contains__(self, value):
+        return value in self._strings
+
+
+# Глобальный экземпляр
+match_strings = StringTable()
+
+
+class MatchRecord:
+    """
+    Запись о live-матче (замена dataclass MatchData контроллеров)
+
+    Позиционные аргументы совпадают с прежним MatchData парсеров
+    (team1, team2, score, minute, coefficient, is_locked, sport_type, league,
+    url, status). Имена sport и link из MultiSourceController - синонимы
+    sport_type и url. odds не создается, пока коэффициенты не заданы.
+    """
+
+    __slots__ = (
+        'team1', 'team2', 'score', 'minute', 'coefficient', 'is_locked', '_sport_type',
+        '_league', 'url', 'status', '_source', 'probability', 'recommendation_type',
+        'recommendation_value', 'justification', 'odds'
+    )
+
+    def __init__(self, team1: str, team2: str, score: str, minute: str = "", coefficient: float = 0.0,
+                 is_locked: bool = False, sport_type: str = "", league: str = "", url: str = "",
+                 status: str = "", source: str = "", probability: float = 0.0, recommendation_type: str = "",
+                 recommendation_value: str = "", justification: str = "", odds: Optional[dict] = None,
+                 sport: str = None, link: str = None):
+        intern = match_strings.intern
+        self.team1 = name_pool.string(team1)
+        self.team2 = name_pool.string(team2)
+        self.score = score
+        self.minute = minute
+        self.coefficient = coefficient
+        self.is_locked = is_locked
+        self._sport_type = intern(sport if sport is not None and not sport_type else sport_type)
+        self._league = name_pool.string(league)
+        self.url = link if link is not None and not url else url
+        self.status = status
+        self._source = intern(source)
+        self.probability = probability
+        self.recommendation_type = recommendation_type
+        self.recommendation_value = recommendation_value
+        self.justification = justification
+        self.odds = odds
+
+    # Поля из таблицы строк и пула (присваивание после создания тоже интернируется)
+
+    @property
+    def sport_type(self) -> str:
+        return self._sport_type
+
+    @sport_type.setter
+    def sport_type(self, value: str):
+        self._sport_type = match_strings.intern(value)
+
+    @property
+    def league(self) -> str:
+        return self._league
+
+    @league.setter
+    def league(self, value: str):
+        self._league = name_pool.string(value)
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    @source.setter
+    def source(self, value: str):
+        self._source = match_strings.intern(value)
+
+    # Синонимы полей MatchData из MultiSourceController
+
+    sport = sport_type
+
+    @property
+    def link(self) -> str:
+        return self.url
+
+    @link.setter
+    def link(self, value: str):
+        self.url = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Поля записи словарем (вместо dataclasses.asdict)"""
+        return {name: getattr(self, name) for name in MATCH_FIELDS}
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, name) for name in MATCH_FIELDS)
+
+    def __eq__(self, other):
+        if not isinstance(other, MatchRecord):
+            return NotImplemented
+        return self._values() == other._values()
+
+    # Изменяемая запись, как dataclass с eq=True
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in MATCH_FIELDS)
+        return f"{self.__class__.__name__}({fields})"
+
+
+class MultiSourceMatch(MatchRecord):
+    """MatchRecord с позиционными аргументами прежнего MatchData MultiSourceController"""
+
+    __slots__ = ()
+
+    def __init__(self, sport: str, team1: str, team2: str, score: str, minute: str = "", league: str = "",
+                 odds: Optional[dict] = None, link: str = "", probability: float = 0.0,
+                 recommendation_type: str = "", recommendation_value: str = "", justification: str = "",
+                 source: str = "", **fields):
+        super().__init__(team1, team2, score, minute=minute, league=league, odds=odds, link=link,
+                         probability=probability, recommendation_type=recommendation_type,
+                         recommendation_value=recommendation_value, justification=justification,
+                         source=source, sport=sport, **fields)
+
+
+def as_match_record(match) -> Optional[MatchRecord]:
+    """
+    Приводит матч любого прежнего вида к MatchRecord
+
+    Args:
+        match: MatchRecord (возвращается как есть, без копирования),
+            словарь или объект со старыми полями (sport/link вместо sport_type/url)
+
+    Returns:
+        Optional[MatchRecord]: Запись матча или None
+    """
+    if match is None or isinstance(match, MatchRecord):
+        return match
+
+    if isinstance(match, dict):
+        get = match.get
+    else:
+        def get(name, default=None):
+            return getattr(match, name, default)
+
+    fields = {name: value for name in MATCH_FIELDS if (value := get(name)) is not None}
+    fields.setdefault('sport_type', get('sport') or "")
+    fields.setdefault('url', get('link') or "")
+    for name in ('team1', 'team2', 'score'):
+        fields.setdefault(name, "")
+    return MatchRecord(**fields)
@@ -0,0 +1,311 @@
+"""
+Временной ряд состояний live-матчей между циклами анализа
+
+Каждое наблюдение парсера (счет, минута, коэффициент) добавляется в
+кольцевой буфер матча фиксированной длины, поэтому память на матч
+ограничена, а матчи, которые давно не появлялись в выдаче, удаляются.
+Признаки темпа и моментума обновляются инкрементально по разнице
+с предыдущим наблюдением. Все наблюдения цикла дописываются одной
+записью в компактный журнал (JSON-массив на строку), из которого буферы
+восстанавливаются после перезапуска.
+"""
+
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+from config import ANALYSIS_SETTINGS
+from name_pool import name_pool
+
+logger = logging.getLogger(__name__)
+
+_MINUTE_PATTERN = re.compile(r"(\d+)\s*(?:\+\s*(\d+))?\s*(?:['′’]|мин)")
+_SCORE_PATTERN = re.compile(r'(\d+)\s*[:\-]\s*(\d+)')
+
+# Наблюдение: (время Unix, голы хозяев, голы гостей, минута или None, коэффициент или None)
+TIME, HOME, AWAY, MINUTE, COEFFICIENT = range(5)
+
+
+def parse_minute(text: str) -> Optional[float]:
+    """Минута матча: "67'" -> 67, "45+2'" -> 47, "67" -> 67"""
+    text = (text or '').strip()
+    match = _MINUTE_PATTERN.search(text)
+    if match:
+        return float(int(match.group(1)) + int(match.group(2) or 0))
+    if text.isdigit():
+        return float(text)
+    return None
+
+
+def parse_score(text: str) -> tuple:
+    """Счет "2:1" -> (2, 1), без счета -> (-1, -1)"""
+    match = _SCORE_PATTERN.search(text or '')
+    return (int(match.group(1)), int(match.group(2))) if match else (-1, -1)
+
+
+class MatchSeries:
+    """Кольцевой буфер наблюдений одного матча и инкрементальные счетчики"""
+
+    __slots__ = ('points', 'goals', 'observations', 'first_seen', 'last_seen',
+                 'home_scored', 'away_scored', 'last_goal_time')
+
+    def __init__(self, max_points: int):
+        self.points = deque(maxlen=max_points)
+        self.goals = deque(maxlen=max_points)  # (время, голы хозяев, голы гостей) изменений счета
+        self.observations = 0
+        self.first_seen = None
+        self.last_seen = None
+        self.home_scored = 0  # Голы за время наблюдения
+        self.away_scored = 0
+        self.last_goal_time = None
+
+    def add(self, point: tuple):
+        """Добавляет наблюдение и обновляет счетчики по разнице с предыдущим"""
+        if self.points:
+            previous = self.points[-1]
+            if point[HOME] >= 0 and previous[HOME] >= 0:
+                home_delta = point[HOME] - previous[HOME]
+                away_delta = point[AWAY] - previous[AWAY]
+                # Уменьшение счета - исправление на сайте, а не гол
+                if home_delta >= 0 and away_delta >= 0 and (home_delta or away_delta):
+                    self.goals.append((point[TIME], home_delta, away_delta))
+                    self.home_scored += home_delta
+                    self.away_scored += away_delta
+                    self.last_goal_time = point[TIME]
+        else:
+            self.first_seen = point[TIME]
+
+        self.points.append(point)
+        self.observations += 1
+        self.last_seen = point[TIME]
+
+
+class MatchTimeline:
+    """
+    Хранилище временных рядов live-матчей
+
+    - record_many: наблюдения одного цикла (одна запись в журнал)
+    - history: буфер наблюдений матча
+    - features: темп, моментум и движение коэффициента
+    - restore: восстановление буферов из журнала после перезапуска
+    """
+
+    def __init__(self, log_file: str = None, max_points: int = None, idle_minutes: int = None,
+                 max_matches: int = None, max_log_mb: float = None):
+        self.log_file = log_file if log_file is not None else ANALYSIS_SETTINGS.get(
+            'match_timeline_file', 'match_timeline.jsonl')
+        self.max_points = max_points or ANALYSIS_SETTINGS.get('match_timeline_points', 120)
+        self.idle_seconds = (idle_minutes or ANALYSIS_SETTINGS.get('match_timeline_idle_minutes', 180)) * 60
+        self.max_matches = max_matches or ANALYSIS_SETTINGS.get('match_timeline_max_matches', 5000)
+        self.max_log_bytes = (max_log_mb or ANALYSIS_SETTINGS.get('match_timeline_max_log_mb', 50)) * 1024 * 1024
+        self.momentum_minutes = ANALYSIS_SETTINGS.get('match_timeline_momentum_minutes', 15)
+
+        self._series: Dict[tuple, MatchSeries] = {}
+        self._lock = threading.Lock()
+        self._fd = None
+
+    def __len__(self):
+        return len(self._series)
+
+    @staticmethod
+    def match_key(match) -> tuple:
+        """Ключ матча: вид спорта и ключи команд из пула названий"""
+        sport = getattr(match, 'sport_type', None) or getattr(match, 'sport', '')
+        return sport, name_pool.key(match.team1), name_pool.key(match.team2)
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+
+    def record(self, match, observed_at: float = None):
+        """Одно наблюдение матча"""
+        self.record_many([match], observed_at)
+
+    def record_many(self, matches: Iterable, observed_at: float = None) -> int:
+        """
+        Наблюдения одного цикла парсинга
+
+        Args:
+            matches (Iterable): Матчи (MatchRecord или объекты с теми же полями)
+            observed_at (float): Время наблюдения Unix (по умолчанию - сейчас)
+
+        Returns:
+            int: Количество записанных наблюдений
+        """
+        observed_at = observed_at or time.time()
+        lines = []
+        recorded = 0
+        try:
+            with self._lock:
+                for match in matches:
+                    home, away = parse_score(match.score)
+                    minute = parse_minute(match.minute)
+                    coefficient = getattr(match, 'coefficient', 0.0) or None
+                    point = (observed_at, home, away, minute, coefficient)
+                    self._add(self.match_key(match), point)
+                    recorded += 1
+
+                    if self.log_file:
+                        sport = getattr(match, 'sport_type', None) or getattr(match, 'sport', '')
+                        lines.append(json.dumps([round(observed_at, 1), sport, match.team1, match.team2,
+                                                 home, away, minute, coefficient],
+                                                ensure_ascii=False, separators=(',', ':')))
+
+                self._evict(observed_at)
+                if lines:
+                    self._write_lines(lines)
+            return recorded
+
+        except Exception as e:
+            logger.error(f"Ошибка записи временного ряда матчей: {e}")
+            return 0
+
+    def _add(self, key: tuple, point: tuple):
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = MatchSeries(self.max_points)
+        series.add(point)
+
+    def _evict(self, now: float):
+        """Удаляет матчи, которых давно нет в выдаче, и лишние (самые старые)"""
+        expired = [key for key, series in self._series.items() if now - series.last_seen > self.idle_seconds]
+        for key in expired:
+            del self._series[key]
+
+        overflow = len(self._series) - self.max_matches
+        if overflow > 0:
+            oldest = sorted(self._series, key=lambda key: self._series[key].last_seen)[:overflow]
+            for key in oldest:
+                del self._series[key]
+
+    def _write_lines(self, lines: List[str]):
+        """Дописывает наблюдения цикла одним write (с ротацией журнала по размеру)"""
+        if self._fd is None:
+            self._fd = os.open(self.log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+        if os.fstat(self._fd).st_size >= self.max_log_bytes:
+            os.close(self._fd)
+            os.replace(self.log_file, self.log_file + '.1')
+            self._fd = os.open(self.log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+        os.write(self._fd, ('\n'.join(lines) + '\n').encode('utf-8'))
+
+    def close(self):
+        """Закрывает журнал"""
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def restore(self) -> int:
+        """
+        Восстанавливает буферы из журнала (только матчи, наблюдавшиеся недавно)
+
+        Returns:
+            int: Количество восстановленных наблюдений
+        """
+        if not self.log_file or not os.path.exists(self.log_file):
+            return 0
+
+        since = time.time() - self.idle_seconds
+        restored = 0
+        try:
+            with self._lock, open(self.log_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        observed_at, sport, team1, team2, home, away, minute, coefficient = json.loads(line)
+                    except (ValueError, TypeError):
+                        continue
+                    if observed_at < since:
+                        continue
+                    key = (sport, name_pool.key(team1), name_pool.key(team2))
+                    self._add(key, (observed_at, home, away, minute, coefficient))
+                    restored += 1
+                self._evict(time.time())
+
+            if restored:
+                logger.info(f"🕒 Восстановлено наблюдений матчей: {restored} ({len(self._series)} матчей)")
+            return restored
+
+        except Exception as e:
+            logger.error(f"Ошибка восстановления временного ряда матчей: {e}")
+            return 0
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+
+    def history(self, match) -> List[tuple]:
+        """Наблюдения матча из буфера (старые -> новые)"""
+        series = self._series.get(self.match_key(match))
+        return list(series.points) if series else []
+
+    def features(self, match) -> Dict:
+        """
+        Признаки темпа и моментума матча
+
+        Returns:
+            Dict: observations, observed_minutes, tempo (голов в минуту матча),
+            observed_tempo (голов в минуту наблюдения), momentum (голы хозяев
+            минус голы гостей за последние match_timeline_momentum_minutes),
+            minutes_since_goal, odds_drift; пустой словарь, если матч не наблюдался
+        """
+        with self._lock:
+            series = self._series.get(self.match_key(match))
+            if series is None:
+                return {}
+            first, last = series.points[0], series.points[-1]
+            goals = list(series.goals)
+            observations, scored, last_goal_time = (
+                series.observations, series.home_scored + series.away_scored, series.last_goal_time)
+
+        observed_minutes = (last[TIME] - series.first_seen) / 60
+        window_start = last[TIME] - self.momentum_minutes * 60
+        momentum = sum(home - away for goal_time, home, away in goals if goal_time >= window_start)
+
+        tempo = None
+        if last[MINUTE] and last[HOME] >= 0:
+            tempo = (last[HOME] + last[AWAY]) / last[MINUTE]
+
+        odds_drift = None
+        if first[COEFFICIENT] and last[COEFFICIENT]:
+            odds_drift = last[COEFFICIENT] - first[COEFFICIENT]
+
+        return {
+            'observations': observations,
+            'observed_minutes': observed_minutes,
+            'tempo': tempo,
+            'observed_tempo': scored / observed_minutes if observed_minutes else None,
+            'momentum': momentum,
+            'minutes_since_goal': (last[TIME] - last_goal_time) / 60 if last_goal_time else None,
+            'odds_drift': odds_drift,
+        }
+
+    def describe(self, match) -> str:
+        """Краткая динамика матча для промпта ("" - если наблюдений меньше двух)"""
+        features = self.features(match)
+        if features.get('observations', 0) < 2:
+            return ""
+
+        parts = [f"наблюдений {features['observations']} за {features['observed_minutes']:.0f} мин"]
+        if features['tempo'] is not None:
+            parts.append(f"темп {features['tempo']:.3f} очка счета в минуту")
+        if features['momentum']:
+            side = "хозяева" if features['momentum'] > 0 else "гости"
+            parts.append(f"моментум: {side} ({features['momentum']:+d})")
+        if features['minutes_since_goal'] is not None:
+            parts.append(f"последний гол {features['minutes_since_goal']:.0f} мин назад")
+        if features['odds_drift']:
+            parts.append(f"коэффициент {features['odds_drift']:+.2f}")
+        return ", ".join(parts)
+
+
+# Глобальный экземпляр
+match_timeline = MatchTimeline()
+atexit.register(match_timeline.close)
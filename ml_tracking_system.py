@@ -4,13 +4,19 @@
 Отслеживает результаты прогнозов для улучшения алгоритмов
 """
 
+import atexit
 import json
 import logging
-import os
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from dataclasses import dataclass, asdict
 from moscow_time import get_moscow_time, format_moscow_time_for_telegram
+from prediction_store import create_prediction_store
+from daily_stats_aggregator import DailyStatsAggregator
+from performance_metrics import PerformanceMetrics
+from config import ANALYSIS_SETTINGS
+from llm_batch_queue import llm_batch_queue
+from match_record import MatchRecord
 
 logger = logging.getLogger(__name__)
 
@@ -41,7 +47,14 @@ class MLTrackingSystem:
     
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.ml_log_file = "ml_predictions_log.json"
+        self.store = create_prediction_store()
+        self.ml_log_file = self.store.path
+        # Инкрементальная дневная статистика: агрегатор и позиция чтения хранилища
+        self._daily_aggregator = None
+        self._daily_position = None
+        # Скользящие метрики (7/30 дней, все время), без снимка пересчитываются по истории
+        self.metrics = PerformanceMetrics(loader=self._load_ml_log)
+        self._matcher = None
         self.daily_stats_file = "daily_stats.json"
         
     def log_prediction(self, recommendation, sport_type: str):
@@ -66,7 +79,9 @@ class MLTrackingSystem:
             )
             
             # Сохраняем в файл
+            self.metrics.prepare()
             self._append_to_ml_log(prediction)
+            self.metrics.record(asdict(prediction))
             
             self.logger.info(f"📊 ML лог: Записан прогноз {prediction.team1} vs {prediction.team2} - {prediction.recommendation}")
             
@@ -76,31 +91,86 @@ class MLTrackingSystem:
     def update_prediction_result(self, team1: str, team2: str, timestamp: str, result: str, final_score: str = "", notes: str = ""):
         """Обновляет результат прогноза"""
         try:
-            # Загружаем существующие логи
-            predictions = self._load_ml_log()
+            # Ищем соответствующий прогноз (по дате)
+            prediction = self.store.find_prediction(team1, team2, timestamp[:10])
+            if not prediction:
+                return
             
-            # Ищем соответствующий прогноз
-            for prediction in predictions:
-                if (prediction['team1'] == team1 and 
-                    prediction['team2'] == team2 and 
-                    prediction['timestamp'].startswith(timestamp[:10])):  # По дате
-                    
-                    prediction['actual_result'] = result
-                    prediction['final_score'] = final_score
-                    prediction['notes'] = notes
-                    
-                    self.logger.info(f"📊 ML лог: Обновлен результат {team1} vs {team2} - {result}")
-                    break
-            
-            # Сохраняем обновленные логи
-            self._save_ml_log(predictions)
+            self.settle_predictions([(prediction, result, final_score, notes)])
+            self.logger.info(f"📊 ML лог: Обновлен результат {team1} vs {team2} - {result}")
             
         except Exception as e:
             self.logger.error(f"Ошибка обновления результата: {e}")
     
-    def add_manual_result(self, team1: str, team2: str, recommendation: str, result: str, notes: str = ""):
+    def settle_predictions(self, settlements: List[Tuple[Dict, str, str, str]]) -> int:
+        """
+        Записывает результаты нескольких прогнозов одним пакетом
+        
+        Args:
+            settlements (List[Tuple]): (прогноз, результат, итоговый счет, заметки)
+            
+        Returns:
+            int: Количество обновленных прогнозов
+        """
+        if not settlements:
+            return 0
+        
+        updates = {
+            prediction['timestamp']: {'actual_result': result, 'final_score': final_score, 'notes': notes}
+            for prediction, result, final_score, notes in settlements
+        }
+        self.metrics.prepare()
+        updated = self.store.update_many(updates)
+        
+        for prediction, *_ in settlements:
+            self.metrics.record({**prediction, **updates[prediction['timestamp']]}, previous=prediction)
+        
+        return updated
+    
+    def find_pending_prediction(self, team1: str, team2: str, recommendation: str = None,
+                                sport_type: str = None) -> Optional[Dict]:
+        """
+        Последний прогноз без результата на матч (точное или нечеткое совпадение команд)
+        
+        Если заданы recommendation и sport_type, рассматриваются только прогнозы
+        с той же рекомендацией и видом спорта: на один матч может быть несколько
+        ставок (например, П1 в handball и ТБ в handball_totals).
+        """
+        since = get_moscow_time() - timedelta(hours=ANALYSIS_SETTINGS.get('settlement_lookback_hours', 48))
+        pending = self.store.pending_predictions(since.strftime("%Y-%m-%d"))
+        if recommendation:
+            wanted = recommendation.strip().upper()
+            pending = [p for p in pending if (p.get('recommendation') or '').strip().upper() == wanted]
+        if sport_type:
+            pending = [p for p in pending if p.get('sport_type') == sport_type]
+        
+        exact = [p for p in pending if p['team1'] == team1 and p['team2'] == team2]
+        if exact:
+            return exact[-1]
+        
+        if self._matcher is None:
+            # Импорт по требованию: add_result.py не загружает нечеткое сопоставление без надобности
+            from fuzzy_matcher import FuzzyMatcher
+            self._matcher = FuzzyMatcher()
+        pairs = self._matcher.pair_events([{'team1': team1, 'team2': team2}], pending)
+        if not pairs:
+            return None
+        # Самый свежий из прогнозов на найденный матч (повторные прогнозы следующих циклов)
+        found = pairs[0][1]
+        return [p for p in pending if p['team1'] == found['team1'] and p['team2'] == found['team2']][-1]
+    
+    def add_manual_result(self, team1: str, team2: str, recommendation: str, result: str, notes: str = "",
+                          sport_type: str = None):
         """Добавляет результат вручную (как сейчас от пользователя)"""
         try:
+            # Сначала закрываем исходный прогноз, чтобы не плодить дубликаты в истории
+            prediction = self.find_pending_prediction(team1, team2, recommendation, sport_type)
+            if prediction:
+                self.settle_predictions([(prediction, result, prediction.get('final_score', ''), notes)])
+                self.logger.info(f"📊 ML лог: Закрыт прогноз {prediction['team1']} vs {prediction['team2']} "
+                                 f"({prediction['recommendation']}) - {result}")
+                return
+            
             moscow_time = get_moscow_time()
             
             # Создаем запись с результатом
@@ -121,7 +191,9 @@ class MLTrackingSystem:
                 notes=notes
             )
             
+            self.metrics.prepare()
             self._append_to_ml_log(prediction)
+            self.metrics.record(asdict(prediction))
             self.logger.info(f"📊 ML лог: Добавлен ручной результат {team1} vs {team2} - {result}")
             
         except Exception as e:
@@ -133,20 +205,14 @@ class MLTrackingSystem:
             moscow_time = get_moscow_time()
             today_str = moscow_time.strftime("%Y-%m-%d")
             
-            # Загружаем логи
-            predictions = self._load_ml_log()
-            
-            # Фильтруем сегодняшние прогнозы
-            today_predictions = [
-                p for p in predictions 
-                if p['timestamp'].startswith(today_str)
-            ]
+            # Дочитываем только новые записи хранилища
+            aggregator = self._refresh_daily_aggregator(today_str)
             
-            if not today_predictions:
+            if not len(aggregator):
                 return self._empty_daily_stats(today_str)
             
             # Считаем статистику
-            stats = self._calculate_daily_statistics(today_predictions, today_str)
+            stats = aggregator.to_stats()
             
             # Сохраняем дневную статистику
             self._save_daily_stats(stats)
@@ -157,52 +223,34 @@ class MLTrackingSystem:
             self.logger.error(f"Ошибка генерации дневной статистики: {e}")
             return {}
     
-    def _calculate_daily_statistics(self, predictions: List[Dict], date: str) -> Dict:
-        """Рассчитывает детальную статистику"""
-        
-        # Общие показатели
-        total_predictions = len(predictions)
-        with_results = [p for p in predictions if p['actual_result']]
-        wins = [p for p in predictions if p['actual_result'] == 'win']
-        losses = [p for p in predictions if p['actual_result'] == 'loss']
-        
-        # По видам спорта
-        by_sport = {}
-        for sport in ['football', 'tennis', 'table_tennis', 'handball', 'manual_entry']:
-            sport_predictions = [p for p in predictions if p['sport_type'] == sport]
-            sport_wins = [p for p in sport_predictions if p['actual_result'] == 'win']
-            sport_losses = [p for p in sport_predictions if p['actual_result'] == 'loss']
-            
-            if sport_predictions:
-                by_sport[sport] = {
-                    'total': len(sport_predictions),
-                    'wins': len(sport_wins),
-                    'losses': len(sport_losses),
-                    'win_rate': len(sport_wins) / len(sport_predictions) * 100 if sport_predictions else 0,
-                    'predictions': sport_predictions
-                }
-        
-        # По уровню уверенности
-        high_confidence = [p for p in predictions if p['confidence'] >= 0.85]
-        medium_confidence = [p for p in predictions if 0.75 <= p['confidence'] < 0.85]
-        low_confidence = [p for p in predictions if p['confidence'] < 0.75]
+    def get_sport_win_rates(self, date: str = None) -> Dict:
+        """Винрейт по видам спорта за дату (YYYY-MM-DD) или за все время"""
+        try:
+            return self.store.sport_win_rates(date)
+        except Exception as e:
+            self.logger.error(f"Ошибка расчета винрейта по видам спорта: {e}")
+            return {}
+
+    def _refresh_daily_aggregator(self, date: str) -> DailyStatsAggregator:
+        """Применяет к агрегатору за дату записи, появившиеся с прошлого вызова"""
+        aggregator = self._daily_aggregator
+        if aggregator is None or aggregator.date != date:
+            aggregator, self._daily_position = None, None
         
-        return {
-            'date': date,
-            'generated_at': get_moscow_time().isoformat(),
-            'total_predictions': total_predictions,
-            'predictions_with_results': len(with_results),
-            'wins': len(wins),
-            'losses': len(losses),
-            'win_rate': len(wins) / len(with_results) * 100 if with_results else 0,
-            'by_sport': by_sport,
-            'by_confidence': {
-                'high_confidence': {'count': len(high_confidence), 'threshold': '≥85%'},
-                'medium_confidence': {'count': len(medium_confidence), 'threshold': '75-84%'},
-                'low_confidence': {'count': len(low_confidence), 'threshold': '<75%'}
-            },
-            'predictions': predictions
-        }
+        records, self._daily_position, reset = self.store.read_since(self._daily_position, date)
+        if reset or aggregator is None:
+            aggregator = DailyStatsAggregator(date)
+        
+        aggregator.ingest_many(records)
+        
+        self._daily_aggregator = aggregator
+        return aggregator
+    
+    def _calculate_daily_statistics(self, predictions: List[Dict], date: str) -> Dict:
+        """Рассчитывает детальную статистику (один проход по прогнозам)"""
+        aggregator = DailyStatsAggregator(date)
+        aggregator.add_many(predictions)
+        return aggregator.to_stats()
     
     def format_daily_stats_for_telegram(self, stats: Dict) -> str:
         """Форматирует дневную статистику для Telegram"""
@@ -253,30 +301,42 @@ class MLTrackingSystem:
 <b>📋 ДЕТАЛИЗАЦИЯ ПРОГНОЗОВ:</b>
 """
         
-        prediction_count = 1
-        for prediction in stats['predictions']:
-            if prediction['actual_result']:
-                result_emoji = "✅" if prediction['actual_result'] == 'win' else "❌"
-                sport_emoji = {"football": "⚽", "tennis": "🎾", "table_tennis": "🏓", "handball": "🤾"}.get(prediction['sport_type'], "🏆")
-                
-                report += f"{prediction_count}. {sport_emoji} {prediction['team1']} vs {prediction['team2']}\n"
-                report += f"   Прогноз: {prediction['recommendation']} | Результат: {result_emoji}\n"
-                if prediction['notes']:
-                    report += f"   Заметка: {prediction['notes']}\n"
-                report += "\n"
-                prediction_count += 1
+        report += "".join(self._format_prediction_details(stats))
+        
+        # Скользящие метрики из снимка (без прохода по истории)
+        performance = self.metrics.format_for_telegram()
+        if performance:
+            report += performance + "\n"
         
         # Выводы для ML
         report += f"""<b>🤖 ВЫВОДЫ ДЛЯ МАШИННОГО ОБУЧЕНИЯ:</b>
 • Наиболее успешный спорт: {self._get_best_sport(by_sport)}
 • Оптимальная уверенность: {self._get_optimal_confidence(stats)}
-• Рекомендации для улучшения: {self._get_ml_recommendations(stats)}
+• Рекомендации для улучшения: {self._get_ml_recommendations(stats)}{self._get_ai_insights(stats)}
 
 <b>═══════════════════════════</b>
 💎 <b>TrueLiveBet AI – Учимся на результатах!</b> 💎"""
         
         return report
     
+    def _format_prediction_details(self, stats: Dict) -> Iterator[str]:
+        """Строки детализации: прогнозы с результатом читаются из хранилища по одному"""
+        prediction_ids = set(stats['predictions'])
+        prediction_count = 1
+        for prediction in self.store.iter_predictions_for_date(stats['date']):
+            if prediction['timestamp'] not in prediction_ids or not prediction['actual_result']:
+                continue
+            
+            result_emoji = "✅" if prediction['actual_result'] == 'win' else "❌"
+            sport_emoji = {"football": "⚽", "tennis": "🎾", "table_tennis": "🏓", "handball": "🤾"}.get(prediction['sport_type'], "🏆")
+            
+            yield f"{prediction_count}. {sport_emoji} {prediction['team1']} vs {prediction['team2']}\n"
+            yield f"   Прогноз: {prediction['recommendation']} | Результат: {result_emoji}\n"
+            if prediction['notes']:
+                yield f"   Заметка: {prediction['notes']}\n"
+            yield "\n"
+            prediction_count += 1
+    
     def _get_best_sport(self, by_sport: Dict) -> str:
         """Определяет наиболее успешный вид спорта"""
         best_sport = "Недостаточно данных"
@@ -298,19 +358,14 @@ class MLTrackingSystem:
     
     def _get_optimal_confidence(self, stats: Dict) -> str:
         """Анализирует оптимальный уровень уверенности"""
-        predictions = stats['predictions']
-        if not predictions:
+        by_confidence = stats.get('by_confidence', {})
+        if not stats['predictions'] or 'wins' not in by_confidence.get('high_confidence', {}):
             return "Недостаточно данных"
         
-        # Анализируем винрейт по уровням уверенности
-        high_conf = [p for p in predictions if p['confidence'] >= 0.85 and p['actual_result']]
-        medium_conf = [p for p in predictions if 0.75 <= p['confidence'] < 0.85 and p['actual_result']]
-        
-        high_wins = len([p for p in high_conf if p['actual_result'] == 'win'])
-        medium_wins = len([p for p in medium_conf if p['actual_result'] == 'win'])
-        
-        high_rate = high_wins / len(high_conf) * 100 if high_conf else 0
-        medium_rate = medium_wins / len(medium_conf) * 100 if medium_conf else 0
+        # Винрейт по уровням уверенности (счетчики агрегатора)
+        high, medium = by_confidence['high_confidence'], by_confidence['medium_confidence']
+        high_rate = high['wins'] / high['with_results'] * 100 if high['with_results'] else 0
+        medium_rate = medium['wins'] / medium['with_results'] * 100 if medium['with_results'] else 0
         
         if high_rate > medium_rate:
             return f"Высокая уверенность (≥85%): {high_rate:.1f}%"
@@ -330,17 +385,92 @@ class MLTrackingSystem:
         else:
             return "Низкий винрейт, требуется серьезная корректировка алгоритмов"
     
+    def _get_ai_insights(self, stats: Dict) -> str:
+        """Выводы AI из очереди Batch API (если ответ уже получен)"""
+        insights = llm_batch_queue.result('daily_insights', stats['date'])
+        return f"\n• Выводы AI: {insights.strip()}" if insights else ""
+    
+    def queue_daily_insights(self, stats: Dict = None) -> bool:
+        """Ставит в очередь Batch API запрос выводов AI по дневной статистике (попадут в дневной отчет)"""
+        stats = stats or self.generate_daily_stats()
+        if not stats or not stats.get('predictions_with_results'):
+            return False
+        
+        by_sport = ", ".join(f"{sport}: {data['wins']}/{data['total']}"
+                             for sport, data in stats.get('by_sport', {}).items() if data['total'])
+        prompt = f"""Дневная статистика прогнозов live-ставок за {stats['date']}:
+Прогнозов: {stats['total_predictions']}, с результатом: {stats['predictions_with_results']}
+Выигрышных: {stats['wins']}, проигрышных: {stats['losses']}, винрейт: {stats['win_rate']:.1f}%
+По видам спорта (выигрыши/всего): {by_sport or 'нет данных'}
+Оптимальная уверенность: {self._get_optimal_confidence(stats)}
+
+Сделай 2-3 кратких вывода для улучшения прогнозов: что работает, какие критерии ужесточить.
+Верни только текст без JSON."""
+        
+        return llm_batch_queue.enqueue('daily_insights', stats['date'], prompt,
+                                       system_prompt="Ты аналитик качества прогнозов спортивных ставок.",
+                                       max_tokens=300, refresh=True)
+    
+    def queue_backtest(self, date: str) -> int:
+        """
+        Ставит в очередь Batch API повторный анализ прогнозов дня с известным результатом
+        
+        Прогноз анализируется текущим промптом EnhancedOpenAIAnalyzer по
+        состоянию матча на момент прогноза; сравнение с результатом -
+        get_backtest_summary.
+        
+        Returns:
+            int: Количество добавленных запросов
+        """
+        from enhanced_openai_analyzer import SYSTEM_PROMPT, create_enhanced_match_prompt
+        
+        queued = 0
+        for prediction in self.store.iter_predictions_for_date(date):
+            if prediction['actual_result'] not in ('win', 'loss'):
+                continue
+            match = MatchRecord(prediction['team1'], prediction['team2'], prediction['score_at_prediction'],
+                                prediction['minute_at_prediction'], league=prediction['league'])
+            prompt = create_enhanced_match_prompt(match, prediction['sport_type'])
+            queued += llm_batch_queue.enqueue('backtest', prediction['timestamp'], prompt,
+                                              system_prompt=SYSTEM_PROMPT, max_tokens=300)
+        
+        if queued:
+            self.logger.info(f"🧪 В очередь бэктеста добавлено прогнозов: {queued}")
+        return queued
+    
+    def get_backtest_summary(self, date: str) -> Dict:
+        """Сравнивает полученные ответы бэктеста с фактическими результатами прогнозов дня"""
+        from enhanced_openai_analyzer import validate_analysis
+        
+        summary = {'analyzed': 0, 'would_bet': 0, 'wins': 0, 'avoided_losses': 0}
+        for prediction in self.store.iter_predictions_for_date(date):
+            response = llm_batch_queue.result('backtest', prediction['timestamp'])
+            if response is None or prediction['actual_result'] not in ('win', 'loss'):
+                continue
+            
+            response = response.strip().removeprefix('```json').removesuffix('```')
+            try:
+                analysis = validate_analysis(json.loads(response))
+            except ValueError:
+                analysis = None
+            if analysis is None:
+                continue
+            
+            summary['analyzed'] += 1
+            if analysis['is_favorite'] and analysis['recommendation'] != 'НЕТ' and analysis['confidence'] >= 0.75:
+                summary['would_bet'] += 1
+                summary['wins'] += prediction['actual_result'] == 'win'
+            elif prediction['actual_result'] == 'loss':
+                summary['avoided_losses'] += 1
+        
+        summary['win_rate'] = summary['wins'] / summary['would_bet'] * 100 if summary['would_bet'] else 0.0
+        return summary
+    
     def _append_to_ml_log(self, prediction: PredictionResult):
         """Добавляет прогноз в ML лог"""
         try:
-            # Загружаем существующие логи
-            predictions = self._load_ml_log()
-            
-            # Добавляем новый прогноз
-            predictions.append(asdict(prediction))
-            
-            # Сохраняем
-            self._save_ml_log(predictions)
+            # Одна строка в конец файла, без чтения и перезаписи истории
+            self.store.append(asdict(prediction))
             
         except Exception as e:
             self.logger.error(f"Ошибка добавления в ML лог: {e}")
@@ -348,10 +478,7 @@ class MLTrackingSystem:
     def _load_ml_log(self) -> List[Dict]:
         """Загружает ML логи"""
         try:
-            if os.path.exists(self.ml_log_file):
-                with open(self.ml_log_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return []
+            return self.store.load()
         except Exception as e:
             self.logger.error(f"Ошибка загрузки ML лога: {e}")
             return []
@@ -359,16 +486,20 @@ class MLTrackingSystem:
     def _save_ml_log(self, predictions: List[Dict]):
         """Сохраняет ML логи"""
         try:
-            with open(self.ml_log_file, 'w', encoding='utf-8') as f:
-                json.dump(predictions, f, ensure_ascii=False, indent=2)
+            self.store.rewrite(predictions)
         except Exception as e:
             self.logger.error(f"Ошибка сохранения ML лога: {e}")
     
     def _save_daily_stats(self, stats: Dict):
-        """Сохраняет дневную статистику"""
+        """Сохраняет дневную статистику (только счетчики, прогнозы остаются в хранилище)"""
         try:
+            snapshot = {key: value for key, value in stats.items() if key != 'predictions'}
+            snapshot['by_sport'] = {
+                sport: {key: value for key, value in data.items() if key != 'predictions'}
+                for sport, data in stats.get('by_sport', {}).items()
+            }
             with open(self.daily_stats_file, 'w', encoding='utf-8') as f:
-                json.dump(stats, f, ensure_ascii=False, indent=2)
+                json.dump(snapshot, f, ensure_ascii=False, indent=2)
         except Exception as e:
             self.logger.error(f"Ошибка сохранения дневной статистики: {e}")
     
@@ -410,4 +541,6 @@ class MLTrackingSystem:
 💎 <b>TrueLiveBet AI – Качество превыше количества!</b> 💎"""
 
 # Глобальный экземпляр
-ml_tracker = MLTrackingSystem()
\ No newline at end of file
+ml_tracker = MLTrackingSystem()
+atexit.register(ml_tracker.store.close)
+atexit.register(ml_tracker.metrics.save)
\ No newline at end of file
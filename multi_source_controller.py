@@ -3,28 +3,19 @@ from bs4 import BeautifulSoup
 import re
 import logging
 from typing import List
-from dataclasses import dataclass, field
+from match_record import MultiSourceMatch
+from name_pool import name_pool
 import config
 from betzona_controller import BetzonaController
 from enhanced_real_controller import EnhancedRealDataController
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
 
-@dataclass
-class MatchData:
-    sport: str
-    team1: str
-    team2: str
-    score: str
-    minute: str = ""
-    league: str = ""
-    odds: dict = field(default_factory=dict)
-    link: str = ""
-    probability: float = 0.0  # Вероятность победы фаворита
-    recommendation_type: str = ""  # 'win' or 'total'
-    recommendation_value: str = ""  # 'П1', 'ТБ X', 'ТМ Y'
-    justification: str = ""  # Обоснование рекомендации
-    source: str = ""  # Источник данных
+# Единая запись матча (позиционные аргументы прежнего MatchData этого модуля)
+MatchData = MultiSourceMatch
+
+# Поля, которые берутся из дубликата, если у основной записи они пустые
+MERGE_FIELDS = ('score', 'minute', 'league', 'status', 'url', 'link', 'coefficient', 'odds')
 
 class MultiSourceController:
     def __init__(self):
@@ -37,14 +28,21 @@ class MultiSourceController:
         # Приоритет источников (от лучшего к худшему)
         self.source_priority = ['betzona', 'scores24']
 
-    def get_live_matches(self, sport_type: str) -> List[MatchData]:
-        """Получение live-матчей из всех доступных источников"""
+    def get_live_matches(self, sport_type: str, betzona_matches: List = None) -> List[MatchData]:
+        """
+        Получение live-матчей из всех доступных источников
+        
+        Args:
+            sport_type (str): Вид спорта
+            betzona_matches (List): Уже полученные матчи Betzona (для пакетного режима)
+        """
         all_matches = []
         
         # Получаем данные из Betzona
         try:
-            self.logger.info(f"Получение данных из Betzona для {sport_type}...")
-            betzona_matches = self.betzona_controller.get_live_matches(sport_type)
+            if betzona_matches is None:
+                self.logger.info(f"Получение данных из Betzona для {sport_type}...")
+                betzona_matches = self.betzona_controller.get_live_matches(sport_type)
             for match in betzona_matches:
                 match.source = 'betzona'
             all_matches.extend(betzona_matches)
@@ -63,43 +61,84 @@ class MultiSourceController:
         except Exception as e:
             self.logger.error(f"Ошибка при получении данных из Scores24: {e}")
         
-        # Удаляем дубликаты (по названиям команд и счету)
+        # Удаляем дубликаты (по паре команд) с объединением данных источников
         unique_matches = self._remove_duplicates(all_matches)
         
         self.logger.info(f"Всего уникальных матчей для {sport_type}: {len(unique_matches)}")
         return unique_matches
 
     def _remove_duplicates(self, matches: List[MatchData]) -> List[MatchData]:
-        """Удаление дубликатов матчей"""
-        seen = set()
+        """
+        Удаление дубликатов матчей с объединением данных из разных источников
+        
+        Матчи индексируются по (вид спорта, нормализованная пара команд), поэтому
+        обработка занимает линейное время. Остается запись из источника с более
+        высоким приоритетом, а ее пустые поля заполняются из дубликата
+        (например, минута Betzona + лига Scores24).
+        """
+        priority = {source: rank for rank, source in enumerate(self.source_priority)}
+        lowest_priority = len(priority)
+        
+        positions = {}
         unique_matches = []
+        merged = 0
         
         for match in matches:
-            # Создаем ключ для сравнения
-            key = (match.sport_type, match.team1.lower(), match.team2.lower(), match.score)
+            key = self._match_key(match)
+            position = positions.get(key)
             
-            if key not in seen:
-                seen.add(key)
+            if position is None:
+                positions[key] = len(unique_matches)
                 unique_matches.append(match)
+                continue
+            
+            existing_match = unique_matches[position]
+            if priority.get(getattr(match, 'source', ''), lowest_priority) < \
+                    priority.get(getattr(existing_match, 'source', ''), lowest_priority):
+                # Заменяем на матч из источника с более высоким приоритетом
+                unique_matches[position] = match
+                self._merge_match_fields(match, existing_match)
             else:
-                # Если матч уже есть, выбираем из источника с более высоким приоритетом
-                existing_match = next(m for m in unique_matches if (m.sport_type, m.team1.lower(), m.team2.lower(), m.score) == key)
-                if self.source_priority.index(match.source) < self.source_priority.index(existing_match.source):
-                    # Заменяем на матч из источника с более высоким приоритетом
-                    unique_matches.remove(existing_match)
-                    unique_matches.append(match)
+                self._merge_match_fields(existing_match, match)
+            merged += 1
+        
+        if merged:
+            self.logger.info(f"Объединено дубликатов из разных источников: {merged}")
         
         return unique_matches
 
+    def _match_key(self, match) -> tuple:
+        """Ключ матча: вид спорта и ключи пары команд из пула названий (целые числа)"""
+        # У MatchData этого модуля поле называется sport, у контроллеров-источников - sport_type
+        sport = getattr(match, 'sport_type', None) or getattr(match, 'sport', '')
+        return (sport, name_pool.key(match.team1), name_pool.key(match.team2))
+
+    @staticmethod
+    def _merge_match_fields(primary, secondary):
+        """Заполняет пустые поля основной записи данными дубликата"""
+        for field_name in MERGE_FIELDS:
+            if not hasattr(primary, field_name) or getattr(primary, field_name):
+                continue
+            value = getattr(secondary, field_name, None)
+            if value:
+                setattr(primary, field_name, value)
+
     def get_all_live_matches(self) -> List[MatchData]:
         """Получение всех live-матчей по всем видам спорта"""
         all_matches = []
         
         sports = ['football', 'tennis', 'table_tennis', 'handball']
         
+        # Каждая страница Betzona загружается и разбирается один раз на все виды спорта
+        try:
+            betzona_by_sport = self.betzona_controller.get_live_matches_batch(sports)
+        except Exception as e:
+            self.logger.error(f"Ошибка при получении данных из Betzona: {e}")
+            betzona_by_sport = {sport: [] for sport in sports}
+        
         for sport in sports:
             self.logger.info(f"Получение live-матчей для {sport}...")
-            matches = self.get_live_matches(sport)
+            matches = self.get_live_matches(sport, betzona_matches=betzona_by_sport[sport])
             all_matches.extend(matches)
             
         return all_matches
@@ -109,10 +148,11 @@ class MultiSourceController:
         all_matches = []
         
         sports = ['football', 'tennis', 'table_tennis', 'handball']
+        betzona_by_sport = self.betzona_controller.get_live_matches_batch(sports) if source == 'betzona' else {}
         
         for sport in sports:
             if source == 'betzona':
-                matches = self.betzona_controller.get_live_matches(sport)
+                matches = betzona_by_sport[sport]
             elif source == 'scores24':
                 matches = self.scores24_controller.get_live_matches('scores24', sport)
             else:
@@ -0,0 +1,174 @@
+"""
+Пул названий команд, лиг и игроков
+
+Каждое название, полученное парсерами, получает целочисленный ID в пуле
+процесса. Повторяющиеся между циклами строки хранятся одним объектом, а
+нижний регистр и нормализованная форма вычисляются один раз на название.
+Названия, отличающиеся только регистром, буквой "ё" или пробелами, получают
+общий ключ, поэтому дедупликация и сравнения в горячих циклах работают с
+целыми числами, а не с заново приведенными к нижнему регистру строками.
+
+По умолчанию пул живет в памяти процесса; с настройкой name_pool_file
+он сохраняется в файл, и ID названий не меняются между перезапусками.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Union
+
+from config import ANALYSIS_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+def fold_name(name: str) -> str:
+    """Форма для сравнения: нижний регистр, "ё" -> "е", одиночные пробелы"""
+    return ' '.join((name or '').lower().replace('ё', 'е').split())
+
+
+class NamePool:
+    """
+    Пул названий с ID, кэшем нижнего регистра и ключами сравнения
+
+    - intern: ID названия (новые названия добавляются в пул)
+    - string: общий экземпляр строки названия
+    - lower / normalized: нижний регистр и нормализованная форма (fuzzy_matcher)
+    - key: ключ сравнения (общий для вариантов написания)
+    """
+
+    def __init__(self, pool_file: str = None, max_entries: int = None):
+        self.pool_file = pool_file if pool_file is not None else ANALYSIS_SETTINGS.get('name_pool_file')
+        self.max_entries = max_entries or ANALYSIS_SETTINGS.get('name_pool_max_entries', 200000)
+
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lower: List[str] = []
+        self._keys: List[int] = []
+        self._normalized: List[Optional[str]] = []
+        self._key_ids: Dict[str, int] = {}
+
+        self._loaded = not self.pool_file
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._names)
+
+    def intern(self, name: str) -> int:
+        """
+        ID названия
+
+        Returns:
+            int: ID или -1, если пул заполнен (max_entries) и названия в нем нет
+        """
+        name_id = self._ids.get(name)
+        if name_id is not None:
+            return name_id
+        return self._add(name)
+
+    def _add(self, name: str) -> int:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            name_id = self._ids.get(name)
+            if name_id is not None:
+                return name_id
+            if len(self._names) >= self.max_entries or name.__class__ is not str:
+                return -1
+
+            folded = fold_name(name)
+            key = self._key_ids.setdefault(folded, len(self._key_ids))
+
+            name_id = len(self._names)
+            self._names.append(name)
+            self._lower.append(name.lower())
+            self._keys.append(key)
+            self._normalized.append(None)
+            self._ids[name] = name_id
+            self._dirty = self._dirty or bool(self.pool_file)
+            return name_id
+
+    def name(self, name_id: int) -> str:
+        """Название по ID"""
+        return self._names[name_id]
+
+    def string(self, name: str) -> str:
+        """Общий экземпляр строки названия (вместо свежей строки парсера)"""
+        if not name:
+            return name
+        name_id = self.intern(name)
+        return name if name_id < 0 else self._names[name_id]
+
+    def lower(self, name: Union[str, int]) -> str:
+        """Название в нижнем регистре (по строке или ID)"""
+        name_id = name if name.__class__ is int else self.intern(name or '')
+        return name.lower() if name_id < 0 else self._lower[name_id]
+
+    def key(self, name: str) -> Union[int, str]:
+        """
+        Ключ сравнения названия
+
+        Returns:
+            int: ID сложенной формы (fold_name); при заполненном пуле -
+            сама сложенная строка (ключи разных названий не совпадают)
+        """
+        name_id = self.intern(name or '')
+        return fold_name(name) if name_id < 0 else self._keys[name_id]
+
+    def normalized(self, name: str) -> str:
+        """Нормализованная форма для fuzzy matching (вычисляется один раз)"""
+        from fuzzy_matcher import normalize_team_name
+
+        name_id = self.intern(name or '')
+        if name_id < 0:
+            return normalize_team_name(name)
+        normalized = self._normalized[name_id]
+        if normalized is None:
+            normalized = self._normalized[name_id] = normalize_team_name(name)
+        return normalized
+
+    def _load(self):
+        """Загружает сохраненные названия (ID - позиция в списке) при первом добавлении"""
+        self._loaded = True
+        try:
+            if not os.path.exists(self.pool_file):
+                return
+            with open(self.pool_file, 'r', encoding='utf-8') as f:
+                names = json.load(f).get('names', [])
+            for name in names[:self.max_entries]:
+                if name in self._ids:
+                    continue
+                key = self._key_ids.setdefault(fold_name(name), len(self._key_ids))
+                self._ids[name] = len(self._names)
+                self._names.append(name)
+                self._lower.append(name.lower())
+                self._keys.append(key)
+                self._normalized.append(None)
+            logger.info(f"📇 Загружено названий в пул: {len(self._names)}")
+        except Exception as e:
+            logger.error(f"Ошибка загрузки пула названий: {e}")
+
+    def save(self):
+        """Сохраняет пул, если задан файл и есть новые названия"""
+        if not self.pool_file or not self._dirty:
+            return
+
+        try:
+            with self._lock:
+                data = {'names': list(self._names)}
+                self._dirty = False
+
+            temp_file = self.pool_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_file, self.pool_file)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения пула названий: {e}")
+
+
+# Глобальный экземпляр
+name_pool = NamePool()
+atexit.register(name_pool.save)
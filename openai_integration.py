@@ -8,24 +8,25 @@ import logging
 from typing import List, Dict, Any
 from openai import OpenAI
 from multi_source_controller import MatchData
+from llm_cache import llm_cache, match_fingerprint
+from llm_executor import estimate_tokens, llm_executor
 
 logger = logging.getLogger(__name__)
 
+# Версия шаблона промпта в ключе кэша LLM (увеличить при изменении промпта)
+PROMPT_TEMPLATE = 'openai_batch/1'
+
 class OpenAIAnalyzer:
     """
     Анализатор матчей с использованием OpenAI GPT
     """
     
     def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
+        # Повторы и лимиты запросов - в общем исполнителе (llm_executor)
+        self.client = OpenAI(api_key=api_key, max_retries=0)
         self.logger = logging.getLogger(self.__class__.__name__)
         self.model = "gpt-4o-mini"  # Более экономичная модель
         
-        # Rate limiting настройки
-        self.last_request_time = 0
-        self.min_request_interval = 1.5  # 1.5 секунды между запросами
-        self.max_retries = 3
-        
     def analyze_matches_with_gpt(self, matches: List[MatchData], sport_type: str) -> List[MatchData]:
         """
         Анализирует матчи с помощью OpenAI GPT
@@ -51,8 +52,11 @@ class OpenAIAnalyzer:
         prompt = self._create_detailed_analysis_prompt(matches_to_analyze, sport_type)
         
         try:
-            # Вызываем OpenAI GPT
-            gpt_response = self._call_openai_gpt(prompt)
+            # Вызываем OpenAI GPT (тот же набор состояний матчей - из кэша)
+            fingerprint = [match_fingerprint(match, sport_type) for match in matches_to_analyze]
+            gpt_response = llm_cache.get_or_call(
+                self.model, PROMPT_TEMPLATE, fingerprint, lambda: self._call_openai_gpt(prompt)
+            )
             
             # Обрабатываем ответ GPT
             recommendations = self._process_gpt_response(gpt_response, matches_to_analyze, sport_type)
@@ -237,50 +241,32 @@ class OpenAIAnalyzer:
             return False
     
     def _call_openai_gpt(self, prompt: str) -> str:
-        """Вызывает OpenAI GPT API с rate limiting"""
-        import time
+        """Вызывает OpenAI GPT API (лимиты и повторы - в llm_executor)"""
+        system_prompt = "Ты профессиональный эксперт по спортивным ставкам с 15+ летним опытом. Анализируй строго, но не слишком придирчиво. Отвечай только в JSON формате."
+        self.logger.info("📡 OpenAI запрос")
         
-        # Соблюдаем rate limiting
-        time_since_last = time.time() - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last
-            self.logger.info(f"⏳ Ожидание {sleep_time:.1f}с для соблюдения rate limit")
-            time.sleep(sleep_time)
+        response = llm_executor.call(
+            lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system", 
+                        "content": system_prompt
+                    },
+                    {
+                        "role": "user", 
+                        "content": prompt
+                    }
+                ],
+                max_tokens=1500,  # Уменьшили для экономии
+                temperature=0.2,  # Немного повысили для разнообразия
+                timeout=30
+            ),
+            tokens=estimate_tokens(system_prompt, prompt, max_tokens=1500)
+        )
         
-        for attempt in range(self.max_retries):
-            try:
-                self.logger.info(f"📡 OpenAI запрос (попытка {attempt + 1}/{self.max_retries})")
-                
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": "Ты профессиональный эксперт по спортивным ставкам с 15+ летним опытом. Анализируй строго, но не слишком придирчиво. Отвечай только в JSON формате."
-                        },
-                        {
-                            "role": "user", 
-                            "content": prompt
-                        }
-                    ],
-                    max_tokens=1500,  # Уменьшили для экономии
-                    temperature=0.2,  # Немного повысили для разнообразия
-                    timeout=30
-                )
-                
-                self.last_request_time = time.time()
-                self.logger.info("✅ OpenAI запрос выполнен успешно")
-                return response.choices[0].message.content
-                
-            except Exception as e:
-                self.logger.warning(f"⚠️  Попытка {attempt + 1} неудачна: {e}")
-                if attempt < self.max_retries - 1:
-                    sleep_time = (attempt + 1) * 2  # Экспоненциальная задержка
-                    self.logger.info(f"⏳ Ожидание {sleep_time}с перед повтором...")
-                    time.sleep(sleep_time)
-                else:
-                    self.logger.error(f"❌ Все {self.max_retries} попытки неудачны")
-                    raise e
+        self.logger.info("✅ OpenAI запрос выполнен успешно")
+        return response.choices[0].message.content
     
     def _process_gpt_response(self, gpt_response: str, original_matches: List[MatchData], sport_type: str = 'football') -> List[MatchData]:
         """Обрабатывает ответ от GPT и создает рекомендации"""
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Скользящие метрики качества прогнозов по всей истории
+
+Метрики (винрейт, ROI, Brier score) за 7 дней, 30 дней и все время
+поддерживаются инкрементально: каждый прогноз и каждый результат меняет
+счетчики нескольких групп (все прогнозы, вид спорта, лига, уровень
+уверенности, тип ставки) за O(1). Для окон хранятся только дневные счетчики
+за последние дни, поэтому снимок на диске остается компактным, а отчеты
+читают готовые числа вместо повторного прохода по истории.
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config import ANALYSIS_SETTINGS
+from daily_stats_aggregator import confidence_bucket
+from moscow_time import get_moscow_time
+
+try:
+    import fcntl
+except ImportError:  # Windows: межпроцессная блокировка недоступна
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# Счетчики группы (позиции в векторе)
+PREDICTIONS, SETTLED, WINS, LOSSES, PUSHES, STAKED, PROFIT, BRIER_SUM, BRIER_COUNT = range(9)
+COUNTERS_SIZE = 9
+
+SETTLED_RESULTS = ('win', 'loss', 'push')
+
+
+def recommendation_type(recommendation: str) -> str:
+    """Тип ставки по тексту рекомендации: winner / total / other"""
+    text = (recommendation or '').strip().upper()
+    if text.startswith(('П1', 'П2', 'ПОБЕДА')):
+        return 'winner'
+    if text.startswith(('ТБ', 'ТМ', 'ТОТАЛ')):
+        return 'total'
+    return 'other'
+
+
+def parse_coefficient(coefficient) -> Optional[float]:
+    """Коэффициент ставки или None, если он неизвестен"""
+    try:
+        value = float(str(coefficient).replace(',', '.'))
+    except (TypeError, ValueError):
+        return None
+    return value if value > 1 else None
+
+
+def prediction_counters(prediction: Dict) -> List[float]:
+    """Вклад одного прогноза в счетчики группы"""
+    counters = [0.0] * COUNTERS_SIZE
+    counters[PREDICTIONS] = 1
+
+    result = prediction.get('actual_result') or ''
+    if result not in SETTLED_RESULTS:
+        return counters
+
+    counters[SETTLED] = 1
+    counters[{'win': WINS, 'loss': LOSSES, 'push': PUSHES}[result]] = 1
+
+    # ROI на ставку в 1 единицу (только прогнозы с известным коэффициентом)
+    coefficient = parse_coefficient(prediction.get('coefficient'))
+    if coefficient:
+        counters[STAKED] = 1
+        counters[PROFIT] = coefficient - 1 if result == 'win' else (-1 if result == 'loss' else 0)
+
+    # Brier score: уверенность прогноза против исхода (ручные записи без уверенности не учитываются)
+    confidence = prediction.get('confidence') or 0
+    if result != 'push' and confidence > 0:
+        outcome = 1 if result == 'win' else 0
+        counters[BRIER_SUM] = (confidence - outcome) ** 2
+        counters[BRIER_COUNT] = 1
+
+    return counters
+
+
+def prediction_groups(prediction: Dict) -> List[str]:
+    """Группы, в которые входит прогноз"""
+    groups = ['all', f"sport:{prediction.get('sport_type', '')}",
+              f"confidence:{confidence_bucket(prediction.get('confidence') or 0)}",
+              f"type:{recommendation_type(prediction.get('recommendation', ''))}"]
+    if prediction.get('league'):
+        groups.append(f"league:{prediction['league']}")
+    return groups
+
+
+def compute_metrics(counters: List[float]) -> Dict:
+    """Винрейт, ROI и Brier score по счетчикам"""
+    settled = counters[SETTLED]
+    return {
+        'predictions': int(counters[PREDICTIONS]),
+        'settled': int(settled),
+        'wins': int(counters[WINS]),
+        'losses': int(counters[LOSSES]),
+        'win_rate': counters[WINS] / settled * 100 if settled else 0,
+        'roi': counters[PROFIT] / counters[STAKED] * 100 if counters[STAKED] else None,
+        'brier': counters[BRIER_SUM] / counters[BRIER_COUNT] if counters[BRIER_COUNT] else None
+    }
+
+
+class PerformanceMetrics:
+    """
+    Инкрементальные метрики качества прогнозов со снимком на диске
+
+    Изменения копятся как дельты счетчиков и при сохранении добавляются к
+    актуальному снимку под блокировкой файла, поэтому цикл анализа и
+    add_result.py не затирают изменения друг друга.
+    """
+
+    def __init__(self, snapshot_file: str = None, windows: Iterable[int] = None,
+                 save_every: int = None, loader: Callable[[], List[Dict]] = None):
+        self.snapshot_file = snapshot_file or ANALYSIS_SETTINGS.get(
+            'performance_metrics_file', 'performance_metrics.json')
+        self.windows = tuple(sorted(windows or ANALYSIS_SETTINGS.get('performance_metrics_windows', (7, 30))))
+        self.save_every = save_every or ANALYSIS_SETTINGS.get('performance_metrics_save_every', 20)
+        self.loader = loader
+
+        self._groups: Optional[Dict[str, Dict]] = None
+        self._pending: Dict[tuple, List[float]] = {}
+        self._pending_updates = 0
+        self._snapshot_stat = None
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Обновление
+    # ------------------------------------------------------------------
+
+    def record(self, prediction: Dict, previous: Dict = None):
+        """
+        Учитывает новый прогноз или изменение прогноза (после записи в хранилище)
+
+        Args:
+            prediction (Dict): Прогноз в текущем состоянии
+            previous (Dict): Прежнее состояние прогноза (при обновлении результата)
+        """
+        with self._lock:
+            # Пересчет по истории уже включает это изменение
+            if self._ensure_loaded():
+                return
+            if previous is not None:
+                self._apply(previous, sign=-1)
+            self._apply(prediction, sign=1)
+
+            self._pending_updates += 1
+            need_save = self._pending_updates >= self.save_every
+
+        if need_save:
+            self.save()
+
+    def prepare(self):
+        """
+        Загружает снимок до записи в хранилище
+
+        Без снимка метрики пересчитываются по истории; если это произойдет
+        до записи, последующие record() пакета не будут учтены дважды.
+        """
+        with self._lock:
+            self._ensure_loaded()
+
+    def rebuild(self, predictions: Iterable[Dict]):
+        """Полный пересчет по истории (первый запуск без снимка)"""
+        with self._lock, self._file_lock():
+            self._groups = {}
+            self._pending = {}
+            for prediction in predictions:
+                self._apply(prediction, sign=1, pending=False)
+            self._write_snapshot(self._groups)
+            self._pending_updates = 0
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+
+    def get_metrics(self, group: str = 'all') -> Dict[str, Dict]:
+        """Метрики группы по окнам: {'7d': {...}, '30d': {...}, 'all': {...}}"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._group_metrics(self._groups.get(group))
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Готовые метрики всех групп"""
+        with self._lock:
+            self._ensure_loaded()
+            return {group: self._group_metrics(data) for group, data in self._groups.items()}
+
+    def format_for_telegram(self) -> str:
+        """Блок скользящих метрик для дневного отчета (пустая строка, если данных нет)"""
+        metrics = self.get_metrics('all')
+        if not metrics['all']['settled']:
+            return ""
+
+        lines = ["<b>📈 ДИНАМИКА КАЧЕСТВА:</b>"]
+        titles = {f'{days}d': f'{days} дн.' for days in self.windows}
+        titles['all'] = 'Все время'
+        for window, title in titles.items():
+            data = metrics[window]
+            if not data['settled']:
+                continue
+            roi = f"{data['roi']:+.1f}%" if data['roi'] is not None else "—"
+            brier = f"{data['brier']:.3f}" if data['brier'] is not None else "—"
+            lines.append(f"{title}: {data['wins']}/{data['settled']} ({data['win_rate']:.1f}%), ROI {roi}, Brier {brier}")
+        return "\n".join(lines) + "\n"
+
+    # ------------------------------------------------------------------
+    # Снимок на диске
+    # ------------------------------------------------------------------
+
+    def save(self):
+        """Добавляет накопленные дельты к снимку на диске (атомарная запись)"""
+        with self._lock:
+            if not self._pending:
+                return
+            try:
+                with self._file_lock():
+                    groups = self._read_snapshot()
+                    if groups is None:
+                        groups = {}
+                    for (group, day), delta in self._pending.items():
+                        self._add(groups, group, day, delta)
+                    self._write_snapshot(groups)
+
+                self._groups = groups
+                self._pending = {}
+                self._pending_updates = 0
+            except Exception as e:
+                logger.error(f"Ошибка сохранения метрик качества: {e}")
+
+    def _ensure_loaded(self) -> bool:
+        """
+        Загружает снимок (заново, если его изменил другой процесс)
+
+        Returns:
+            bool: True, если снимка не было и метрики пересчитаны по истории
+        """
+        if self._groups is not None and not self._snapshot_changed():
+            return False
+
+        groups = self._read_snapshot()
+        if groups is None and self.loader is not None:
+            logger.info("📈 Метрики качества: снимок не найден, пересчет по истории")
+            self.rebuild(self.loader())
+            return True
+
+        # Несохраненные дельты этого процесса поверх снимка
+        groups = groups or {}
+        for (group, day), delta in self._pending.items():
+            self._add(groups, group, day, delta)
+        self._groups = groups
+        return False
+
+    def _snapshot_changed(self) -> bool:
+        """Снимок изменен другим процессом"""
+        return self._stat_snapshot() != self._snapshot_stat
+
+    def _stat_snapshot(self):
+        try:
+            stat = os.stat(self.snapshot_file)
+            return stat.st_ino, stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def _read_snapshot(self) -> Optional[Dict[str, Dict]]:
+        self._snapshot_stat = self._stat_snapshot()
+        if self._snapshot_stat is None:
+            return None
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot.get('version') != SNAPSHOT_VERSION:
+                return None
+            return snapshot.get('groups', {})
+        except Exception as e:
+            logger.error(f"Ошибка загрузки метрик качества: {e}")
+            return None
+
+    def _write_snapshot(self, groups: Dict[str, Dict]):
+        """Снимок: дневные счетчики окон, общие счетчики и готовые метрики"""
+        self._evict_old_days(groups)
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'updated_at': get_moscow_time().isoformat(),
+            'windows': list(self.windows),
+            'groups': groups,
+            'metrics': {group: self._group_metrics(data) for group, data in groups.items()}
+        }
+
+        temp_file = self.snapshot_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.snapshot_file)
+        self._snapshot_stat = self._stat_snapshot()
+
+    # ------------------------------------------------------------------
+    # Счетчики
+    # ------------------------------------------------------------------
+
+    def _apply(self, prediction: Dict, sign: int, pending: bool = True):
+        """Добавляет (sign=1) или вычитает (sign=-1) вклад прогноза"""
+        counters = prediction_counters(prediction)
+        if sign < 0:
+            counters = [-value for value in counters]
+        day = (prediction.get('timestamp') or '')[:10]
+
+        for group in prediction_groups(prediction):
+            self._add(self._groups, group, day, counters)
+            if pending:
+                delta = self._pending.setdefault((group, day), [0.0] * COUNTERS_SIZE)
+                for position, value in enumerate(counters):
+                    delta[position] += value
+
+    def _add(self, groups: Dict[str, Dict], group: str, day: str, counters: List[float]):
+        data = groups.setdefault(group, {'all': [0.0] * COUNTERS_SIZE, 'days': {}})
+        for position, value in enumerate(counters):
+            data['all'][position] += value
+
+        # Дневные счетчики нужны только для окон
+        if day >= self._oldest_day():
+            day_counters = data['days'].setdefault(day, [0.0] * COUNTERS_SIZE)
+            for position, value in enumerate(counters):
+                day_counters[position] += value
+
+    def _group_metrics(self, data: Optional[Dict]) -> Dict[str, Dict]:
+        if data is None:
+            data = {'all': [0.0] * COUNTERS_SIZE, 'days': {}}
+
+        today = get_moscow_time().date()
+        metrics = {}
+        for days in self.windows:
+            first_day = (today - timedelta(days=days - 1)).isoformat()
+            counters = [0.0] * COUNTERS_SIZE
+            for day, day_counters in data['days'].items():
+                if day >= first_day:
+                    for position, value in enumerate(day_counters):
+                        counters[position] += value
+            metrics[f'{days}d'] = compute_metrics(counters)
+
+        metrics['all'] = compute_metrics(data['all'])
+        return metrics
+
+    def _oldest_day(self) -> str:
+        """Самый старый день, который входит в наибольшее окно"""
+        return (get_moscow_time().date() - timedelta(days=self.windows[-1] - 1)).isoformat()
+
+    def _evict_old_days(self, groups: Dict[str, Dict]):
+        oldest_day = self._oldest_day()
+        for data in groups.values():
+            for day in [day for day in data['days'] if day < oldest_day]:
+                del data['days'][day]
+
+    @contextmanager
+    def _file_lock(self):
+        """Межпроцессная блокировка снимка на время чтения и записи"""
+        if fcntl is None:
+            yield
+            return
+
+        fd = os.open(self.snapshot_file + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
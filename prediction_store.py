@@ -0,0 +1,638 @@
+#!/usr/bin/env python3
+"""
+Хранилище прогнозов для системы ML-логов
+
+По умолчанию прогнозы пишутся в файл JSON Lines: одна строка - одна запись,
+поэтому запись прогноза стоит одной короткой операции дозаписи независимо от
+размера истории. Обновления результатов тоже дописываются отдельными
+строками и применяются при чтении; периодическое сжатие (compaction)
+переписывает файл атомарно через временный файл и os.replace.
+
+Альтернатива (настройка ml_storage_backend = 'sqlite') - база SQLite в режиме
+WAL с индексами под запросы дневной статистики и обновления результатов.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import ANALYSIS_SETTINGS
+
+try:
+    import fcntl
+except ImportError:  # Windows: межпроцессная блокировка недоступна
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Ключ строки-обновления: {"_update": "<timestamp прогноза>", "actual_result": ...}
+UPDATE_KEY = '_update'
+
+# Поля прогноза (PredictionResult) - колонки таблицы SQLite
+PREDICTION_FIELDS = (
+    'timestamp', 'sport_type', 'team1', 'team2', 'score_at_prediction', 'minute_at_prediction',
+    'league', 'recommendation', 'confidence', 'reasoning', 'coefficient', 'source',
+    'actual_result', 'final_score', 'match_duration', 'notes'
+)
+
+
+def _sport_win_rates(predictions) -> Dict[str, Dict]:
+    """Винрейт по видам спорта (как в by_sport дневной статистики)"""
+    by_sport = {}
+    for prediction in predictions:
+        data = by_sport.setdefault(prediction['sport_type'], {'total': 0, 'wins': 0, 'losses': 0})
+        data['total'] += 1
+        if prediction['actual_result'] == 'win':
+            data['wins'] += 1
+        elif prediction['actual_result'] == 'loss':
+            data['losses'] += 1
+
+    for data in by_sport.values():
+        data['win_rate'] = data['wins'] / data['total'] * 100
+    return by_sport
+
+
+class JsonlPredictionStore:
+    """
+    Append-only хранилище прогнозов (JSON Lines)
+
+    - fsync выполняется пачками (каждые N записей или T секунд) и при закрытии
+    - поврежденные строки (например, оборванная запись при сбое) пропускаются
+    - при первом запуске история переносится из старого JSON-массива
+    - запись из нескольких процессов (цикл анализа и add_result.py)
+      защищена блокировкой файла
+    """
+
+    def __init__(self, path: str = None, legacy_path: str = None, fsync_batch: int = None,
+                 fsync_interval: float = None, compact_after_updates: int = None):
+        self.path = path or ANALYSIS_SETTINGS.get('ml_log_file', 'ml_predictions_log.jsonl')
+        self.legacy_path = legacy_path if legacy_path is not None else ANALYSIS_SETTINGS.get(
+            'ml_legacy_log_file', 'ml_predictions_log.json')
+        self.fsync_batch = fsync_batch or ANALYSIS_SETTINGS.get('ml_fsync_batch', 20)
+        self.fsync_interval = fsync_interval if fsync_interval is not None else ANALYSIS_SETTINGS.get(
+            'ml_fsync_interval_seconds', 5)
+        self.compact_after_updates = compact_after_updates or ANALYSIS_SETTINGS.get(
+            'ml_compact_after_updates', 200)
+
+        self._fd = None
+        self._lock_fd = None
+        self._lock_depth = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._updates_written = 0
+        self._ready = False
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+
+    def append(self, record: Dict):
+        """Дописывает прогноз одной строкой"""
+        self._write_line(record)
+
+    def update(self, timestamp: str, fields: Dict) -> bool:
+        """
+        Обновляет поля прогноза (строка-обновление, без перезаписи файла)
+
+        Args:
+            timestamp (str): timestamp прогноза (уникальный ключ записи)
+            fields (Dict): Новые значения полей
+        """
+        self._write_line({UPDATE_KEY: timestamp, **fields})
+
+        with self._lock:
+            self._updates_written += 1
+            need_compaction = self._updates_written >= self.compact_after_updates
+
+        if need_compaction:
+            self.compact()
+        return True
+
+    def update_many(self, updates: Dict[str, Dict]) -> int:
+        """Обновляет несколько прогнозов: {timestamp: поля}"""
+        for timestamp, fields in updates.items():
+            self._write_line({UPDATE_KEY: timestamp, **fields}, sync=False)
+
+        with self._lock:
+            self._updates_written += len(updates)
+            need_compaction = self._updates_written >= self.compact_after_updates
+            self._sync_if_needed(force=True)
+
+        if need_compaction:
+            self.compact()
+        return len(updates)
+
+    def _write_line(self, record: Dict, sync: bool = True):
+        """Одна строка - один системный вызов write (O_APPEND)"""
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+
+        with self._lock:
+            self._ensure_ready()
+            with self._file_lock():
+                self._reopen_if_replaced()
+                os.write(self._fd, line)
+            self._unsynced += 1
+            if sync:
+                self._sync_if_needed()
+
+    def _sync_if_needed(self, force: bool = False):
+        """fsync пачками: каждые fsync_batch записей или fsync_interval секунд"""
+        if not self._unsynced or self._fd is None:
+            return
+        if force or self._unsynced >= self.fsync_batch or time.monotonic() - self._last_sync >= self.fsync_interval:
+            os.fsync(self._fd)
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def flush(self):
+        """Принудительный fsync всех записанных строк"""
+        with self._lock:
+            self._sync_if_needed(force=True)
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Строки файла как есть (прогнозы и обновления), поврежденные пропускаются"""
+        with self._lock:
+            self._ensure_ready()
+
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"⚠️ Пропущена поврежденная строка {line_number} в {self.path}")
+
+    def read_since(self, position: Optional[tuple], date: str = None) -> Tuple[List[Dict], Optional[tuple], bool]:
+        """
+        Записи (прогнозы и строки-обновления), дописанные после позиции position
+        
+        Args:
+            position (tuple): (inode, смещение) из предыдущего вызова или None
+            date (str): Не используется (общий интерфейс с SQLite)
+            
+        Returns:
+            Tuple: (записи, новая позиция, reset) - reset=True, если файл
+            прочитан с начала (первый вызов или замена файла сжатием)
+        """
+        with self._lock:
+            self._ensure_ready()
+
+        if not os.path.exists(self.path):
+            return [], None, position is not None
+
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            reset = position is None or position[0] != stat.st_ino or position[1] > stat.st_size
+            offset = 0 if reset else position[1]
+            f.seek(offset)
+            data = f.read()
+
+        # Недописанная последняя строка (запись в процессе) будет прочитана в следующий раз
+        end = data.rfind(b'\n') + 1
+        records = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"⚠️ Пропущена поврежденная строка в {self.path}")
+
+        return records, (stat.st_ino, offset + end), reset
+
+    def load(self) -> List[Dict]:
+        """Все прогнозы с примененными обновлениями (в порядке записи)"""
+        predictions = {}
+        updates = 0
+
+        for record in self.iter_records():
+            key = record.get(UPDATE_KEY)
+            if key is None:
+                predictions[record.get('timestamp')] = record
+                continue
+
+            updates += 1
+            prediction = predictions.get(key)
+            if prediction is not None:
+                prediction.update({field: value for field, value in record.items() if field != UPDATE_KEY})
+
+        with self._lock:
+            self._updates_written = updates
+
+        return list(predictions.values())
+
+    def iter_predictions(self) -> Iterator[Dict]:
+        """
+        Все прогнозы с обновлениями без загрузки истории в память
+
+        Первый проход собирает только строки-обновления (их число ограничено
+        сжатием), второй читает файл построчно и отдает прогнозы по одному.
+        """
+        updates = {}
+        for record in self.iter_records():
+            key = record.get(UPDATE_KEY)
+            if key is not None:
+                updates.setdefault(key, {}).update(
+                    {field: value for field, value in record.items() if field != UPDATE_KEY})
+
+        for record in self.iter_records():
+            if record.get(UPDATE_KEY) is None:
+                record.update(updates.get(record.get('timestamp'), {}))
+                yield record
+
+    def find_prediction(self, team1: str, team2: str, date: str) -> Optional[Dict]:
+        """Первый прогноз на матч за дату (YYYY-MM-DD)"""
+        for prediction in self.load():
+            if (prediction['team1'] == team1 and prediction['team2'] == team2
+                    and prediction['timestamp'].startswith(date)):
+                return prediction
+        return None
+
+    def predictions_for_date(self, date: str) -> List[Dict]:
+        """Прогнозы за дату (YYYY-MM-DD)"""
+        return list(self.iter_predictions_for_date(date))
+
+    def iter_predictions_for_date(self, date: str) -> Iterator[Dict]:
+        """Прогнозы за дату с обновлениями; в памяти только прогнозы этой даты"""
+        predictions = {}
+        for record in self.iter_records():
+            key = record.get(UPDATE_KEY)
+            if key is None:
+                if record.get('timestamp', '').startswith(date):
+                    predictions[record['timestamp']] = record
+                continue
+
+            prediction = predictions.get(key)
+            if prediction is not None:
+                prediction.update({field: value for field, value in record.items() if field != UPDATE_KEY})
+
+        yield from predictions.values()
+
+    def pending_predictions(self, since_date: str) -> List[Dict]:
+        """Прогнозы без результата начиная с даты (YYYY-MM-DD)"""
+        return [prediction for prediction in self.load()
+                if not prediction.get('actual_result') and prediction['timestamp'][:10] >= since_date]
+
+    def sport_win_rates(self, date: str = None) -> Dict[str, Dict]:
+        """Винрейт по видам спорта за дату (или за все время)"""
+        predictions = self.predictions_for_date(date) if date else self.load()
+        return _sport_win_rates(predictions)
+
+    # ------------------------------------------------------------------
+    # Сжатие, миграция, закрытие
+    # ------------------------------------------------------------------
+
+    def rewrite(self, predictions: List[Dict]):
+        """Атомарно заменяет содержимое хранилища (временный файл + os.replace)"""
+        with self._lock:
+            self._ensure_ready()
+            with self._file_lock():
+                self._write_atomically(self.path, predictions)
+                self._close_fd()
+            self._updates_written = 0
+
+    def compact(self):
+        """Сворачивает строки-обновления в сами прогнозы"""
+        # Блокировка на все время, чтобы не потерять строки, дописанные другим процессом
+        with self._lock, self._file_lock():
+            predictions = self.load()
+            self.rewrite(predictions)
+        logger.info(f"📦 ML лог: сжатие завершено ({len(predictions)} прогнозов)")
+
+    def close(self):
+        """fsync и закрытие файла"""
+        with self._lock:
+            self._sync_if_needed(force=True)
+            self._close_fd()
+
+    def _ensure_ready(self):
+        """Открывает файл, при первом запуске переносит историю из JSON-массива"""
+        if self._ready:
+            return
+        self._ready = True
+        self._migrate_legacy_log()
+
+    def _migrate_legacy_log(self):
+        """Перенос истории из ml_predictions_log.json (JSON-массив) в JSON Lines"""
+        if os.path.exists(self.path) or not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                predictions = json.load(f)
+
+            with self._file_lock():
+                self._write_atomically(self.path, predictions)
+            os.replace(self.legacy_path, self.legacy_path + '.migrated')
+
+            logger.info(f"📦 ML лог: {len(predictions)} прогнозов перенесено из {self.legacy_path} в {self.path}")
+        except Exception as e:
+            logger.error(f"Ошибка переноса ML лога из {self.legacy_path}: {e}")
+
+    @staticmethod
+    def _write_atomically(path: str, predictions: List[Dict]):
+        """Запись во временный файл, fsync и атомарная замена"""
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for prediction in predictions:
+                f.write(json.dumps(prediction, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def _reopen_if_replaced(self):
+        """Открывает файл заново, если его заменило сжатие (в том числе в другом процессе)"""
+        if self._fd is not None:
+            try:
+                if os.fstat(self._fd).st_ino == os.stat(self.path).st_ino:
+                    return
+            except FileNotFoundError:
+                pass
+            self._close_fd()
+
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _close_fd(self):
+        if self._fd is not None:
+            if self._unsynced:
+                os.fsync(self._fd)
+                self._unsynced = 0
+            os.close(self._fd)
+            self._fd = None
+
+    @contextmanager
+    def _file_lock(self):
+        """Межпроцессная блокировка на время записи и сжатия (повторно входимая в потоке)"""
+        if fcntl is None:
+            yield
+            return
+
+        with self._lock:
+            if self._lock_depth == 0:
+                if self._lock_fd is None:
+                    self._lock_fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+
+class SqlitePredictionStore:
+    """
+    Хранилище прогнозов в SQLite (тот же интерфейс, что у JsonlPredictionStore)
+
+    - режим WAL: цикл анализа и add_result.py пишут одновременно
+    - индексы (date, sport_type), (team1, team2, date) и actual_result:
+      дневная статистика, поиск прогноза для результата и винрейт по видам
+      спорта - индексные запросы без чтения всей истории
+    - при первом запуске история переносится из JSON Lines или JSON-массива
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS predictions (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            sport_type TEXT, team1 TEXT, team2 TEXT,
+            score_at_prediction TEXT, minute_at_prediction TEXT, league TEXT,
+            recommendation TEXT, confidence REAL, reasoning TEXT, coefficient TEXT, source TEXT,
+            actual_result TEXT DEFAULT '', final_score TEXT DEFAULT '',
+            match_duration TEXT DEFAULT '', notes TEXT DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS idx_predictions_date_sport ON predictions (date, sport_type);
+        CREATE INDEX IF NOT EXISTS idx_predictions_teams_date ON predictions (team1, team2, date);
+        CREATE INDEX IF NOT EXISTS idx_predictions_result ON predictions (actual_result);
+        CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions (timestamp);
+    """
+
+    def __init__(self, path: str = None, jsonl_path: str = None, legacy_path: str = None):
+        self.path = path or ANALYSIS_SETTINGS.get('ml_sqlite_file', 'ml_predictions.db')
+        self.jsonl_path = jsonl_path if jsonl_path is not None else ANALYSIS_SETTINGS.get(
+            'ml_log_file', 'ml_predictions_log.jsonl')
+        self.legacy_path = legacy_path if legacy_path is not None else ANALYSIS_SETTINGS.get(
+            'ml_legacy_log_file', 'ml_predictions_log.json')
+
+        self._connection = None
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+
+    def append(self, record: Dict):
+        """Добавляет прогноз"""
+        with self._lock, self._connect() as connection:
+            self._insert(connection, [record])
+
+    def update(self, timestamp: str, fields: Dict) -> bool:
+        """Обновляет поля прогноза по его timestamp"""
+        with self._lock, self._connect() as connection:
+            return self._update(connection, timestamp, fields) > 0
+
+    def update_many(self, updates: Dict[str, Dict]) -> int:
+        """Обновляет несколько прогнозов одной транзакцией: {timestamp: поля}"""
+        with self._lock, self._connect() as connection:
+            return sum(self._update(connection, timestamp, fields) for timestamp, fields in updates.items())
+
+    def flush(self):
+        """Каждая запись - отдельная транзакция, дополнительный сброс не нужен"""
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+
+    def load(self) -> List[Dict]:
+        """Все прогнозы в порядке записи"""
+        return self._select("1 = 1")
+
+    def find_prediction(self, team1: str, team2: str, date: str) -> Optional[Dict]:
+        """Первый прогноз на матч за дату (индекс team1, team2, date)"""
+        found = self._select("team1 = ? AND team2 = ? AND date = ?", (team1, team2, date), limit=1)
+        return found[0] if found else None
+
+    def predictions_for_date(self, date: str) -> List[Dict]:
+        """Прогнозы за дату (индекс date, sport_type)"""
+        return self._select("date = ?", (date,))
+
+    def iter_predictions(self, batch_size: int = 500) -> Iterator[Dict]:
+        """Все прогнозы в порядке записи порциями по batch_size строк (курсор)"""
+        return self._iter_select("1 = 1", (), batch_size)
+
+    def iter_predictions_for_date(self, date: str, batch_size: int = 500) -> Iterator[Dict]:
+        """Прогнозы за дату порциями по batch_size строк"""
+        return self._iter_select("date = ?", (date,), batch_size)
+
+    def pending_predictions(self, since_date: str) -> List[Dict]:
+        """Прогнозы без результата начиная с даты (индекс actual_result)"""
+        return self._select("actual_result = '' AND date >= ?", (since_date,))
+
+    def read_since(self, position: Optional[tuple], date: str) -> Tuple[List[Dict], tuple, bool]:
+        """
+        Изменения после позиции position (интерфейс JsonlPredictionStore)
+        
+        SQLite не хранит журнал изменений, поэтому при любом изменении базы
+        (в этом или другом процессе) возвращаются все прогнозы за дату с reset=True.
+        """
+        with self._lock:
+            connection = self._connect()
+            current = (connection.execute("PRAGMA data_version").fetchone()[0], connection.total_changes)
+        if position == current:
+            return [], current, False
+        return self.predictions_for_date(date), current, True
+
+    def sport_win_rates(self, date: str = None) -> Dict[str, Dict]:
+        """Винрейт по видам спорта за дату (или за все время) одним GROUP BY"""
+        where, params = ("WHERE date = ?", (date,)) if date else ("", ())
+        query = f"""
+            SELECT sport_type, COUNT(*),
+                   SUM(actual_result = 'win'), SUM(actual_result = 'loss')
+            FROM predictions {where}
+            GROUP BY sport_type
+        """
+        with self._lock:
+            rows = self._connect().execute(query, params).fetchall()
+
+        return {
+            sport: {'total': total, 'wins': wins, 'losses': losses, 'win_rate': wins / total * 100}
+            for sport, total, wins, losses in rows
+        }
+
+    # ------------------------------------------------------------------
+    # Обслуживание
+    # ------------------------------------------------------------------
+
+    def rewrite(self, predictions: List[Dict]):
+        """Заменяет содержимое хранилища одной транзакцией"""
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM predictions")
+            self._insert(connection, predictions)
+
+    def compact(self):
+        """Переносит WAL в основной файл базы"""
+        with self._lock:
+            self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        """Закрывает соединение"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Соединение открывается один раз (при первом обращении) и создает схему"""
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(self.SCHEMA)
+            self._connection = connection
+            self._migrate_legacy_log()
+        return self._connection
+
+    def _migrate_legacy_log(self):
+        """Перенос истории из JSON Lines (или старого JSON-массива) в пустую базу"""
+        source = next((path for path in (self.jsonl_path, self.legacy_path) if path and os.path.exists(path)), None)
+        if source is None:
+            return
+
+        try:
+            connection = self._connection
+            # BEGIN IMMEDIATE: второй процесс дождется окончания переноса и увидит непустую базу
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                if connection.execute("SELECT 1 FROM predictions LIMIT 1").fetchone():
+                    connection.rollback()
+                    return
+
+                if source == self.jsonl_path:
+                    predictions = JsonlPredictionStore(source, legacy_path='').load()
+                else:
+                    with open(source, 'r', encoding='utf-8') as f:
+                        predictions = json.load(f)
+
+                self._insert(connection, predictions)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+            os.replace(source, source + '.migrated')
+            logger.info(f"📦 ML лог: {len(predictions)} прогнозов перенесено из {source} в {self.path}")
+        except Exception as e:
+            logger.error(f"Ошибка переноса ML лога из {source}: {e}")
+
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, predictions: List[Dict]):
+        columns = ('date',) + PREDICTION_FIELDS
+        placeholders = ', '.join('?' * len(columns))
+        connection.executemany(
+            f"INSERT INTO predictions ({', '.join(columns)}) VALUES ({placeholders})",
+            [(prediction['timestamp'][:10],) + tuple(prediction.get(field, '') for field in PREDICTION_FIELDS)
+             for prediction in predictions]
+        )
+
+    @staticmethod
+    def _update(connection: sqlite3.Connection, timestamp: str, fields: Dict) -> int:
+        columns = [field for field in fields if field in PREDICTION_FIELDS and field != 'timestamp']
+        if not columns:
+            return 0
+        assignments = ', '.join(f"{column} = ?" for column in columns)
+        cursor = connection.execute(
+            f"UPDATE predictions SET {assignments} WHERE timestamp = ?",
+            [fields[column] for column in columns] + [timestamp]
+        )
+        return cursor.rowcount
+
+    def _iter_select(self, where: str, params: tuple, batch_size: int) -> Iterator[Dict]:
+        query = f"SELECT {', '.join(PREDICTION_FIELDS)} FROM predictions WHERE {where} ORDER BY id"
+        with self._lock:
+            cursor = self._connect().execute(query, params)
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield dict(row)
+        finally:
+            cursor.close()
+
+    def _select(self, where: str, params: tuple = (), limit: int = None) -> List[Dict]:
+        query = f"SELECT {', '.join(PREDICTION_FIELDS)} FROM predictions WHERE {where} ORDER BY id"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._connect().execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+
+def create_prediction_store():
+    """Хранилище прогнозов по настройке ml_storage_backend (jsonl / sqlite)"""
+    backend = ANALYSIS_SETTINGS.get('ml_storage_backend', 'jsonl')
+    if backend == 'sqlite':
+        return SqlitePredictionStore()
+    if backend != 'jsonl':
+        logger.warning(f"⚠️ Неизвестный бэкенд ML лога '{backend}', используется jsonl")
+    return JsonlPredictionStore()
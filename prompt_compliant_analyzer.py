@@ -5,28 +5,33 @@
 
 import json
 import logging
-import time
 from typing import List, Dict, Any, Optional
 from openai import OpenAI
 from multi_source_controller import MatchData
 from moscow_time import format_moscow_time_for_telegram
+from llm_cache import llm_cache, match_fingerprint
+from llm_executor import estimate_tokens, llm_executor
+from llm_stream import RejectionRule, complete_chat
 
 logger = logging.getLogger(__name__)
 
+# Версия шаблона промпта в ключе кэша LLM (увеличить при изменении промпта)
+PROMPT_TEMPLATE = 'prompt_compliant_football/1'
+
+# Отказ в ответе (те же условия, что в _process_football_analysis)
+REJECTION_RULE = RejectionRule(required_true=('meets_criteria',), min_confidence=0.75)
+
 class PromptCompliantAnalyzer:
     """
     Анализатор, строго следующий промпту пользователя
     """
     
     def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
+        # Повторы и лимиты запросов - в общем исполнителе (llm_executor)
+        self.client = OpenAI(api_key=api_key, max_retries=0)
         self.logger = logging.getLogger(self.__class__.__name__)
         self.model = "gpt-4o-mini"
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 2.0
-        
     def analyze_football_matches(self, matches: List[MatchData]) -> List[MatchData]:
         """
         Анализ футбольных матчей строго по промпту
@@ -40,16 +45,16 @@ class PromptCompliantAnalyzer:
         if not filtered_matches:
             return []
         
-        recommendations = []
-        
-        # Анализируем каждый матч по критериям промпта
-        for match in filtered_matches[:5]:  # Максимум 5 матчей
+        def analyze(match):
             try:
-                recommendation = self._analyze_football_match_by_prompt(match)
-                if recommendation:
-                    recommendations.append(recommendation)
+                return self._analyze_football_match_by_prompt(match)
             except Exception as e:
                 self.logger.error(f"Ошибка анализа {match.team1} vs {match.team2}: {e}")
+                return None
+        
+        # Анализируем каждый матч по критериям промпта (запросы параллельно)
+        results = llm_executor.map(analyze, filtered_matches[:5])  # Максимум 5 матчей
+        recommendations = [r for r in results if r]
         
         return recommendations
     
@@ -115,8 +120,11 @@ class PromptCompliantAnalyzer:
             Если матч НЕ соответствует критериям, верни "meets_criteria": false.
             """
             
-            # Вызываем OpenAI для анализа
-            response = self._call_openai_with_rate_limit(analysis_prompt)
+            # Вызываем OpenAI для анализа (матч с тем же счетом и отрезком времени - из кэша)
+            response = llm_cache.get_or_call(
+                self.model, PROMPT_TEMPLATE, match_fingerprint(match, 'football'),
+                lambda: self._call_openai_with_rate_limit(analysis_prompt)
+            )
             
             # Обрабатываем ответ
             recommendation = self._process_football_analysis(response, match)
@@ -128,26 +136,24 @@ class PromptCompliantAnalyzer:
             return None
     
     def _call_openai_with_rate_limit(self, prompt: str) -> str:
-        """Вызов OpenAI с соблюдением лимитов"""
-        # Rate limiting
-        time_since_last = time.time() - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last)
-        
+        """Вызов OpenAI (лимиты и повторы - в llm_executor, отказ прерывает поток ответа)"""
+        system_prompt = "Ты профессиональный аналитик спортивных ставок."
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "Ты профессиональный аналитик спортивных ставок."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=200,  # Короткие ответы по промпту
-                temperature=0.3,
-                timeout=30
+            response = llm_executor.call(
+                lambda: complete_chat(
+                    self.client, REJECTION_RULE,
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=200,  # Короткие ответы по промпту
+                    temperature=0.3,
+                    timeout=30
+                ),
+                tokens=estimate_tokens(system_prompt, prompt, max_tokens=200)
             )
-            
-            self.last_request_time = time.time()
-            return response.choices[0].message.content
+            return response.text
             
         except Exception as e:
             self.logger.error(f"Ошибка OpenAI запроса: {e}")
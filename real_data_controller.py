@@ -6,30 +6,20 @@ import requests
 import time
 import json
 from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
-from bs4 import BeautifulSoup
+from match_record import MatchRecord
+from html_backend import parse_html
 import re
 from urllib.parse import urljoin
 import logging
+from fetch_engine import fetch_engine
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class MatchData:
-    """Структура данных о матче"""
-    team1: str
-    team2: str
-    score: str
-    minute: str
-    coefficient: float
-    is_locked: bool
-    sport_type: str
-    league: str = ""
-    url: str = ""
-    status: str = ""
+# Единая запись матча для всех контроллеров (__slots__, общая таблица строк)
+MatchData = MatchRecord
 
 
 class RealDataController:
@@ -68,21 +58,12 @@ class RealDataController:
     
     def get_page_content(self, url: str, timeout: int = 30) -> Optional[str]:
         """Получение содержимого страницы"""
-        try:
-            logger.info(f"Запрос к: {url}")
-            response = self.session.get(url, timeout=timeout)
-            response.raise_for_status()
-            
-            # Проверяем кодировку
-            if response.encoding == 'ISO-8859-1':
-                response.encoding = 'utf-8'
-            
-            logger.info(f"Получен ответ: {len(response.text)} символов")
-            return response.text
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка HTTP запроса к {url}: {e}")
-            return None
+        logger.info(f"Запрос к: {url}")
+        html = fetch_engine.fetch(url, headers=self.session.headers, timeout=timeout)
+        
+        if html is not None:
+            logger.info(f"Получен ответ: {len(html)} символов")
+        return html
     
     def parse_scores24_matches(self, html: str, sport_type: str) -> List[MatchData]:
         """Парсинг матчей с Scores24.live"""
@@ -90,11 +71,11 @@ class RealDataController:
             return []
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            document = parse_html(html)
             matches = []
             
             # Ищем контейнеры матчей
-            match_containers = soup.select('.sc-17qxh4e-0.dHxDFU')
+            match_containers = document.select('.sc-17qxh4e-0.dHxDFU')
             
             logger.info(f"Найдено {len(match_containers)} контейнеров матчей на Scores24")
             
@@ -169,11 +150,11 @@ class RealDataController:
             return []
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            document = parse_html(html)
             matches = []
             
             # Ищем контейнеры матчей (нужно определить правильные селекторы)
-            match_containers = soup.select('.event-item, .match-item, .sport-event')
+            match_containers = document.select('.event-item, .match-item, .sport-event')
             
             logger.info(f"Найдено {len(match_containers)} контейнеров матчей на Winline")
             
@@ -238,7 +219,7 @@ class RealDataController:
                 sport_type=sport_type,
                 league=league,
                 url=url,
-                status="live" if "live" in container.get('class', []) else ""
+                status="live" if container.has_class('live') else ""
             )
             
         except Exception as e:
@@ -253,6 +234,10 @@ class RealDataController:
             return []
         
         html = self.get_page_content(url)
+        return self._parse_site_matches(html, site, sport_type)
+    
+    def _parse_site_matches(self, html: Optional[str], site: str, sport_type: str) -> List[MatchData]:
+        """Парсинг страницы сайта в список матчей"""
         if not html:
             return []
         
@@ -268,18 +253,31 @@ class RealDataController:
     
     def get_all_live_matches(self, sport_type: str) -> List[MatchData]:
         """Получение live-матчей со всех сайтов"""
-        all_matches = []
+        return self.get_all_sports_live_matches([sport_type]).get(sport_type, [])
+    
+    def get_all_sports_live_matches(self, sports: List[str] = None) -> Dict[str, List[MatchData]]:
+        """Получение live-матчей со всех сайтов по нескольким видам спорта (все страницы загружаются параллельно)"""
+        sports = sports or ['football', 'tennis', 'table_tennis', 'handball']
+        sites = ['scores24', 'winline']
         
-        for site in ['scores24', 'winline']:
-            try:
-                matches = self.get_live_matches(site, sport_type)
-                all_matches.extend(matches)
-                time.sleep(1)  # Пауза между запросами
-            except Exception as e:
-                logger.error(f"Ошибка получения матчей с {site}: {e}")
-                continue
+        pages = fetch_engine.fetch_many(
+            (self.urls.get(site, {}).get(sport) for site in sites for sport in sports),
+            headers=self.session.headers
+        )
+        
+        results = {}
+        for sport in sports:
+            all_matches = []
+            for site in sites:
+                try:
+                    html = pages.get(self.urls.get(site, {}).get(sport))
+                    all_matches.extend(self._parse_site_matches(html, site, sport))
+                except Exception as e:
+                    logger.error(f"Ошибка получения матчей с {site}: {e}")
+                    continue
+            results[sport] = all_matches
         
-        return all_matches
+        return results
     
     def test_site_accessibility(self) -> Dict[str, bool]:
         """Тестирование доступности сайтов"""
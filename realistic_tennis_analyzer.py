@@ -5,27 +5,32 @@
 
 import json
 import logging
-import time
 from typing import List, Optional
 from openai import OpenAI
 from multi_source_controller import MatchData
+from llm_cache import llm_cache, match_fingerprint
+from llm_executor import estimate_tokens, llm_executor
+from llm_stream import RejectionRule, complete_chat
 
 logger = logging.getLogger(__name__)
 
+# Версия шаблона промпта в ключе кэша LLM (увеличить при изменении промпта)
+PROMPT_TEMPLATE = 'realistic_tennis/1'
+
+# Отказ в ответе (те же условия, что в _process_tennis_response)
+REJECTION_RULE = RejectionRule(rejected_values={'recommendation': 'НЕТ'}, min_confidence=0.70)
+
 class RealisticTennisAnalyzer:
     """
     Анализатор тенниса с реалистичными критериями
     """
     
     def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
+        # Повторы и лимиты запросов - в общем исполнителе (llm_executor)
+        self.client = OpenAI(api_key=api_key, max_retries=0)
         self.logger = logging.getLogger(self.__class__.__name__)
         self.model = "gpt-4o-mini"
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 2.0
-        
     def analyze_tennis_matches_realistic(self, matches: List[MatchData], sport_type: str) -> List[MatchData]:
         """
         Реалистичный анализ теннисных матчей
@@ -35,20 +40,16 @@ class RealisticTennisAnalyzer:
         
         self.logger.info(f"🎾 Реалистичный анализ {sport_type}: {len(matches)} матчей")
         
-        recommendations = []
-        
-        # Анализируем каждый подходящий матч
-        for match in matches[:3]:  # Максимум 3 матча
+        def analyze(match):
             try:
-                recommendation = self._analyze_tennis_match_realistic(match, sport_type)
-                if recommendation:
-                    recommendations.append(recommendation)
-                    
-                time.sleep(1)  # Пауза между анализами
-                
+                return self._analyze_tennis_match_realistic(match, sport_type)
             except Exception as e:
                 self.logger.error(f"Ошибка анализа {match.team1} vs {match.team2}: {e}")
-                continue
+                return None
+        
+        # Анализируем каждый подходящий матч (запросы параллельно)
+        results = llm_executor.map(analyze, matches[:3])  # Максимум 3 матча
+        recommendations = [r for r in results if r]
         
         self.logger.info(f"🎾 Найдено {len(recommendations)} рекомендаций по {sport_type}")
         return recommendations
@@ -59,8 +60,11 @@ class RealisticTennisAnalyzer:
             # Создаем реалистичный промпт
             prompt = self._create_realistic_tennis_prompt(match, sport_type)
             
-            # Вызываем OpenAI
-            response = self._call_openai_with_rate_limit(prompt)
+            # Вызываем OpenAI (матч с тем же счетом и сетом - из кэша)
+            response = llm_cache.get_or_call(
+                self.model, PROMPT_TEMPLATE, match_fingerprint(match, sport_type),
+                lambda: self._call_openai_with_rate_limit(prompt)
+            )
             
             # Обрабатываем ответ
             recommendation = self._process_tennis_response(response, match, sport_type)
@@ -118,26 +122,24 @@ class RealisticTennisAnalyzer:
         return base_info
     
     def _call_openai_with_rate_limit(self, prompt: str) -> str:
-        """Вызов OpenAI с rate limiting"""
-        # Rate limiting
-        time_since_last = time.time() - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last)
-        
+        """Вызов OpenAI (лимиты и повторы - в llm_executor, отказ прерывает поток ответа)"""
+        system_prompt = "Ты эксперт по теннисным ставкам. Анализируй реалистично на основе доступных данных."
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "Ты эксперт по теннисным ставкам. Анализируй реалистично на основе доступных данных."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=200,
-                temperature=0.2,
-                timeout=30
+            response = llm_executor.call(
+                lambda: complete_chat(
+                    self.client, REJECTION_RULE,
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=200,
+                    temperature=0.2,
+                    timeout=30
+                ),
+                tokens=estimate_tokens(system_prompt, prompt, max_tokens=200)
             )
-            
-            self.last_request_time = time.time()
-            return response.choices[0].message.content
+            return response.text
             
         except Exception as e:
             self.logger.error(f"Ошибка OpenAI запроса: {e}")
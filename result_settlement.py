@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Автоматический расчет результатов прогнозов
+
+Воркер периодически (с низкой частотой) загружает страницы завершенных
+матчей Scores24 одним пакетом - только для видов спорта, по которым есть
+нерассчитанные прогнозы, - сопоставляет их с прогнозами, определяет исход
+ставки по итоговому счету и записывает результаты одним пакетным обновлением.
+"""
+
+import logging
+import re
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+import schedule
+
+from config import ANALYSIS_SETTINGS
+from enhanced_real_controller import EnhancedRealDataController
+from fuzzy_matcher import FuzzyMatcher
+from ml_tracking_system import ml_tracker
+from moscow_time import get_moscow_time
+from name_pool import name_pool
+
+logger = logging.getLogger(__name__)
+
+# Вид спорта прогноза -> страница завершенных матчей Scores24
+SETTLEMENT_SPORTS = {
+    'football': 'football',
+    'tennis': 'tennis',
+    'table_tennis': 'table_tennis',
+    'handball': 'handball',
+    'handball_totals': 'handball',
+}
+
+PLAYER_SPORTS = ('tennis', 'table_tennis')
+
+_SCORE_PATTERN = re.compile(r'(\d+)\s*[:\-]\s*(\d+)')
+_TOTAL_PATTERN = re.compile(r'^(ТБ|ТМ)\s*\(?\s*(\d+(?:[.,]\d+)?)')
+
+
+def parse_final_score(score: str) -> Optional[Tuple[int, int]]:
+    """Итоговый счет "2:1" -> (2, 1)"""
+    match = _SCORE_PATTERN.search(score or '')
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def _winner_side(name: str, team1: str, team2: str) -> Optional[int]:
+    """
+    Сторона из рекомендации "Победа <имя>": 1, 2 или None
+
+    Нормализованное имя должно совпасть с названием стороны целиком или
+    целыми словами (фамилия игрока). Если имя подходит обеим сторонам
+    (общая фамилия), сторона не определяется.
+    """
+    winner = name_pool.normalized(name.strip())
+    if not winner:
+        return None
+
+    words = set(winner.split())
+    sides = [number for number, team in ((1, team1), (2, team2))
+             if words <= set(name_pool.normalized(team or '').split())]
+    return sides[0] if len(sides) == 1 else None
+
+
+def settle_outcome(recommendation: str, team1: str, team2: str, score: Tuple[int, int]) -> Optional[str]:
+    """
+    Исход ставки по итоговому счету
+
+    Args:
+        recommendation (str): Рекомендация (П1, П2, Победа <команда>, ТБ X, ТМ X)
+        team1 (str): Первая команда прогноза
+        team2 (str): Вторая команда прогноза
+        score (Tuple[int, int]): Итоговый счет
+
+    Returns:
+        Optional[str]: 'win', 'loss', 'push' или None (ставку нельзя рассчитать автоматически)
+    """
+    text = (recommendation or '').strip()
+    upper = text.upper()
+    home, away = score
+
+    total = _TOTAL_PATTERN.match(upper)
+    if total:
+        line = float(total.group(2).replace(',', '.'))
+        goals = home + away
+        if goals == line:
+            return 'push'
+        over = goals > line
+        return 'win' if over == (total.group(1) == 'ТБ') else 'loss'
+
+    side = None
+    if upper.startswith('П1'):
+        side = 1
+    elif upper.startswith('П2'):
+        side = 2
+    elif upper.startswith('ПОБЕДА'):
+        side = _winner_side(text[len('Победа'):], team1, team2)
+
+    if side is None:
+        return None
+
+    if home == away:
+        return 'loss'
+    return 'win' if (home > away) == (side == 1) else 'loss'
+
+
+class ResultSettlementWorker:
+    """Воркер расчета результатов по завершенным матчам Scores24"""
+
+    def __init__(self, tracker=None, controller=None, matcher=None):
+        self.tracker = tracker or ml_tracker
+        self.controller = controller or EnhancedRealDataController()
+        self.matcher = matcher or FuzzyMatcher()
+        self.interval_minutes = ANALYSIS_SETTINGS.get('settlement_interval_minutes', 30)
+        self.lookback_hours = ANALYSIS_SETTINGS.get('settlement_lookback_hours', 48)
+
+    def setup_job(self):
+        """Планирует расчет результатов (выполняется в общем цикле schedule.run_pending)"""
+        schedule.every(self.interval_minutes).minutes.do(self.run_once)
+        logger.info(f"🧾 Запланирован расчет результатов каждые {self.interval_minutes} минут")
+
+    def run_once(self) -> int:
+        """
+        Один проход расчета
+
+        Returns:
+            int: Количество рассчитанных прогнозов
+        """
+        try:
+            since = get_moscow_time() - timedelta(hours=self.lookback_hours)
+            pending = self.tracker.store.pending_predictions(since.strftime("%Y-%m-%d"))
+
+            by_sport: Dict[str, List[Dict]] = {}
+            for prediction in pending:
+                sport = SETTLEMENT_SPORTS.get(prediction.get('sport_type'))
+                if sport:
+                    by_sport.setdefault(sport, []).append(prediction)
+
+            if not by_sport:
+                return 0
+
+            # Одна пачка запросов на все нужные виды спорта
+            finished = self.controller.get_finished_matches_batch(list(by_sport))
+
+            settlements = []
+            for sport, predictions in by_sport.items():
+                settlements.extend(self._settle_sport(sport, predictions, finished.get(sport, [])))
+
+            settled = self.tracker.settle_predictions(settlements)
+            if settled:
+                logger.info(f"🧾 Рассчитано прогнозов: {settled} из {len(pending)} ожидающих")
+            return settled
+
+        except Exception as e:
+            logger.error(f"Ошибка расчета результатов: {e}")
+            return 0
+
+    def _settle_sport(self, sport: str, predictions: List[Dict], finished_matches: List) -> List[Tuple]:
+        """
+        Сопоставляет прогнозы одного вида спорта с завершенными матчами
+
+        На один матч бывает несколько прогнозов (исход и тотал, повторные
+        прогнозы следующих циклов), а pair_events назначает каждому матчу
+        одну пару. Поэтому сопоставляются уникальные пары команд, а
+        найденный матч рассчитывает все прогнозы своей группы.
+        """
+        if not finished_matches:
+            return []
+
+        groups: Dict[Tuple[str, str], List[Dict]] = {}
+        for prediction in predictions:
+            groups.setdefault((prediction['team1'], prediction['team2']), []).append(prediction)
+        teams = [{'team1': team1, 'team2': team2} for team1, team2 in groups]
+
+        settlements = []
+        pairs = self.matcher.pair_events(teams, finished_matches, players=sport in PLAYER_SPORTS)
+        for event, match, _ in pairs:
+            score = parse_final_score(match.score)
+            if score is None:
+                continue
+
+            for prediction in groups[(event['team1'], event['team2'])]:
+                outcome = settle_outcome(prediction['recommendation'], prediction['team1'], prediction['team2'],
+                                         score)
+                if outcome is None:
+                    continue
+
+                settlements.append((prediction, outcome, match.score,
+                                    f"Авторасчет: {match.team1} - {match.team2} {match.score}"))
+        return settlements
+
+
+# Глобальный экземпляр
+result_settlement_worker = ResultSettlementWorker()
@@ -8,6 +8,7 @@ from typing import List, Dict
 from enhanced_real_controller import EnhancedRealDataController
 from multi_source_controller import MatchData
 from moscow_time import filter_live_matches_by_time
+from name_pool import name_pool
 
 logger = logging.getLogger(__name__)
 
@@ -60,7 +61,7 @@ class Scores24OnlyController:
         Приоритизирует матчи по качеству лиги (по промпту)
         """
         def get_league_priority(match):
-            league = getattr(match, 'league', '').lower()
+            league = name_pool.lower(getattr(match, 'league', ''))
             
             if sport_type == 'football':
                 # Топ-лиги футбола (высший приоритет)
@@ -4,6 +4,7 @@
 
 import sys
 import os
+import tempfile
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from main import LiveBettingAnalyzer
@@ -68,12 +69,16 @@ def test_analyzers():
 
 def test_report_generation():
     """Тест генерации отчета"""
+    from fuzzy_matcher import NameAliasTable
+    
     analyzer = LiveBettingAnalyzer()
     
     print("\nТест генерации отчета:")
     
-    # Запускаем анализ
-    analyzer.run_single_analysis()
+    # Запускаем анализ (таблица псевдонимов сохраняется во временный каталог)
+    with tempfile.TemporaryDirectory() as directory:
+        analyzer.fuzzy_matcher.aliases = NameAliasTable(os.path.join(directory, 'aliases.json'))
+        analyzer.run_single_analysis()
     
     # Генерируем отчет
     report = analyzer.report_generator.generate_telegram_report()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Тест однопроходной и инкрементальной дневной статистики
+"""
+
+import json
+import os
+import tempfile
+from daily_stats_aggregator import DailyStatsAggregator
+from ml_tracking_system import MLTrackingSystem
+from moscow_time import get_moscow_time
+from performance_metrics import PerformanceMetrics
+from prediction_store import JsonlPredictionStore
+
+
+def _prediction(timestamp, sport_type="football", confidence=0.9, actual_result="", source="betzona"):
+    return {'timestamp': timestamp, 'sport_type': sport_type, 'team1': "Спартак", 'team2': "ЦСКА",
+            'recommendation': 'П1', 'confidence': confidence, 'actual_result': actual_result,
+            'final_score': '', 'notes': '', 'source': source}
+
+
+def test_single_pass_stats():
+    """Счетчики по видам спорта, уверенности и источникам за один проход"""
+    aggregator = DailyStatsAggregator('2025-01-01')
+    aggregator.add_many([
+        _prediction('2025-01-01T10:00:00', 'tennis', 0.8, 'win', 'scores24'),
+        _prediction('2025-01-01T11:00:00', 'football', 0.9, 'loss'),
+        _prediction('2025-01-01T12:00:00', 'football', 0.9, 'win'),
+        _prediction('2025-01-01T13:00:00', 'handball_totals', 0.7),
+    ])
+    aggregator.apply_update('2025-01-01T13:00:00', {'actual_result': 'push'})
+    stats = aggregator.to_stats()
+
+    print(f"Всего: {stats['total_predictions']}, винрейт: {stats['win_rate']:.1f}%")
+    assert stats['total_predictions'] == 4
+    assert stats['predictions_with_results'] == 4
+    assert (stats['wins'], stats['losses']) == (2, 1)
+    assert list(stats['by_sport']) == ['football', 'tennis']
+    assert stats['by_sport']['football']['win_rate'] == 50.0
+    assert len(stats['by_sport']['football']['predictions']) == 2
+    assert stats['by_confidence']['high_confidence']['count'] == 2
+    assert stats['by_confidence']['medium_confidence']['wins'] == 1
+    assert stats['by_confidence']['low_confidence']['threshold'] == '<75%'
+    assert stats['by_source']['betzona']['total'] == 3
+
+
+def test_incremental_refresh():
+    """Повторная статистика дочитывает только новые строки хранилища"""
+    today = get_moscow_time().strftime("%Y-%m-%d")
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = MLTrackingSystem()
+        tracker.store = JsonlPredictionStore(os.path.join(tmp, 'log.jsonl'), legacy_path='')
+        tracker.daily_stats_file = os.path.join(tmp, 'daily_stats.json')
+
+        tracker.store.append(_prediction('2020-01-01T10:00:00'))
+        for hour in range(10, 13):
+            tracker.store.append(_prediction(f'{today}T{hour}:00:00'))
+        assert tracker.generate_daily_stats()['total_predictions'] == 3
+        aggregator = tracker._daily_aggregator
+
+        tracker.store.append(_prediction(f'{today}T13:00:00', 'tennis'))
+        tracker.store.update(f'{today}T10:00:00', {'actual_result': 'win'})
+        records, _, reset = tracker.store.read_since(tracker._daily_position)
+        assert len(records) == 2 and not reset
+
+        stats = tracker.generate_daily_stats()
+        assert tracker._daily_aggregator is aggregator
+        assert (stats['total_predictions'], stats['wins']) == (4, 1)
+
+        # После сжатия файл заменен - статистика пересчитывается с начала
+        tracker.store.compact()
+        stats = tracker.generate_daily_stats()
+        print(f"После сжатия: {stats['total_predictions']} прогнозов, {stats['wins']} выигрыш")
+        assert (stats['total_predictions'], stats['wins']) == (4, 1)
+        tracker.store.close()
+
+
+def test_report_streams_details_from_store():
+    """В статистике только timestamp прогнозов, снимок на диске без прогнозов"""
+    today = get_moscow_time().strftime("%Y-%m-%d")
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = MLTrackingSystem()
+        tracker.store = JsonlPredictionStore(os.path.join(tmp, 'log.jsonl'), legacy_path='')
+        tracker.daily_stats_file = os.path.join(tmp, 'daily_stats.json')
+        tracker.metrics = PerformanceMetrics(os.path.join(tmp, 'metrics.json'), loader=tracker.store.load)
+
+        for hour in range(10, 13):
+            tracker.store.append(_prediction(f'{today}T{hour}:00:00'))
+        tracker.store.update(f'{today}T11:00:00', {'actual_result': 'win', 'notes': "Гол на 90'"})
+
+        stats = tracker.generate_daily_stats()
+        assert stats['predictions'] == [f'{today}T{hour}:00:00' for hour in range(10, 13)]
+        assert stats['by_sport']['football']['predictions'] == stats['predictions']
+
+        with open(tracker.daily_stats_file, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        assert 'predictions' not in snapshot and 'predictions' not in snapshot['by_sport']['football']
+        assert snapshot['total_predictions'] == 3
+
+        report = tracker.format_daily_stats_for_telegram(stats)
+        assert "1. ⚽ Спартак vs ЦСКА" in report and "2. ⚽" not in report
+        assert "Заметка: Гол на 90'" in report
+        tracker.store.close()
+
+
+if __name__ == "__main__":
+    test_single_pass_stats()
+    test_incremental_refresh()
+    test_report_streams_details_from_store()
+    print("✅ Тесты дневной статистики пройдены")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Тест пакетного анализа EnhancedOpenAIAnalyzer
+"""
+
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+import enhanced_openai_analyzer
+from enhanced_openai_analyzer import EnhancedOpenAIAnalyzer, validate_analysis
+from llm_cache import LLMResponseCache
+from multi_source_controller import MatchData
+
+
+class FakeCompletions:
+    """Клиент OpenAI: пакетный ответ с одним некорректным элементом, одиночные ответы (потоком)"""
+
+    def __init__(self):
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        if kwargs.get('response_format'):
+            content = json.dumps({"matches": [
+                {"id": 1, "is_favorite": True, "confidence": 0.85, "recommendation": "П1", "reasoning": "Лидер"},
+                {"id": 2, "is_favorite": True, "confidence": "высокая", "recommendation": "П1", "reasoning": "?"},
+                {"id": 3, "is_favorite": False, "confidence": 0.5, "recommendation": "НЕТ", "reasoning": "Равные"},
+            ]}, ensure_ascii=False)
+        else:
+            content = '{"is_favorite": true, "confidence": 0.8, "recommendation": "П2", "reasoning": "Гости"}'
+        if kwargs.get('stream'):
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))], usage=None)])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+def _matches():
+    return [MatchData('football', team1, team2, score, "60'", "РПЛ")
+            for team1, team2, score in (("Зенит", "Урал", "2:0"), ("Сочи", "Спартак", "0:1"),
+                                        ("Рубин", "Ахмат", "1:0"))]
+
+
+def test_batch_with_single_fallback():
+    """Один пакетный запрос на три матча, одиночный запрос только для некорректного элемента"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(os.path.join(tmp, 'llm_cache.db'))
+        original_cache = enhanced_openai_analyzer.llm_cache
+        enhanced_openai_analyzer.llm_cache = cache
+        try:
+            analyzer = EnhancedOpenAIAnalyzer(api_key='test')
+            completions = FakeCompletions()
+            analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+            recommendations = analyzer.analyze_matches_with_enhanced_gpt(_matches(), 'football')
+            print(f"Запросов: {len(completions.requests)}, рекомендаций: {len(recommendations)}")
+            assert len(completions.requests) == 2
+            assert "АНАЛИЗИРУЕМЫЕ МАТЧИ (3)" in completions.requests[0]['messages'][1]['content']
+            assert "Сочи vs Спартак" in completions.requests[1]['messages'][1]['content']
+            assert completions.requests[1].get('stream') and not completions.requests[0].get('stream')
+            assert [(r.team1, r.recommendation_value) for r in recommendations] == [("Зенит", "П1"), ("Сочи", "П2")]
+
+            # Следующий цикл с теми же состояниями - все анализы из кэша
+            repeated = analyzer.analyze_matches_with_enhanced_gpt(_matches(), 'football')
+            assert len(completions.requests) == 2 and len(repeated) == 2
+            cache.close()
+        finally:
+            enhanced_openai_analyzer.llm_cache = original_cache
+
+
+def test_validate_analysis():
+    """Элемент пакетного ответа проверяется по схеме одиночного ответа"""
+    assert validate_analysis({"is_favorite": True, "confidence": 1, "recommendation": " П1 ", "reasoning": ""}) == {
+        "is_favorite": True, "confidence": 1.0, "recommendation": "П1", "reasoning": ""}
+    assert validate_analysis({"is_favorite": "да", "confidence": 0.8, "recommendation": "П1", "reasoning": ""}) is None
+    assert validate_analysis({"is_favorite": True, "confidence": 82, "recommendation": "П1", "reasoning": ""}) is None
+    assert validate_analysis({"is_favorite": True, "confidence": 0.8, "recommendation": "", "reasoning": ""}) is None
+    assert validate_analysis(["П1"]) is None
+
+
+if __name__ == "__main__":
+    test_batch_with_single_fallback()
+    test_validate_analysis()
+    print("✅ Тесты пакетного анализа пройдены")
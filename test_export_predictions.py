@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Тест колоночного экспорта истории прогнозов
+"""
+
+import os
+import tempfile
+import export_predictions
+from export_predictions import export_predictions as export, parse_minute, parse_period, prediction_row
+from prediction_store import JsonlPredictionStore
+
+
+def _prediction(minute, coefficient, actual_result, recommendation='П1'):
+    return {'timestamp': '2025-08-01T12:00:00+03:00', 'sport_type': 'football', 'team1': "Спартак",
+            'team2': "ЦСКА", 'score_at_prediction': '2:1', 'minute_at_prediction': minute, 'league': "РПЛ",
+            'recommendation': recommendation, 'confidence': 0.85, 'reasoning': "", 'coefficient': coefficient,
+            'source': 'betzona', 'actual_result': actual_result, 'final_score': '3:1', 'notes': ""}
+
+
+def test_parsing():
+    """Строковые поля лога разбираются в числа"""
+    assert parse_minute("67'") == 67
+    assert parse_minute("45+2'") == 47
+    assert parse_minute("2 сет") is None and parse_period("2 сет") == 2
+
+    row = prediction_row(_prediction("67'", "неизвестен", "", recommendation="ТБ 2.5"))
+    assert row['coefficient'] is None
+    assert row['total_line'] == 2.5
+    assert (row['score_home'], row['score_away'], row['final_home']) == (2, 1, 3)
+    assert row['outcome'] == -1
+    assert row['timestamp_ms'] == 1754038800000
+
+
+def test_npz_export():
+    """Экспорт в .npz пачками из хранилища: типизированные колонки и словари категорий"""
+    if export_predictions.np is None:
+        print("numpy не установлен, тест пропущен")
+        return
+    np = export_predictions.np
+
+    predictions = [_prediction("67'", "1,85", 'win'), _prediction("80'", "неизвестен", 'loss'),
+                   _prediction("", "2.10", '')]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JsonlPredictionStore(os.path.join(tmp, 'log.jsonl'), legacy_path='')
+        for i, prediction in enumerate(predictions):
+            store.append({**prediction, 'timestamp': f'2025-08-01T12:00:0{i}+03:00', 'actual_result': ''})
+        store.update_many({'2025-08-01T12:00:00+03:00': {'actual_result': 'win'},
+                           '2025-08-01T12:00:01+03:00': {'actual_result': 'loss'}})
+
+        path = os.path.join(tmp, 'predictions.npz')
+        assert export(store.iter_predictions(), path, fmt='npz', batch_size=2) == 3
+        store.close()
+
+        with np.load(path) as data:
+            print(f"Колонки: {sorted(data.files)[:6]}...")
+            assert data['minute'].dtype == np.float32
+            assert data['minute'][0] == 67 and np.isnan(data['minute'][2])
+            assert np.isnan(data['coefficient'][1]) and abs(data['coefficient'][0] - 1.85) < 1e-6
+            assert list(data['outcome']) == [1, 0, -1]
+            assert list(data['actual_result_categories'][data['actual_result']]) == ['win', 'loss', '']
+
+
+if __name__ == "__main__":
+    test_parsing()
+    test_npz_export()
+    print("✅ Тесты экспорта прогнозов пройдены")
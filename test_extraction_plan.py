@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Тест скомпилированных планов извлечения: результат совпадает с container.select()
+"""
+
+from html_backend import BACKENDS, parse_html
+from extraction_plan import get_extraction_plan
+
+HTML = """
+<div class="match-item">
+  <span class="tournament">Премьер-лига</span>
+  <b class="participant-name">Арсенал</b><b class="team-name">Челси</b><b class="team-name">Лишняя</b>
+  <div class="period"><span>2 тайм</span></div>
+  <i class="odds">1,85</i><s class="disabled"></s>
+  <a href="/other">x</a><a href="/soccer/m-1">матч</a>
+</div>
+"""
+
+FIELDS = {
+    'team_names': ('.team-name, .participant-name', 2),
+    'league': ('.league, .tournament', 1),
+    'coefficient': ('.coefficient, .odds', 1),
+    'locked': ('.locked, .disabled', 1),
+    'period': ('.period span', 1),
+    'url': ('a[href*="/soccer/m-"]', 1),
+    'links': 'a'
+}
+
+
+def _texts(nodes):
+    return [(node.get_text(strip=True), node.get('href')) for node in nodes]
+
+
+def test_plan_matches_select():
+    """План возвращает те же элементы, что и отдельные select(), на каждом бэкенде"""
+    plan = get_extraction_plan(FIELDS)
+    assert get_extraction_plan(dict(FIELDS)) is plan
+
+    for name, backend in BACKENDS.items():
+        if not backend.is_available():
+            continue
+
+        container = parse_html(HTML, name).select_one('.match-item')
+        fields = plan.extract(container)
+
+        for field, spec in FIELDS.items():
+            selector, limit = spec if isinstance(spec, tuple) else (spec, None)
+            assert _texts(fields[field]) == _texts(container.select(selector)[:limit]), (name, field)
+
+        print(f"{name}: {_texts(fields['team_names'])}")
+        assert _texts(fields['team_names']) == [('Арсенал', None), ('Челси', None)]
+        assert fields['url'][0].get('href') == '/soccer/m-1'
+
+
+if __name__ == "__main__":
+    test_plan_matches_select()
+    print("✅ Тест планов извлечения пройден")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Тест движка загрузки страниц: кэш, условные запросы и объединение запросов
+"""
+
+import threading
+import time
+import logging
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from fetch_engine import AsyncFetchEngine
+
+logging.basicConfig(level=logging.INFO)
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """Локальный сервер: отдает страницу с ETag и считает загрузки"""
+    downloads = 0
+    not_modified = 0
+    delay = 0.0
+
+    def do_GET(self):
+        time.sleep(_PageHandler.delay)
+        if self.headers.get('If-None-Match') == '"v1"':
+            _PageHandler.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        _PageHandler.downloads += 1
+        body = f"<html>{self.path}</html>".encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_server():
+    _PageHandler.downloads = 0
+    _PageHandler.not_modified = 0
+    _PageHandler.delay = 0.0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_cache_hit_and_revalidation():
+    """Повторный запрос в пределах TTL берется из кэша, после TTL - условный GET"""
+    server, base = _start_server()
+    engine = AsyncFetchEngine(cache_ttl=0.3)
+
+    try:
+        assert engine.fetch(f"{base}/live") == "<html>/live</html>"
+        assert engine.fetch(f"{base}/live") == "<html>/live</html>"
+        assert _PageHandler.downloads == 1
+
+        time.sleep(0.35)
+        assert engine.fetch(f"{base}/live") == "<html>/live</html>"
+        assert _PageHandler.downloads == 1
+        assert _PageHandler.not_modified == 1
+
+        stats = engine.cache_stats()
+        print(f"Статистика кэша: {stats}")
+        assert stats['hits'] == 1
+        assert stats['revalidated'] == 1
+    finally:
+        engine.close()
+        server.shutdown()
+
+
+def test_inflight_coalescing():
+    """Одновременные запросы одного URL выполняют одну загрузку"""
+    server, base = _start_server()
+    _PageHandler.delay = 0.3
+    engine = AsyncFetchEngine(cache_ttl=5)
+    results = []
+
+    try:
+        threads = [threading.Thread(target=lambda: results.append(engine.fetch(f"{base}/tennis"))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["<html>/tennis</html>"] * 5
+        assert _PageHandler.downloads == 1
+        print(f"Статистика кэша: {engine.cache_stats()}")
+    finally:
+        engine.close()
+        server.shutdown()
+
+
+def test_parallel_sweep():
+    """Набор страниц загружается параллельно, а не последовательно"""
+    server, base = _start_server()
+    _PageHandler.delay = 0.3
+    engine = AsyncFetchEngine(max_per_host=8, cache_ttl=0)
+
+    try:
+        started = time.perf_counter()
+        pages = engine.fetch_many(f"{base}/{sport}" for sport in ['football', 'tennis', 'table_tennis', 'handball'])
+        elapsed = time.perf_counter() - started
+
+        print(f"4 страницы загружены за {elapsed:.2f} с")
+        assert all(pages.values())
+        assert elapsed < 1.0
+    finally:
+        engine.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_cache_hit_and_revalidation()
+    test_inflight_coalescing()
+    test_parallel_sweep()
+    print("✅ Все тесты движка загрузки пройдены")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Тест индекса кандидатов FuzzyMatcher: результат совпадает с полным перебором
+"""
+
+import os
+import tempfile
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+warnings.filterwarnings('ignore', message='Using slow pure-python SequenceMatcher')
+
+import fuzzy_matcher
+from fuzzy_matcher import FuzzyMatcher, NameAliasTable, normalize_team_name
+
+SCORES24_MATCHES = [
+    {'team1': 'Спартак Москва', 'team2': 'ЦСКА', 'player1': 'Даниил Медведев', 'player2': 'Андрей Рублев'},
+    {'team1': 'Manchester United', 'team2': 'Chelsea FC', 'player1': 'Novak Djokovic', 'player2': 'Rafael Nadal'},
+    {'team1': 'Зенит', 'team2': 'Локомотив', 'player1': 'Carlos Alcaraz', 'player2': 'Jannik Sinner'},
+    {'team1': 'Real Madrid', 'team2': 'Barcelona', 'player1': 'Карен Хачанов', 'player2': 'Аслан Карацев'},
+]
+
+QUERIES = [
+    ('Спартак', 'ЦСКА Москва'), ('ФК Зенит', 'Локомотив'), ('Manchester Utd', 'Chelsea'),
+    ('Real Madrid CF', 'FC Barcelona'), ('Медведев', 'Рублев'), ('Djokovic N.', 'Nadal R.'),
+    ('Alcaraz', 'Sinner'), ('Хачанов К.', 'Карацев А.'), ('Неизвестная', 'Команда'),
+]
+
+
+def _matcher(directory):
+    """Сопоставитель с таблицей псевдонимов во временном каталоге"""
+    return FuzzyMatcher(threshold=70, aliases=NameAliasTable(os.path.join(directory, 'aliases.json')))
+
+
+def _linear_search(matcher, name1, name2, key1, key2, players):
+    """Прежний перебор всех матчей Scores24"""
+    match = matcher.match_players if players else matcher.match_teams
+    for scores24_match in SCORES24_MATCHES:
+        found1, confidence1 = match(name1, [scores24_match[key1]])
+        found2, confidence2 = match(name2, [scores24_match[key2]])
+        if found1 and found2 and confidence1 >= 70 and confidence2 >= 70:
+            return scores24_match
+    return None
+
+
+def test_index_matches_linear_search():
+    """Индекс находит те же матчи, что и полный перебор"""
+    with tempfile.TemporaryDirectory() as directory:
+        matcher = _matcher(directory)
+
+        for key1, key2, players in (('team1', 'team2', False), ('player1', 'player2', True)):
+            index = matcher.get_match_index(SCORES24_MATCHES, key1, key2, players=players)
+            assert matcher.get_match_index(SCORES24_MATCHES, key1, key2, players=players) is index
+
+            for name1, name2 in QUERIES:
+                expected = _linear_search(matcher, name1, name2, key1, key2, players)
+                found = index.find(name1, name2)
+                print(f"{name1} - {name2}: {found[key1] if found else None}")
+                assert found is expected
+
+
+def test_index_cache_threads():
+    """Кэш индексов выдерживает одновременные вызовы из потоков видов спорта"""
+    with tempfile.TemporaryDirectory() as directory:
+        matcher = _matcher(directory)
+        lists = [[dict(match) for match in SCORES24_MATCHES] for _ in range(40)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            indexes = list(executor.map(matcher.get_match_index, lists))
+
+        assert all(index.matches is matches for index, matches in zip(indexes, lists))
+        assert len(matcher._index_cache) <= 8
+
+
+def test_normalization_whole_words():
+    """Общие слова удаляются только целиком"""
+    assert normalize_team_name('Real Madrid CF') == 'madrid'
+    assert normalize_team_name('Surreal FC') == 'surreal'
+    assert normalize_team_name('ФК  Зенит-2') == 'зенит2'
+    assert normalize_team_name('Manchester United') == 'manchester'
+
+
+def test_alias_table_persists():
+    """Псевдонимы и вычисленные формы сохраняются между запусками"""
+    with tempfile.TemporaryDirectory() as directory:
+        aliases_file = os.path.join(directory, 'aliases.json')
+
+        aliases = NameAliasTable(aliases_file)
+        aliases.add_alias('Man Utd', 'Manchester United')
+        matcher = FuzzyMatcher(aliases=aliases)
+        assert matcher.normalize_name('Man Utd') == 'manchester'
+        assert matcher.normalize_name('ФК Спартак') == 'спартак'
+        aliases.save()
+
+        restored = NameAliasTable(aliases_file)
+        assert restored.lookup('Man Utd') == 'manchester'
+        assert restored.lookup('ФК Спартак') == 'спартак'
+
+
+def test_pair_events_one_to_one():
+    """Пакетное сопоставление не отдает один матч Scores24 двум строкам букмекера"""
+    betboom = [
+        {'team1': 'Зенит 2', 'team2': 'Локомотив'},
+        {'team1': 'ФК Зенит', 'team2': 'Локомотив'},
+        {'team1': 'Manchester Utd', 'team2': 'Chelsea'},
+    ]
+    scores24 = [SCORES24_MATCHES[2], SCORES24_MATCHES[1], {'team1': 'Зенит-2', 'team2': 'Локомотив-2'}]
+
+    rapid_process = fuzzy_matcher.rapid_process
+    try:
+        for backend in ([rapid_process] if rapid_process else []) + [None]:
+            fuzzy_matcher.rapid_process = backend
+            with tempfile.TemporaryDirectory() as directory:
+                matcher = _matcher(directory)
+                pairs = matcher.pair_events(betboom, scores24)
+
+                print([(left['team1'], right['team1'], confidence) for left, right, confidence in pairs])
+                assert [(betboom.index(left), scores24.index(right)) for left, right, _ in pairs] == [(0, 2), (1, 0), (2, 1)]
+
+                # Пары для поиска по матчу букмекера (общий помощник анализаторов)
+                scores, by_id = matcher.pair_events_by_id(betboom, scores24)
+                assert scores is scores24 and by_id[id(betboom[0])] is scores24[2]
+
+                assert matcher.match_many(['ФК Зенит', 'Зенит'], ['Зенит']) == [(0, 0, 100)]
+    finally:
+        fuzzy_matcher.rapid_process = rapid_process
+
+
+if __name__ == "__main__":
+    test_index_matches_linear_search()
+    test_index_cache_threads()
+    test_normalization_whole_words()
+    test_alias_table_persists()
+    test_pair_events_one_to_one()
+    print("✅ Тест индекса FuzzyMatcher пройден")
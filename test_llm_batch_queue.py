@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Тест очереди фоновых запросов к LLM (Batch API) на локальной заглушке
+"""
+
+import json
+import os
+import tempfile
+from openai import OpenAI
+import ml_tracking_system
+from llm_batch_queue import LLMBatchQueue
+from llm_batch_stub import BatchStubServer
+from ml_tracking_system import MLTrackingSystem
+from moscow_time import get_moscow_time
+from performance_metrics import PerformanceMetrics
+from prediction_store import JsonlPredictionStore
+
+
+def _responder(body):
+    prompt = body['messages'][-1]['content']
+    if 'ОШИБКА' in prompt:
+        raise ValueError("invalid request")
+    if 'АНАЛИЗИРУЕМЫЙ МАТЧ' in prompt:
+        skip = 'Сочи' in prompt
+        return json.dumps({"is_favorite": not skip, "confidence": 0.85, "recommendation": "НЕТ" if skip else "П1",
+                           "reasoning": "Бэктест"}, ensure_ascii=False)
+    return f"Ответ: {prompt[:20]}"
+
+
+def _queue(tmp, stub, **kwargs):
+    client = OpenAI(api_key='test', base_url=stub.base_url, max_retries=0)
+    return LLMBatchQueue(os.path.join(tmp, 'llm_batch.db'), os.path.join(tmp, 'batches'), client=client, **kwargs)
+
+
+def test_roundtrip_with_stub():
+    """Запросы уходят одним пакетом, ответы записываются по ключам после завершения задачи"""
+    stub = BatchStubServer(_responder)
+    stub.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = _queue(tmp, stub, flush_size=10)
+        assert queue.enqueue('reasoning', 'match-1', "Обоснование 1")
+        assert not queue.enqueue('reasoning', 'match-1', "Повтор")
+        queue.enqueue('reasoning', 'match-2', "Обоснование 2", system_prompt="Ты аналитик")
+        queue.enqueue('reasoning', 'match-3', "ОШИБКА")
+
+        assert queue.flush() is None  # Меньше flush_size, старейший запрос еще не ждал
+        batch_id = queue.flush(force=True)
+        assert batch_id and queue.counts() == {'submitted': 3}
+        assert not os.listdir(os.path.join(tmp, 'batches'))
+
+        assert queue.poll() == 0  # Задача еще выполняется
+        assert queue.poll() == 2
+        print(f"Статусы: {queue.counts()}")
+        assert queue.counts() == {'done': 2, 'failed': 1}
+        assert queue.result('reasoning', 'match-1') == "Ответ: Обоснование 1"
+        assert queue.result('reasoning', 'match-3') is None
+        assert [item['key'] for item in queue.results('reasoning')] == ['match-1', 'match-2']
+
+        # Истекшая задача: запросы без результата возвращаются в очередь
+        assert queue.enqueue('reasoning', 'match-1', "Обоснование 1 заново", refresh=True)
+        expired_id = queue.flush(force=True)
+        stub.batches[expired_id]['status'] = 'expired'
+        queue.poll()
+        assert queue.counts()['pending'] == 1
+        queue.close()
+    stub.stop()
+
+
+def test_daily_insights_and_backtest():
+    """Выводы AI попадают в дневной отчет, бэктест сравнивается с результатами"""
+    stub = BatchStubServer(_responder)
+    stub.start()
+    today = get_moscow_time().strftime('%Y-%m-%d')
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = _queue(tmp, stub)
+        original_queue = ml_tracking_system.llm_batch_queue
+        ml_tracking_system.llm_batch_queue = queue
+        try:
+            tracker = MLTrackingSystem()
+            tracker.store = JsonlPredictionStore(os.path.join(tmp, 'log.jsonl'), legacy_path='')
+            tracker.daily_stats_file = os.path.join(tmp, 'daily_stats.json')
+            tracker.metrics = PerformanceMetrics(os.path.join(tmp, 'metrics.json'), loader=tracker.store.load)
+            for hour, team1, result in (("10", "Зенит", "win"), ("11", "Сочи", "loss"), ("12", "Рубин", "")):
+                tracker.store.append({
+                    'timestamp': f'{today}T{hour}:00:00', 'sport_type': 'football', 'team1': team1, 'team2': "Урал",
+                    'score_at_prediction': '1:0', 'minute_at_prediction': "60'", 'league': "РПЛ",
+                    'recommendation': 'П1', 'confidence': 0.85, 'reasoning': '', 'coefficient': '',
+                    'source': 'test', 'actual_result': result, 'final_score': '', 'notes': ''})
+
+            stats = tracker.generate_daily_stats()
+            assert tracker.queue_daily_insights(stats)
+            assert tracker.queue_backtest(today) == 2
+            queue.flush(force=True)
+            queue.poll()
+            assert queue.poll() == 3
+
+            report = tracker.format_daily_stats_for_telegram(stats)
+            assert "• Выводы AI: Ответ: Дневная статистика" in report
+            summary = tracker.get_backtest_summary(today)
+            print(f"Бэктест: {summary}")
+            assert summary == {'analyzed': 2, 'would_bet': 1, 'wins': 1, 'avoided_losses': 1, 'win_rate': 100.0}
+            tracker.store.close()
+        finally:
+            ml_tracking_system.llm_batch_queue = original_queue
+            queue.close()
+    stub.stop()
+
+
+if __name__ == "__main__":
+    test_roundtrip_with_stub()
+    test_daily_insights_and_backtest()
+    print("✅ Тесты очереди фоновых запросов LLM пройдены")
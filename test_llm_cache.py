@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Тест постоянного кэша ответов LLM
+"""
+
+import os
+import tempfile
+import time
+from llm_cache import LLMResponseCache, match_fingerprint
+from match_record import MatchRecord
+
+
+def _match(score="2:1", minute="67'", team1="Спартак Москва"):
+    return MatchRecord(team1, "ЦСКА", score, minute, sport_type='football', league="РПЛ")
+
+
+def test_fingerprint():
+    """Отпечаток нормализует названия и округляет минуту до корзины"""
+    assert match_fingerprint(_match(minute="66'")) == match_fingerprint(_match(team1="спартак  москва", minute="69'"))
+    assert match_fingerprint(_match(minute="66'")) != match_fingerprint(_match(minute="71'"))
+    assert match_fingerprint(_match(score="2:2")) != match_fingerprint(_match())
+    assert match_fingerprint(_match(minute="2-й сет"), 'tennis')[4] == "2-й сет"
+
+
+def test_hits_ttl_and_lru():
+    """Повторный анализ берется из кэша; просроченные и давно не использованные записи удаляются"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'llm_cache.db')
+        cache = LLMResponseCache(path, ttl_minutes=60, max_entries=2)
+        calls = []
+
+        def call():
+            calls.append(1)
+            return '{"recommendation": "П1"}'
+
+        for minute in ("66'", "67'", "69'"):
+            assert cache.get_or_call('gpt-4o-mini', 'test/1', match_fingerprint(_match(minute=minute)), call)
+        assert len(calls) == 1
+        cache.get_or_call('gpt-4o-mini', 'test/2', match_fingerprint(_match()), call)
+        assert len(calls) == 2
+
+        stats = cache.stats()
+        print(f"Кэш: {stats}")
+        assert (stats['hits'], stats['misses'], stats['size']) == (2, 2, 2)
+
+        # Другой процесс видит те же записи
+        restarted = LLMResponseCache(path, ttl_minutes=60, max_entries=2)
+        assert restarted.get(restarted.make_key('gpt-4o-mini', 'test/1', match_fingerprint(_match()))) is not None
+
+        # LRU: третья запись вытесняет давно не использованную
+        time.sleep(0.01)
+        restarted.get(restarted.make_key('gpt-4o-mini', 'test/1', match_fingerprint(_match())))
+        restarted._puts = 0
+        restarted.put(restarted.make_key('gpt-4o-mini', 'test/3', 'x'), 'ответ')
+        assert restarted.get(restarted.make_key('gpt-4o-mini', 'test/2', match_fingerprint(_match()))) is None
+        assert restarted.stats()['size'] == 2
+
+        # TTL
+        restarted.ttl_seconds = 0
+        assert restarted.get(restarted.make_key('gpt-4o-mini', 'test/3', 'x')) is None
+        cache.close()
+        restarted.close()
+
+
+if __name__ == "__main__":
+    test_fingerprint()
+    test_hits_ttl_and_lru()
+    print("✅ Тесты кэша LLM пройдены")
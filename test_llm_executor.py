@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Тест общего исполнителя запросов к LLM
+"""
+
+import time
+from types import SimpleNamespace
+from llm_executor import LLMExecutor, TokenBucket, estimate_tokens, is_retryable, retry_after_seconds
+
+
+class FakeAPIError(Exception):
+    """Ошибка API с кодом и заголовками ответа, как у клиента OpenAI"""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+def test_token_bucket():
+    """Корзина выдает запас сразу, дальше - со скоростью пополнения"""
+    bucket = TokenBucket(rate_per_minute=600, capacity=2)
+    assert bucket.try_acquire() == 0 and bucket.try_acquire() == 0
+    wait = bucket.try_acquire()
+    assert 0 < wait <= 0.1
+
+    bucket.adjust(5)  # Фактический расход больше оценки - корзина в минусе
+    assert bucket.available < 0
+    assert estimate_tokens("абв" * 100, max_tokens=200) == 300
+
+
+def test_retries():
+    """Retry-After соблюдается, ошибки запроса не повторяются"""
+    assert retry_after_seconds(FakeAPIError(429, {'retry-after-ms': '50'})) == 0.05
+    assert retry_after_seconds(FakeAPIError(429, {'retry-after': '2'})) == 2.0
+    assert is_retryable(FakeAPIError(503)) and is_retryable(TimeoutError())
+    assert not is_retryable(FakeAPIError(401))
+
+    executor = LLMExecutor(max_retries=2, backoff_base=0.01)
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise FakeAPIError(429, {'retry-after-ms': '50'})
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=10))
+
+    assert executor.call(flaky, tokens=100).usage.total_tokens == 10
+    assert attempts[1] - attempts[0] >= 0.05
+    assert executor.stats()['retries'] == 1
+
+    def unauthorized():
+        attempts.append(1)
+        raise FakeAPIError(401)
+
+    attempts.clear()
+    try:
+        executor.call(unauthorized)
+        assert False, "ошибка 401 должна пробрасываться"
+    except FakeAPIError:
+        pass
+    assert len(attempts) == 1
+
+
+def test_concurrent_map():
+    """Двенадцать запросов (3 матча x 4 вида спорта) выполняются примерно за время одного"""
+    executor = LLMExecutor(max_workers=12, requests_per_minute=600)
+
+    def analyze(match_id):
+        return executor.call(lambda: time.sleep(0.2) or match_id)
+
+    started = time.monotonic()
+    results = executor.map(analyze, range(12))
+    elapsed = time.monotonic() - started
+    print(f"12 запросов за {elapsed:.2f}с")
+    assert results == list(range(12))
+    assert elapsed < 1.0
+
+    def fails(match_id):
+        raise ValueError(match_id)
+
+    assert executor.map(fails, [1, 2]) == [None, None]
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    test_token_bucket()
+    test_retries()
+    test_concurrent_map()
+    print("✅ Тесты исполнителя запросов LLM пройдены")
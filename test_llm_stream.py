@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Тест потоковых ответов LLM с досрочным прерыванием
+"""
+
+import json
+from types import SimpleNamespace
+from config import ANALYSIS_SETTINGS
+from enhanced_openai_analyzer import REJECTION_RULE
+from llm_executor import LLMExecutor, estimate_tokens
+from llm_stream import IncrementalJSONFields, complete_chat
+
+
+class FakeStream:
+    """Поток ответа по несколько символов; считает прочитанные фрагменты"""
+
+    def __init__(self, text, size=4):
+        self.chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))], usage=None)
+        yield SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=120))
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    def __init__(self, text):
+        self.text = text
+        self.stream = None
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        if kwargs.get('stream'):
+            self.stream = FakeStream(self.text)
+            return self.stream
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.text))], usage=None)
+
+
+REASONING = "Подробное обоснование, которое не нужно дописывать при отказе. " * 10
+
+
+def test_incremental_fields():
+    """Поля извлекаются независимо от границ фрагментов; вложенные объекты пропускаются"""
+    text = ('```json\n{"analysis": {"confidence": 0.1, "note": "кавычка \\" и }"},\n'
+            ' "is_favorite": true, "confidence": 0.82, "recommendation": "П\\u0031", "reasoning": "..."}\n```')
+    for size in (1, 2, 5, len(text)):
+        parser = IncrementalJSONFields(('is_favorite', 'confidence', 'recommendation'))
+        for i in range(0, len(text), size):
+            parser.feed(text[i:i + size])
+        assert parser.values == {'is_favorite': True, 'confidence': 0.82, 'recommendation': 'П1'}
+
+    parser = IncrementalJSONFields(('confidence',))
+    assert parser.feed('{"confidence": 0.8') == {}  # Число еще может продолжиться
+    assert parser.feed('5,') == {'confidence': 0.85}
+
+
+def test_abort_on_rejection():
+    """Отказ прерывает поток сразу после решающего поля, решение обработчика не меняется"""
+    rejected = '{"is_favorite": false, "confidence": 0.4, "recommendation": "НЕТ", "reasoning": "' + REASONING + '"}'
+    client = FakeClient(rejected)
+    result = complete_chat(client, REJECTION_RULE, model='gpt-4o-mini', messages=[])
+    print(f"Прочитано фрагментов: {client.stream.read} из {len(client.stream.chunks)}")
+    assert result.aborted and client.stream.closed
+    assert client.stream.read < len(client.stream.chunks) // 10
+    assert json.loads(result.text) == {'is_favorite': False}
+
+    # Корзина токенов уточняется по оценке прерванного ответа, а не по max_tokens
+    messages = [{"role": "user", "content": "Проанализируй матч " * 20}]
+    executor = LLMExecutor(max_workers=1, requests_per_minute=60, tokens_per_minute=10000)
+    estimate = estimate_tokens(messages[0]['content'], max_tokens=800)
+    result = executor.call(lambda: complete_chat(FakeClient(rejected), REJECTION_RULE, messages=messages),
+                           tokens=estimate)
+    used = result.usage.total_tokens
+    print(f"Оценка запроса: {estimate}, списано по факту: {used}")
+    assert used < estimate - 700
+    assert abs(executor.tokens.available - (10000 - used)) < 5
+    executor.shutdown()
+
+    low = '{"is_favorite": true, "confidence": 0.6, "recommendation": "П1", "reasoning": "' + REASONING + '"}'
+    assert json.loads(complete_chat(FakeClient(low), REJECTION_RULE).text) == {'is_favorite': True, 'confidence': 0.6}
+
+    accepted = '{"is_favorite": true, "confidence": 0.9, "recommendation": "П1", "reasoning": "Лидер"}'
+    result = complete_chat(FakeClient(accepted), REJECTION_RULE)
+    assert not result.aborted and result.text == accepted and result.usage.total_tokens == 120
+
+
+def test_streaming_disabled():
+    """Без правила или с выключенной настройкой - обычный запрос без потока"""
+    client = FakeClient('{"is_favorite": false}')
+    assert complete_chat(client).text == '{"is_favorite": false}' and client.stream is None
+
+    ANALYSIS_SETTINGS['llm_streaming_enabled'] = False
+    try:
+        assert not complete_chat(client, REJECTION_RULE).aborted and client.stream is None
+    finally:
+        ANALYSIS_SETTINGS['llm_streaming_enabled'] = True
+
+
+if __name__ == "__main__":
+    test_incremental_fields()
+    test_abort_on_rejection()
+    test_streaming_disabled()
+    print("✅ Тесты потоковых ответов LLM пройдены")
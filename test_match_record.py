@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Тест единой компактной записи матча
+"""
+
+import pickle
+import betzona_controller
+import enhanced_real_controller
+import multi_source_controller
+from match_record import MatchRecord, as_match_record, match_strings
+
+
+def test_slots_and_interning():
+    """Записи без __dict__, вид спорта, лига и источник - общие объекты строк"""
+    first = MatchRecord("Спартак", "ЦСКА", "1:0", "67'", 1.85, False, "football", "".join(["Р", "П", "Л"]))
+    second = MatchRecord("Зенит", "Динамо", "0:0", sport_type="football", league="РПЛ")
+    second.source = "".join(["betzona"])
+
+    assert not hasattr(first, '__dict__')
+    assert first.league is second.league
+    assert second.source is match_strings.intern("betzona")
+    assert first.odds is None
+
+    try:
+        first.unknown_field = 1
+        assert False, "Поле вне __slots__ не должно создаваться"
+    except AttributeError:
+        pass
+
+    assert pickle.loads(pickle.dumps(first)) == first
+
+
+def test_old_shapes():
+    """Контроллеры используют одну запись, прежние имена полей работают"""
+    assert betzona_controller.MatchData is enhanced_real_controller.MatchData is MatchRecord
+
+    match = multi_source_controller.MatchData('tennis', "Рублев", "Хачанов", "1:0", link="https://scores24.live/x")
+    print(f"MultiSource: {match!r}")
+    assert isinstance(match, MatchRecord)
+    assert (match.sport_type, match.sport, match.url, match.link) == ('tennis', 'tennis', match.url, match.url)
+    assert match.to_dict()['url'] == "https://scores24.live/x"
+
+    assert as_match_record(match) is match
+    converted = as_match_record({'sport': 'handball', 'team1': "Веспрем", 'team2': "Киль", 'score': "30:27"})
+    assert (converted.sport_type, converted.minute, converted.coefficient) == ('handball', "", 0.0)
+
+
+if __name__ == "__main__":
+    test_slots_and_interning()
+    test_old_shapes()
+    print("✅ Тесты записи матча пройдены")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Тест временного ряда состояний live-матчей
+"""
+
+import os
+import tempfile
+from match_record import MatchRecord
+from match_timeline import MatchTimeline
+
+
+def _match(score, minute, coefficient=0.0, team1="Спартак", team2="ЦСКА"):
+    return MatchRecord(team1, team2, score, minute, coefficient, sport_type='football')
+
+
+def test_ring_buffer_and_features():
+    """Буфер ограничен, темп и моментум считаются по изменениям счета"""
+    timeline = MatchTimeline(log_file='', max_points=3)
+    start = 1_700_000_000.0
+    cycles = [("0:0", "50'", 1.9), ("1:0", "55'", 1.6), ("1:0", "58'", 1.5), ("2:0", "62'", 1.3)]
+    for cycle, (score, minute, coefficient) in enumerate(cycles):
+        timeline.record_many([_match(score, minute, coefficient)], observed_at=start + cycle * 300)
+
+    assert len(timeline.history(_match("", ""))) == 3
+    features = timeline.features(_match("", ""))
+    print(f"Признаки: {features}")
+    assert features['observations'] == 4
+    assert features['observed_minutes'] == 15
+    assert features['momentum'] == 2
+    assert abs(features['tempo'] - 2 / 62) < 1e-9
+    assert features['minutes_since_goal'] == 0
+    assert abs(features['odds_drift'] - (1.3 - 1.6)) < 1e-9
+    assert "моментум: хозяева (+2)" in timeline.describe(_match("", ""))
+    assert timeline.features(_match("0:0", "10'", team1="Зенит")) == {}
+
+
+def test_log_restore_and_eviction():
+    """Наблюдения пишутся в журнал и восстанавливаются; давно не виденные матчи удаляются"""
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = os.path.join(tmp, 'timeline.jsonl')
+        timeline = MatchTimeline(log_file=log_file, idle_minutes=30)
+        assert timeline.record_many([_match("0:0", "10'"), _match("1:1", "30'", team1="Зенит")]) == 2
+        timeline.record_many([_match("1:0", "15'")])
+        timeline.close()
+
+        restored = MatchTimeline(log_file=log_file, idle_minutes=30)
+        assert restored.restore() == 3
+        assert len(restored) == 2
+        assert restored.features(_match("", ""))['observations'] == 2
+
+        restored.record_many([_match("2:0", "80'")], observed_at=os.path.getmtime(log_file) + 3600)
+        assert len(restored) == 1
+        restored.close()
+
+
+if __name__ == "__main__":
+    test_ring_buffer_and_features()
+    test_log_restore_and_eviction()
+    print("✅ Тесты временного ряда матчей пройдены")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Тест дедупликации матчей из нескольких источников
+"""
+
+import time
+from betzona_controller import MatchData as BetzonaMatch
+from enhanced_real_controller import MatchData as Scores24Match
+from multi_source_controller import MultiSourceController
+
+
+def _betzona(team1, team2, minute="", league=""):
+    match = BetzonaMatch(team1=team1, team2=team2, score="1:0", minute=minute, sport_type='football', league=league)
+    match.source = 'betzona'
+    return match
+
+
+def _scores24(team1, team2, minute="", league=""):
+    match = Scores24Match(team1=team1, team2=team2, score="1:0", minute=minute, coefficient=0.0,
+                          is_locked=False, sport_type='football', league=league, url="https://scores24.live/m-1")
+    match.source = 'scores24'
+    return match
+
+
+def test_merge_by_priority():
+    """Остается запись Betzona, пустые поля заполняются из Scores24"""
+    controller = MultiSourceController()
+    matches = [
+        _scores24("Спартак Москва", "ЦСКА", minute="", league="РПЛ"),
+        _betzona("спартак  москва", "цска", minute="67"),
+        _scores24("Зенит", "Локомотив", minute="12'"),
+    ]
+
+    unique = controller._remove_duplicates(matches)
+
+    print([(m.team1, m.source, m.minute, m.league) for m in unique])
+    assert len(unique) == 2
+    assert unique[0].source == 'betzona'
+    assert unique[0].minute == "67"
+    assert unique[0].league == "РПЛ"
+    assert unique[0].url == "https://scores24.live/m-1"
+
+
+def test_linear_time():
+    """Тысячи матчей обрабатываются быстро"""
+    controller = MultiSourceController()
+    matches = [_betzona(f"Команда {i}", f"Соперник {i}", minute="10") for i in range(5000)]
+    matches += [_scores24(f"Команда {i}", f"Соперник {i}", league="Лига") for i in range(5000)]
+
+    started = time.perf_counter()
+    unique = controller._remove_duplicates(matches)
+    elapsed = time.perf_counter() - started
+
+    print(f"10000 матчей -> {len(unique)} за {elapsed * 1000:.1f} мс")
+    assert len(unique) == 5000
+    assert all(m.league == "Лига" for m in unique)
+    assert elapsed < 1.0
+
+
+if __name__ == "__main__":
+    test_merge_by_priority()
+    test_linear_time()
+    print("✅ Тесты дедупликации пройдены")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Тест пула названий команд, лиг и игроков
+"""
+
+import os
+import tempfile
+from match_record import MatchRecord
+from name_pool import NamePool, name_pool
+
+
+def test_keys_and_cached_forms():
+    """Варианты написания получают общий ключ, нижний регистр вычисляется один раз"""
+    pool = NamePool(pool_file='')
+    assert pool.key("Спартак Москва") == pool.key("спартак  москва") == pool.key("Спартак москва ")
+    assert pool.key("Спартак Москва") != pool.key("ЦСКА")
+    assert pool.key("Артём Фёдоров") == pool.key("артем федоров")
+    assert pool.lower("Manchester City") is pool.lower("Manchester City")
+    assert pool.normalized("FC Barcelona") == "barcelona"
+
+    team_id = pool.intern("Зенит")
+    assert pool.intern("".join(["Зен", "ит"])) == team_id
+    assert pool.name(team_id) == "Зенит" and pool.lower(team_id) == "зенит"
+
+    full = NamePool(pool_file='', max_entries=1)
+    full.intern("Динамо")
+    assert full.intern("Локомотив") == -1
+    assert full.key("Локомотив") == "локомотив" and full.lower("Локомотив") == "локомотив"
+
+
+def test_persisted_ids():
+    """С файлом пула ID названий сохраняются между перезапусками"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool_file = os.path.join(tmp, 'name_pool.json')
+        pool = NamePool(pool_file=pool_file)
+        ids = [pool.intern(name) for name in ("Веспрем", "Киль", "Лига чемпионов EHF")]
+        pool.save()
+
+        restarted = NamePool(pool_file=pool_file)
+        assert [restarted.intern(name) for name in ("Веспрем", "Киль", "Лига чемпионов EHF")] == ids
+        print(f"Названий после перезапуска: {len(restarted)}")
+
+
+def test_match_record_uses_pool():
+    """Записи матчей разных циклов разделяют строки команд и лиг"""
+    first = MatchRecord("".join(["Рубин"]), "Урал", "0:0", league="".join(["РПЛ"]))
+    second = MatchRecord("".join(["Рубин"]), "Урал", "1:0", league="".join(["РПЛ"]))
+    assert first.team1 is second.team1 and first.league is second.league
+    assert name_pool.key(first.team1) == name_pool.key("рубин")
+
+
+if __name__ == "__main__":
+    test_keys_and_cached_forms()
+    test_persisted_ids()
+    test_match_record_uses_pool()
+    print("✅ Тесты пула названий пройдены")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Тест скользящих метрик качества прогнозов
+"""
+
+import os
+import tempfile
+from datetime import timedelta
+from moscow_time import get_moscow_time
+from performance_metrics import PerformanceMetrics
+
+
+def _prediction(days_ago, actual_result="", confidence=0.8, coefficient="1.90", sport_type="football"):
+    timestamp = (get_moscow_time() - timedelta(days=days_ago)).isoformat()
+    return {'timestamp': timestamp, 'sport_type': sport_type, 'league': "РПЛ", 'recommendation': 'П1',
+            'confidence': confidence, 'coefficient': coefficient, 'actual_result': actual_result}
+
+
+def test_rolling_windows():
+    """Окна 7/30 дней и все время, обновление результата, ROI и Brier"""
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics = PerformanceMetrics(os.path.join(tmp, 'metrics.json'), save_every=100)
+        metrics.record(_prediction(0, 'win'))
+        metrics.record(_prediction(10, 'loss', coefficient="неизвестен"))
+        metrics.record(_prediction(100, 'win', sport_type='tennis'))
+
+        pending = _prediction(1)
+        metrics.record(pending)
+        metrics.record({**pending, 'actual_result': 'loss'}, previous=pending)
+
+        result = metrics.get_metrics()
+        print(f"7 дней: {result['7d']}")
+        assert (result['7d']['settled'], result['7d']['wins']) == (2, 1)
+        assert abs(result['7d']['roi'] - (0.9 - 1) / 2 * 100) < 1e-9
+        assert abs(result['7d']['brier'] - (0.2 ** 2 + 0.8 ** 2) / 2) < 1e-9
+        assert result['30d']['settled'] == 3
+        assert result['all']['settled'] == 4
+        assert metrics.get_metrics('sport:tennis')['7d']['settled'] == 0
+        assert metrics.get_metrics('league:РПЛ')['all']['predictions'] == 4
+
+
+def test_snapshot_merge():
+    """Два процесса сохраняют свои изменения в один снимок без потерь"""
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_file = os.path.join(tmp, 'metrics.json')
+        history = [_prediction(3, 'win'), _prediction(40, 'loss')]
+
+        analysis_loop = PerformanceMetrics(snapshot_file, loader=lambda: history)
+        add_result = PerformanceMetrics(snapshot_file, loader=lambda: history)
+        assert analysis_loop.get_metrics()['all']['settled'] == 2
+
+        analysis_loop.record(_prediction(0, 'win'))
+        add_result.record(_prediction(0, 'loss'))
+        add_result.save()
+        analysis_loop.save()
+
+        reloaded = PerformanceMetrics(snapshot_file).get_metrics()
+        print(f"После слияния: {reloaded['all']}")
+        assert (reloaded['all']['settled'], reloaded['all']['wins']) == (4, 2)
+        assert reloaded['7d']['settled'] == 3
+
+
+if __name__ == "__main__":
+    test_rolling_windows()
+    test_snapshot_merge()
+    print("✅ Тесты метрик качества пройдены")
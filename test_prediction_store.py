@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Тест хранилищ прогнозов (JSON Lines и SQLite)
+"""
+
+import json
+import os
+import tempfile
+from prediction_store import JsonlPredictionStore, SqlitePredictionStore
+
+
+def _prediction(timestamp, team1="Спартак", team2="ЦСКА", sport_type="football"):
+    return {'timestamp': timestamp, 'sport_type': sport_type, 'team1': team1, 'team2': team2,
+            'recommendation': 'П1', 'actual_result': '', 'final_score': '', 'notes': ''}
+
+
+def test_append_update_and_corrupt_line():
+    """Обновления применяются при чтении, оборванная строка пропускается"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JsonlPredictionStore(os.path.join(tmp, 'log.jsonl'), legacy_path='')
+        store.append(_prediction('2025-01-01T12:00:00'))
+        store.append(_prediction('2025-01-02T12:00:00', team1="Зенит"))
+        store.update('2025-01-01T12:00:00', {'actual_result': 'win', 'final_score': '2:0'})
+        store.close()
+
+        # Имитация сбоя посреди записи
+        with open(store.path, 'a', encoding='utf-8') as f:
+            f.write('{"timestamp": "2025-01-0')
+
+        predictions = JsonlPredictionStore(store.path, legacy_path='').load()
+        print(f"Прогнозов: {len(predictions)}")
+        assert len(predictions) == 2
+        assert predictions[0]['actual_result'] == 'win'
+        assert predictions[0]['final_score'] == '2:0'
+        assert predictions[1]['actual_result'] == ''
+        assert list(JsonlPredictionStore(store.path, legacy_path='').iter_predictions()) == predictions
+
+
+def test_migration_and_compaction():
+    """История переносится из JSON-массива, сжатие сворачивает обновления"""
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'log.json')
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump([_prediction(f'2025-01-01T12:00:{i:02d}', team1=f"Команда {i}") for i in range(5)], f)
+
+        store = JsonlPredictionStore(os.path.join(tmp, 'log.jsonl'), legacy_path=legacy_path,
+                                     compact_after_updates=3)
+        assert len(store.load()) == 5
+        assert not os.path.exists(legacy_path)
+        assert os.path.exists(legacy_path + '.migrated')
+
+        for i in range(3):
+            store.update(f'2025-01-01T12:00:{i:02d}', {'actual_result': 'loss'})
+        store.append(_prediction('2025-01-01T13:00:00', team1="После сжатия"))
+        store.close()
+
+        with open(store.path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        print(f"Строк после сжатия: {len(lines)}")
+        assert len(lines) == 6
+        assert not any('_update' in line for line in lines)
+
+        found = store.find_prediction("Команда 1", "ЦСКА", "2025-01-01")
+        assert found and found['actual_result'] == 'loss'
+        assert len(store.predictions_for_date('2025-01-01')) == 6
+
+
+def test_sqlite_store():
+    """SQLite: перенос из JSON Lines, индексные запросы и два соединения в режиме WAL"""
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl_path = os.path.join(tmp, 'log.jsonl')
+        jsonl = JsonlPredictionStore(jsonl_path, legacy_path='')
+        jsonl.append(_prediction('2025-01-01T12:00:00'))
+        jsonl.append(_prediction('2025-01-01T13:00:00', team1="Зенит", sport_type='tennis'))
+        jsonl.update('2025-01-01T12:00:00', {'actual_result': 'win'})
+        jsonl.close()
+
+        db_path = os.path.join(tmp, 'log.db')
+        store = SqlitePredictionStore(db_path, jsonl_path=jsonl_path, legacy_path='')
+        assert len(store.load()) == 2
+        assert os.path.exists(jsonl_path + '.migrated')
+
+        # Второй процесс (например, add_result.py) пишет через свое соединение
+        other = SqlitePredictionStore(db_path, jsonl_path='', legacy_path='')
+        other.append(_prediction('2025-01-02T10:00:00', team1="Урал"))
+        assert other.update('2025-01-01T13:00:00', {'actual_result': 'loss', 'final_score': '0:2'})
+
+        found = store.find_prediction("Зенит", "ЦСКА", "2025-01-01")
+        assert found['actual_result'] == 'loss' and found['final_score'] == '0:2'
+        assert len(store.predictions_for_date('2025-01-01')) == 2
+        assert list(store.iter_predictions(batch_size=2)) == store.load()
+
+        win_rates = store.sport_win_rates('2025-01-01')
+        print(f"Винрейт по видам спорта: {win_rates}")
+        assert win_rates['football'] == {'total': 1, 'wins': 1, 'losses': 0, 'win_rate': 100.0}
+        assert win_rates['tennis']['losses'] == 1
+        assert store.sport_win_rates()['football']['total'] == 2
+
+        store.close()
+        other.close()
+
+
+if __name__ == "__main__":
+    test_append_update_and_corrupt_line()
+    test_migration_and_compaction()
+    test_sqlite_store()
+    print("✅ Тесты хранилища прогнозов пройдены")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Тест автоматического расчета результатов прогнозов
+"""
+
+import os
+import tempfile
+from enhanced_real_controller import MatchData
+from ml_tracking_system import MLTrackingSystem
+from moscow_time import get_moscow_time
+from performance_metrics import PerformanceMetrics
+from prediction_store import JsonlPredictionStore
+from result_settlement import ResultSettlementWorker, settle_outcome
+
+
+class FinishedMatchesController:
+    """Завершенные матчи без обращения к сайту"""
+
+    def __init__(self, matches):
+        self.matches = matches
+        self.requested = []
+
+    def get_finished_matches_batch(self, sport_types):
+        self.requested.append(sorted(sport_types))
+        return {sport: [m for m in self.matches if m.sport_type == sport] for sport in sport_types}
+
+
+def _tracker(tmp):
+    tracker = MLTrackingSystem()
+    tracker.store = JsonlPredictionStore(os.path.join(tmp, 'log.jsonl'), legacy_path='')
+    tracker.metrics = PerformanceMetrics(os.path.join(tmp, 'metrics.json'), loader=tracker.store.load)
+    return tracker
+
+
+def _prediction(hour, team1, team2, recommendation, sport_type='football'):
+    timestamp = get_moscow_time().replace(hour=hour, minute=0, second=0, microsecond=0).isoformat()
+    return {'timestamp': timestamp, 'sport_type': sport_type, 'team1': team1, 'team2': team2,
+            'recommendation': recommendation, 'confidence': 0.8, 'coefficient': '1.80',
+            'actual_result': '', 'final_score': '', 'notes': '', 'source': 'betzona'}
+
+
+def _finished(team1, team2, score, sport_type='football'):
+    return MatchData(team1=team1, team2=team2, score=score, minute="", coefficient=0.0,
+                     is_locked=False, sport_type=sport_type)
+
+
+def test_settle_outcome():
+    """Исход ставки по итоговому счету"""
+    assert settle_outcome('П1', 'A', 'B', (2, 1)) == 'win'
+    assert settle_outcome('П2', 'A', 'B', (2, 1)) == 'loss'
+    assert settle_outcome('П1', 'A', 'B', (1, 1)) == 'loss'
+    assert settle_outcome('ТБ 45.5', 'A', 'B', (25, 22)) == 'win'
+    assert settle_outcome('ТМ 45.5', 'A', 'B', (25, 22)) == 'loss'
+    assert settle_outcome('ТБ 3', 'A', 'B', (2, 1)) == 'push'
+    assert settle_outcome('Победа Рублев', 'Андрей Рублев', 'Карен Хачанов', (0, 2)) == 'loss'
+    assert settle_outcome('Победа игрока', 'A', 'B', (2, 0)) is None
+    assert settle_outcome('Победа Ли', 'Лиам Броуди', 'Ли Н.', (0, 2)) == 'win'
+    assert settle_outcome('Победа Ли', 'Ли Ч.', 'Ли Н.', (2, 0)) is None
+
+
+def test_worker_settles_in_bulk():
+    """Один пакет запросов на нужные виды спорта, результаты записываются одним обновлением"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = _tracker(tmp)
+        tracker.store.append(_prediction(1, "Спартак Москва", "ЦСКА", "П1"))
+        tracker.store.append(_prediction(2, "Динамо Киев", "Шахтер", "П2"))
+        tracker.store.append(_prediction(3, "Веспрем", "Киль", "ТБ 55.5", sport_type='handball_totals'))
+
+        controller = FinishedMatchesController([
+            _finished("ФК Спартак Москва", "ЦСКА", "2:0"),
+            _finished("Веспрем", "Киль", "30:27", sport_type='handball'),
+        ])
+        worker = ResultSettlementWorker(tracker=tracker, controller=controller)
+        assert worker.run_once() == 2
+        assert controller.requested == [['football', 'handball']]
+
+        results = {p['team1']: (p['actual_result'], p['final_score']) for p in tracker.store.load()}
+        print(f"Результаты: {results}")
+        assert results["Спартак Москва"] == ('win', '2:0')
+        assert results["Веспрем"] == ('win', '30:27')
+        assert results["Динамо Киев"] == ('', '')
+        assert tracker.metrics.get_metrics()['all']['settled'] == 2
+        tracker.store.close()
+
+
+def test_worker_settles_all_predictions_on_match():
+    """Все прогнозы на завершенный матч рассчитываются за один проход"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = _tracker(tmp)
+        tracker.store.append(_prediction(1, "Киль", "Фленсбург", "П1", sport_type='handball'))
+        tracker.store.append(_prediction(2, "Киль", "Фленсбург", "ТБ 55.5", sport_type='handball_totals'))
+        tracker.store.append(_prediction(3, "Киль", "Фленсбург", "П1", sport_type='handball'))
+
+        controller = FinishedMatchesController([_finished("Киль", "Фленсбург", "30:27", sport_type='handball')])
+        worker = ResultSettlementWorker(tracker=tracker, controller=controller)
+        assert worker.run_once() == 3
+        assert [p['actual_result'] for p in tracker.store.load()] == ['win', 'win', 'win']
+        tracker.store.close()
+
+
+def test_manual_result_settles_original_prediction():
+    """Ручной результат закрывает исходный прогноз вместо новой записи manual_entry"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = _tracker(tmp)
+        tracker.store.append(_prediction(1, "Dinthar FC", "Пекхэм Таун", "П1"))
+
+        tracker.add_manual_result("Dinthar", "Пекхэм Таун", "П1", "loss", "Матч завершился 2:3")
+        tracker.add_manual_result("Неизвестная", "Команда", "П2", "win")
+
+        predictions = tracker.store.load()
+        assert len(predictions) == 2
+        assert predictions[0]['actual_result'] == 'loss'
+        assert predictions[0]['notes'] == "Матч завершился 2:3"
+        assert predictions[1]['sport_type'] == 'manual_entry'
+        tracker.store.close()
+
+
+def test_manual_result_matches_recommendation():
+    """На один матч несколько прогнозов: закрывается только прогноз с той же рекомендацией"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = _tracker(tmp)
+        tracker.store.append(_prediction(1, "Киль", "Фленсбург", "П1", sport_type='handball'))
+        tracker.store.append(_prediction(2, "Киль", "Фленсбург", "ТБ 55.5", sport_type='handball_totals'))
+
+        tracker.add_manual_result("Киль", "Фленсбург", "П1", "win")
+        tracker.add_manual_result("ГК Киль", "Фленсбург", "ТБ 55.5", "loss", sport_type='handball_totals')
+
+        predictions = tracker.store.load()
+        results = {p['recommendation']: p['actual_result'] for p in predictions}
+        print(f"Результаты: {results}")
+        assert len(predictions) == 2
+        assert results == {"П1": "win", "ТБ 55.5": "loss"}
+        tracker.store.close()
+
+
+if __name__ == "__main__":
+    test_settle_outcome()
+    test_worker_settles_in_bulk()
+    test_worker_settles_all_predictions_on_match()
+    test_manual_result_settles_original_prediction()
+    test_manual_result_matches_recommendation()
+    print("✅ Тесты расчета результатов пройдены")
@@ -6,30 +6,21 @@ import requests
 import time
 import json
 from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
+from match_record import MatchRecord
 from bs4 import BeautifulSoup
+from html_backend import parse_html, SoupNode
 import re
 from urllib.parse import urljoin
 import logging
+from fetch_engine import fetch_engine
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class MatchData:
-    """Структура данных о матче"""
-    team1: str
-    team2: str
-    score: str
-    minute: str
-    coefficient: float
-    is_locked: bool
-    sport_type: str
-    league: str = ""
-    url: str = ""
-    status: str = ""
+# Единая запись матча для всех контроллеров (__slots__, общая таблица строк)
+MatchData = MatchRecord
 
 
 class WinlineController:
@@ -60,20 +51,12 @@ class WinlineController:
     
     def get_page_content(self, url: str, timeout: int = 30) -> Optional[str]:
         """Получение содержимого страницы"""
-        try:
-            logger.info(f"Запрос к Winline: {url}")
-            response = self.session.get(url, timeout=timeout, allow_redirects=True)
-            response.raise_for_status()
-            
-            if response.encoding == 'ISO-8859-1':
-                response.encoding = 'utf-8'
-            
-            logger.info(f"Получен ответ: {len(response.text)} символов")
-            return response.text
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка HTTP запроса к {url}: {e}")
-            return None
+        logger.info(f"Запрос к Winline: {url}")
+        html = fetch_engine.fetch(url, headers=self.session.headers, timeout=timeout)
+        
+        if html is not None:
+            logger.info(f"Получен ответ: {len(html)} символов")
+        return html
     
     def parse_winline_matches(self, html: str, sport_type: str) -> List[MatchData]:
         """Парсинг матчей с Winline"""
@@ -81,7 +64,7 @@ class WinlineController:
             return []
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            document = parse_html(html)
             matches = []
             
             # Ищем различные возможные селекторы для матчей
@@ -99,7 +82,7 @@ class WinlineController:
             
             match_containers = []
             for selector in possible_selectors:
-                containers = soup.select(selector)
+                containers = document.select(selector)
                 if containers:
                     logger.info(f"Найдено {len(containers)} контейнеров с селектором: {selector}")
                     match_containers.extend(containers)
@@ -107,14 +90,18 @@ class WinlineController:
             
             if not match_containers:
                 # Попробуем найти любые элементы с текстом, содержащим ":" (счет)
+                # Поиск по текстовым узлам есть только в BeautifulSoup - редкий запасной путь
+                soup = BeautifulSoup(html, 'html.parser')
                 all_elements = soup.find_all(text=re.compile(r'\d+:\d+'))
                 logger.info(f"Найдено {len(all_elements)} элементов с возможным счетом")
                 
                 # Ищем родительские контейнеры
+                parents = []
                 for element in all_elements[:10]:  # Ограничиваем для производительности
                     parent = element.parent
-                    if parent and parent not in match_containers:
-                        match_containers.append(parent)
+                    if parent and parent not in parents:
+                        parents.append(parent)
+                match_containers.extend(SoupNode(parent) for parent in parents)
             
             logger.info(f"Всего найдено {len(match_containers)} контейнеров матчей на Winline")
             